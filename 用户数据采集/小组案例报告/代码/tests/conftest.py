@@ -0,0 +1,5 @@
+"""测试直接导入 代码/ 下的脚本模块"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,40 @@
+"""长词吞掉其他类别关键词时的补记 (见 KeywordMatcher.compound_lookup)"""
+import pytest
+
+import 分词词典
+from 关键词匹配 import KeywordMatcher, PreTokenized
+
+LEXICONS = {
+    'aggression': {'必须赢', '赢', '我'},
+    'maturity': {'我们'},
+    'personal': {'必须', '赢', '我'},
+    'team': {'我们', '我们的'},
+}
+
+# 原生 jieba 对这两个领域词的切分 (见 分词词典.lexicon_splits)
+SPLITS = {'必须赢': ['必须', '赢'], '我们的': ['我们', '的']}
+
+
+@pytest.fixture
+def splits(monkeypatch):
+    monkeypatch.setattr(分词词典, 'lexicon_splits', lambda words, folder=None: SPLITS)
+
+
+def test_swallowed_keywords_are_credited(monkeypatch, splits):
+    monkeypatch.setattr(分词词典, 'USE_LEXICON', True)
+    counts, total = KeywordMatcher(LEXICONS).count(PreTokenized(['我们的', '队伍', '必须赢']))
+    # 本身所属的类别只记一次，其他类别按原生切分补记
+    assert counts == {'aggression': 1, 'maturity': 1, 'personal': 2, 'team': 1}
+    assert total == 3
+
+
+def test_plain_jieba_counts_exact_tokens(monkeypatch, splits):
+    monkeypatch.setattr(分词词典, 'USE_LEXICON', False)
+    counts, _ = KeywordMatcher(LEXICONS).count(PreTokenized(['我们', '的', '必须', '赢']))
+    assert counts == {'aggression': 1, 'maturity': 1, 'personal': 2, 'team': 1}
+
+
+def test_raw_mode_credits_swallowed_keywords(splits):
+    counts, total = KeywordMatcher(LEXICONS).count('我们的队伍必须赢', mode='raw')
+    assert counts == {'aggression': 1, 'maturity': 1, 'personal': 2, 'team': 1}
+    assert total == 4
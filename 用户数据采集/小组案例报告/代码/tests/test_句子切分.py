@@ -0,0 +1,37 @@
+"""sentences() 与 spans() + text() 的一致性回归测试 (修改分句规则或块 / 窗口处理后必须通过)"""
+import random
+
+import pytest
+
+from 句子切分 import Segmenter
+
+PARAGRAPHS = [
+    ['今天的比赛打得很好。我们都很开心！', '下一场继续努力'],
+    ['[12:30] 开头的时间戳会被跳过。句中 [12:31] 的时间戳会被删掉。'],
+    ['第一句话结束。然后 [[12:30]12:30] 没有结尾', '下一段内容在这里。'],  # 嵌套时间戳跨块
+    ['“我们赢了！”他说。', '」这是右引号开头的段落……省略号之后', '英文省略号... 也是边界'],
+    ['没有句末标点的段落', '会与下一段相连', ''],
+]
+
+# 随机段落的组成片段 (含不完整、嵌套的时间戳)
+PIECES = list('我们今天打得很好') + ['。', '！', '？', '……', '...', '”', '[12:30]', '[', '12:30]', ' ', '\n', 'ab']
+
+
+def _check(paragraphs, window):
+    segmenter = Segmenter(window=window)
+    text = '\n'.join(paragraphs)
+    assert list(segmenter.sentences(paragraphs)) == [segmenter.text(text, span) for span in segmenter.spans(text)]
+
+
+@pytest.mark.parametrize('window', [4, 8, 16, 1 << 16])
+@pytest.mark.parametrize('paragraphs', PARAGRAPHS)
+def test_sentences_match_spans(paragraphs, window):
+    _check(paragraphs, window)
+
+
+def test_sentences_match_spans_random():
+    rng = random.Random(0)
+    for _ in range(2000):
+        paragraphs = [''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 15)))
+                      for _ in range(rng.randint(1, 6))]
+        _check(paragraphs, rng.choice([4, 8, 16, 1 << 16]))
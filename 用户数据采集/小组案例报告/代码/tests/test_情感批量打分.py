@@ -0,0 +1,71 @@
+"""批量打分引擎与逐句 SnowNLP 的等价性回归测试 (升级 SnowNLP 或修改向量化实现后必须通过)"""
+import numpy as np
+import pytest
+
+pytest.importorskip('snownlp')
+pytest.importorskip('scipy')
+
+from snownlp import SnowNLP
+
+from 情感批量打分 import BatchSentimentScorer
+
+# 与 SnowNLP 的最大允许误差 (两者只有浮点运算顺序不同，实测误差约 1e-13)
+TOLERANCE = 1e-9
+
+SENTENCES = [
+    '这场比赛我们打得非常好，大家都很开心。',
+    '输了比赛心里很难受，但还要继续努力',
+    '我觉得自己还有很多不足',
+    '兄弟们一起必须赢！',
+    '好',
+    '哈哈哈哈哈哈',
+    '队友们的配合越来越默契了，我相信明年会更好',
+    'Faker 在 MSI 上拿到了 MVP',          # 中英混排
+    '2023年S13总决赛3:0获胜',             # 数字与汉字混排
+    '今天的对手是T1，gg wp',
+    'hello world',                       # 纯 ASCII
+    'GG',
+    '12345',
+    '。！？……',                           # 纯标点
+    '!!!???',
+    '   ',                               # 纯空白
+    '（笑）——「好吧」',
+    '这是一个非常非常非常非常非常非常非常非常非常非常非常非常非常长的句子，用来覆盖较长片段的分词',
+]
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return BatchSentimentScorer()
+
+
+def snownlp_score(sent):
+    return (SnowNLP(sent).sentiments - 0.5) * 2
+
+
+def test_matches_snownlp(scorer):
+    expected = np.array([snownlp_score(sent) for sent in SENTENCES])
+    actual = scorer.score(SENTENCES)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_order_independent(scorer):
+    """同一句话的得分不受同批其它句子影响 (分桶、去重不改变结果)"""
+    batch = scorer.score(SENTENCES)
+    single = np.array([scorer.score([sent])[0] for sent in SENTENCES])
+    np.testing.assert_allclose(single, batch, rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(scorer.score(SENTENCES[::-1])[::-1], batch, rtol=0, atol=TOLERANCE)
+
+
+def test_empty_sentence_scores_zero(scorer):
+    """SnowNLP 对空句抛异常，情绪稳定性.score_sentence 记为 0 分，批量引擎保持一致"""
+    with pytest.raises(Exception):
+        SnowNLP('').sentiments
+    scores = scorer.score(['', SENTENCES[0], ''])
+    assert scores[0] == 0.0 and scores[2] == 0.0
+    assert abs(scores[1] - snownlp_score(SENTENCES[0])) <= TOLERANCE
+
+
+def test_empty_batch(scorer):
+    assert len(scorer.score([])) == 0
@@ -1,182 +1,337 @@
-import matplotlib.pyplot as plt
-import numpy as np
-import jieba
-import docx
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import os
-import platform
-
-# ==========================================
-# 1. 配置与中文字体
-# ==========================================
-# 自动检测系统并设置中文字体，防止乱码
-system_name = platform.system()
-if system_name == "Windows":
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
-elif system_name == "Darwin":  # MacOS
-    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
-else:
-    plt.rcParams['font.sans-serif'] = ['sans-serif']
-
-plt.rcParams['axes.unicode_minus'] = False
-
-# ==========================================
-# 2. 定义“身份认同”词典 (Identity Dictionaries)
-# ==========================================
-
-# 🔴 个人/自我 (Personal/Self)
-# 核心逻辑：强调“我”的主体性，关注个人表现、荣誉与责任
-personal_keywords = {
-    # 第一人称代词
-    "我", "我的", "自己", "个人", "私心",
-    # 强调个人成就/行为的词
-    "单杀", "证明", "最强", "第一", "无敌", "统治",
-    "必须", "赢", "夺冠", "表现", "当饭吃", "焦点",
-    "责任", "误判", "不足", "评价", "反思", "压力", "方向", "出路", "信心",
-    "碾压", "愤怒", "击败", "完美"
-}
-
-# 🔵 团队/集体 (Team/Collective)
-# 核心逻辑：强调“我们”的共同体，关注连接、协作与他者
-team_keywords = {
-    # 复数代词与集体名词
-    "我们", "我们的", "团队", "队伍", "队友", "大家", "SKT", "T1", "兄弟们",
-    # 强调连接/互动的词
-    "配合", "合作", "帮助", "感谢", "感激", "谢谢",
-    "粉丝", "支持", "夸赞", "对手", "一起", "享受", "幸福", "热情", "感恩", "过程",
-    "快乐", "启发", "信任"
-}
-
-
-# ==========================================
-# 3. 工具函数
-# ==========================================
-
-def read_word_file(filepath):
-    """读取 .docx 文件中的所有文本"""
-    if not filepath:
-        return ""
-    try:
-        doc = docx.Document(filepath)
-        full_text = []
-        for para in doc.paragraphs:
-            if para.text.strip():
-                full_text.append(para.text.strip())
-        return "\n".join(full_text)
-    except Exception as e:
-        print(f"❌ 读取文件失败: {filepath}\n错误: {e}")
-        return ""
-
-
-def calculate_identity_density(text):
-    """计算文本中两类关键词的密度"""
-    if not text: return 0, 0
-    words = list(jieba.cut(text))
-    total_words = len(words)
-    if total_words == 0: return 0, 0
-
-    p_count = sum(1 for w in words if w in personal_keywords)
-    t_count = sum(1 for w in words if w in team_keywords)
-
-    # 计算密度 (x100 转为百分比，再乘系数放大视觉差异)
-    p_score = (p_count / total_words) * 100 * 2.5
-    t_score = (t_count / total_words) * 100 * 2.5
-
-    return p_score, t_score
-
-
-# ==========================================
-# 4. 主程序逻辑
-# ==========================================
-
-def main():
-    root = tk.Tk()
-    root.withdraw()  # 隐藏主窗口
-
-    print("=== Faker 身份认同转变分析工具 (本地文件版) ===")
-    print("请按照提示依次选择三个时期的 Word 文档 (.docx)")
-
-    stages = ["前期 (Early)", "中期 (Middle)", "后期 (Late)"]
-    p_scores = []
-    t_scores = []
-    file_names = []
-
-    # 依次选择文件
-    for stage in stages:
-        messagebox.showinfo("选择文件", f"请选择【{stage}】的采访文档 (.docx)")
-        path = filedialog.askopenfilename(
-            title=f"选择 {stage} 文档",
-            filetypes=[("Word Documents", "*.docx")]
-        )
-
-        if path:
-            print(f"正在分析: {os.path.basename(path)}...")
-            text = read_word_file(path)
-            p, t = calculate_identity_density(text)
-            p_scores.append(p)
-            t_scores.append(t)
-            file_names.append(os.path.basename(path))
-        else:
-            print(f"⚠️ 跳过 {stage} (未选择文件)，数值记为 0")
-            p_scores.append(0)
-            t_scores.append(0)
-            file_names.append("未选择")
-
-    print("\n📊 分析结果:")
-    print(f"{'阶段':<15} | {'个人词频 (I/Me)':<18} | {'团队词频 (We/Us)':<18}")
-    print("-" * 55)
-    for i in range(3):
-        print(f"{stages[i]:<15} | {p_scores[i]:<18.2f} | {t_scores[i]:<18.2f}")
-
-    # ==========================================
-    # 5. 可视化绘制
-    # ==========================================
-
-    plt.figure(figsize=(12, 7))
-    x = np.arange(len(stages))
-    width = 0.35
-
-    # --- 绘制双柱状图 ---
-    bars1 = plt.bar(x - width / 2, p_scores, width, label='个人/自我 (I/Me)', color='#d62728', alpha=0.85)
-    bars2 = plt.bar(x + width / 2, t_scores, width, label='团队/集体 (We/Team)', color='#1f77b4', alpha=0.85)
-
-    # --- 绘制趋势线 ---
-    plt.plot(x - width / 2, p_scores, color='#d62728', marker='o', linewidth=2, linestyle='--', alpha=0.4)
-    plt.plot(x + width / 2, t_scores, color='#1f77b4', marker='s', linewidth=2, linestyle='--', alpha=0.4)
-
-    # 装饰图表
-    plt.title('从“我”到“我们”：Faker 职业生涯身份认同转变分析', fontsize=16, pad=20)
-    plt.ylabel('词汇密度指数 (Density Index)', fontsize=12)
-    plt.xticks(x, stages, fontsize=12)
-    plt.legend(fontsize=11)
-    plt.grid(axis='y', linestyle='--', alpha=0.3)
-
-    # 显示数值
-    def add_labels(bars, color):
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width() / 2., height + 0.1,
-                     f'{height:.1f}', ha='center', va='bottom', color=color, fontweight='bold')
-
-    add_labels(bars1, '#d62728')
-    add_labels(bars2, '#1f77b4')
-
-    # 添加解读标签 (根据数值大小动态调整位置)
-    try:
-        if p_scores[0] > t_scores[0]:
-            plt.annotate('孤胆英雄', xy=(0 - width / 2, p_scores[0]), xytext=(0 - width / 2, p_scores[0] + 2),
-                         ha='center', color='#d62728', fontweight='bold')
-
-        if t_scores[2] > p_scores[2]:
-            plt.annotate('精神领袖', xy=(2 + width / 2, t_scores[2]), xytext=(2 + width / 2, t_scores[2] + 2),
-                         ha='center', color='#1f77b4', fontweight='bold')
-    except:
-        pass
-
-    plt.tight_layout()
-    plt.show()
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import matplotlib.pyplot as plt
+import numpy as np
+import os
+import sys
+import csv
+import argparse
+import platform
+
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+except ImportError:  # 无界面服务器可能没有 Tk，批处理模式不依赖它
+    tk = None
+
+from itertools import chain
+
+from 命令行工具 import add_input_arguments, collect_period_files
+from 文本提取 import read_paragraphs, read_text
+from 关键词匹配 import shared_matcher
+from 分词缓存 import DEFAULT_TOKEN_DIR, TokenCache
+from 文本存储 import add_store_arguments, use_store
+from 词频矩阵 import (DocumentTermMatrix, add_corpus_arguments, check_corpus_arguments, group_documents,
+                  write_table)
+import 分词词典
+from 图表渲染 import ReusableFigure, add_format_argument, renderer, save_figure, use_headless
+from 性能剖析 import PROFILER, add_profile_arguments, finish_profiling, start_profiling
+
+# ==========================================
+# 1. 配置与中文字体
+# ==========================================
+# 自动检测系统并设置中文字体，防止乱码
+system_name = platform.system()
+if system_name == "Windows":
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
+elif system_name == "Darwin":  # MacOS
+    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
+else:
+    plt.rcParams['font.sans-serif'] = ['sans-serif']
+
+plt.rcParams['axes.unicode_minus'] = False
+
+# ==========================================
+# 2. 定义“身份认同”词典 (Identity Dictionaries)
+# ==========================================
+
+# 🔴 个人/自我 (Personal/Self)
+# 核心逻辑：强调“我”的主体性，关注个人表现、荣誉与责任
+personal_keywords = {
+    # 第一人称代词
+    "我", "我的", "自己", "个人", "私心",
+    # 强调个人成就/行为的词
+    "单杀", "证明", "最强", "第一", "无敌", "统治",
+    "必须", "赢", "夺冠", "表现", "当饭吃", "焦点",
+    "责任", "误判", "不足", "评价", "反思", "压力", "方向", "出路", "信心",
+    "碾压", "愤怒", "击败", "完美"
+}
+
+# 🔵 团队/集体 (Team/Collective)
+# 核心逻辑：强调“我们”的共同体，关注连接、协作与他者
+team_keywords = {
+    # 复数代词与集体名词
+    "我们", "我们的", "团队", "队伍", "队友", "大家", "SKT", "T1", "兄弟们",
+    # 强调连接/互动的词
+    "配合", "合作", "帮助", "感谢", "感激", "谢谢",
+    "粉丝", "支持", "夸赞", "对手", "一起", "享受", "幸福", "热情", "感恩", "过程",
+    "快乐", "启发", "信任"
+}
+
+
+# ==========================================
+# 3. 工具函数
+# ==========================================
+
+def read_word_file(filepath):
+    """读取 .docx 文件中的所有文本"""
+    return read_text(filepath)
+
+
+def read_word_paragraphs(filepaths):
+    """逐段读取多个 .docx (流式)，供 calculate_density 直接消费"""
+    return chain.from_iterable(read_paragraphs(f) for f in filepaths)
+
+
+def calculate_identity_density(text, mode='jieba'):
+    """计算文本中两类关键词的密度 (text: 字符串或段落迭代器; mode: 'jieba' 或 'raw')"""
+    if not text: return 0, 0
+    return identity_density_from_counts(*shared_matcher().count(text, mode))
+
+
+def identity_density_from_counts(counts, total_words):
+    """由共用匹配器 (见 关键词匹配.shared_matcher) 的一次计数得到 (个人得分, 团队得分)"""
+    p_count, t_count = counts['personal'], counts['team']
+    if total_words == 0: return 0, 0
+
+    # 计算密度 (x100 转为百分比，再乘系数放大视觉差异)
+    p_score = (p_count / total_words) * 100 * 2.5
+    t_score = (t_count / total_words) * 100 * 2.5
+
+    return p_score, t_score
+
+
+def print_results(stages, p_scores, t_scores):
+    """打印各阶段的个人 / 团队词频"""
+    print("\n📊 分析结果:")
+    print(f"{'阶段':<15} | {'个人词频 (I/Me)':<18} | {'团队词频 (We/Us)':<18}")
+    print("-" * 55)
+    for i in range(len(stages)):
+        print(f"{stages[i]:<15} | {p_scores[i]:<18.2f} | {t_scores[i]:<18.2f}")
+
+
+# ==========================================
+# 4. 可视化绘制
+# ==========================================
+
+class IdentityFigure(ReusableFigure):
+    """“我”与“我们”的双柱状图 + 趋势线"""
+
+    width = 0.35
+
+    def layout_key(self, stages, p_scores, t_scores):
+        return tuple(stages)
+
+    def build(self, stages, p_scores, t_scores):
+        self.fig = plt.figure(figsize=(12, 7))
+        ax = self.ax = self.fig.gca()
+        x = self.x = np.arange(len(stages))
+        width = self.width
+        zeros = [0] * len(stages)
+
+        # --- 绘制双柱状图 ---
+        self.bars1 = ax.bar(x - width / 2, zeros, width, label='个人/自我 (I/Me)', color='#d62728', alpha=0.85)
+        self.bars2 = ax.bar(x + width / 2, zeros, width, label='团队/集体 (We/Team)', color='#1f77b4', alpha=0.85)
+
+        # --- 绘制趋势线 ---
+        self.line1, = ax.plot(x - width / 2, zeros, color='#d62728', marker='o', linewidth=2, linestyle='--', alpha=0.4)
+        self.line2, = ax.plot(x + width / 2, zeros, color='#1f77b4', marker='s', linewidth=2, linestyle='--', alpha=0.4)
+
+        # 装饰图表
+        ax.set_title('从“我”到“我们”：Faker 职业生涯身份认同转变分析', fontsize=16, pad=20)
+        ax.set_ylabel('词汇密度指数 (Density Index)', fontsize=12)
+        ax.set_xticks(x, stages, fontsize=12)
+        ax.legend(fontsize=11)
+        ax.grid(axis='y', linestyle='--', alpha=0.3)
+
+        # 数值标签
+        def add_labels(bars, color):
+            return [ax.text(bar.get_x() + bar.get_width() / 2., 0, '', ha='center', va='bottom',
+                            color=color, fontweight='bold') for bar in bars]
+
+        self.labels1 = add_labels(self.bars1, '#d62728')
+        self.labels2 = add_labels(self.bars2, '#1f77b4')
+
+        # 解读标签 (根据数值大小决定是否显示)
+        self.lone = ax.annotate('孤胆英雄', xy=(0, 0), ha='center', color='#d62728', fontweight='bold')
+        self.leader = ax.annotate('精神领袖', xy=(0, 0), ha='center', color='#1f77b4', fontweight='bold')
+
+    def update(self, stages, p_scores, t_scores):
+        width = self.width
+        for bars, labels, scores in ((self.bars1, self.labels1, p_scores), (self.bars2, self.labels2, t_scores)):
+            for bar, label, height in zip(bars, labels, scores):
+                bar.set_height(height)
+                label.set_y(height + 0.1)
+                label.set_text(f'{height:.1f}')
+        self.line1.set_ydata(p_scores)
+        self.line2.set_ydata(t_scores)
+        self.rescale(self.ax)
+
+        # 添加解读标签 (根据数值大小动态调整位置)
+        self.lone.set_visible(bool(stages) and p_scores[0] > t_scores[0])
+        if self.lone.get_visible():
+            self.lone.xy = (0 - width / 2, p_scores[0])
+            self.lone.xyann = (0 - width / 2, p_scores[0] + 2)
+
+        last = len(stages) - 1
+        self.leader.set_visible(bool(stages) and t_scores[last] > p_scores[last])
+        if self.leader.get_visible():
+            self.leader.xy = (last + width / 2, t_scores[last])
+            self.leader.xyann = (last + width / 2, t_scores[last] + 2)
+
+        # 解读标签在柱顶上方 2 个单位，纵轴放宽到能容纳它们，布局因此不随数据变化
+        tops = [note.xyann[1] for note in (self.lone, self.leader) if note.get_visible()]
+        if tops:
+            bottom, top = self.ax.get_ylim()
+            self.ax.set_ylim(bottom, max(top, max(tops) + 0.05 * (max(tops) - bottom)))
+
+
+def plot_identity_shift(stages, p_scores, t_scores):
+    """绘制“我”与“我们”的双柱状图 + 趋势线，返回 Figure"""
+    return renderer(IdentityFigure).render(stages, p_scores, t_scores)
+
+
+# ==========================================
+# 5. 主程序逻辑
+# ==========================================
+
+def gui_main():
+    root = tk.Tk()
+    root.withdraw()  # 隐藏主窗口
+
+    print("=== Faker 身份认同转变分析工具 (本地文件版) ===")
+    print("请按照提示依次选择三个时期的 Word 文档 (.docx)")
+
+    stages = ["前期 (Early)", "中期 (Middle)", "后期 (Late)"]
+    p_scores = []
+    t_scores = []
+    file_names = []
+
+    # 依次选择文件
+    for stage in stages:
+        messagebox.showinfo("选择文件", f"请选择【{stage}】的采访文档 (.docx)")
+        path = filedialog.askopenfilename(
+            title=f"选择 {stage} 文档",
+            filetypes=[("Word Documents", "*.docx")]
+        )
+
+        if path:
+            print(f"正在分析: {os.path.basename(path)}...")
+            p, t = calculate_identity_density(read_word_paragraphs([path]))
+            p_scores.append(p)
+            t_scores.append(t)
+            file_names.append(os.path.basename(path))
+        else:
+            print(f"⚠️ 跳过 {stage} (未选择文件)，数值记为 0")
+            p_scores.append(0)
+            t_scores.append(0)
+            file_names.append("未选择")
+
+    print_results(stages, p_scores, t_scores)
+
+    plot_identity_shift(stages, p_scores, t_scores)
+    plt.show()
+
+
+def corpus_densities(grouped, token_cache=None, doc_output=None):
+    """
+    语料模式：整个语料建一个 文档-词 矩阵 (见 词频矩阵)，一次乘法得到所有文档、所有组的得分
+    返回 (组名, 个人得分, 团队得分)；doc_output 给出时另存每个文档的得分
+    """
+    print(f"正在建立文档-词矩阵: {sum(len(files) for files in grouped.values())} 个文档, {len(grouped)} 组...")
+    matrix = DocumentTermMatrix.build(grouped, token_cache)
+    print(f"[文档-词矩阵] {matrix.summary()}")
+    matcher = shared_matcher()
+    columns = matcher.columns('personal', 'team')
+    doc_hits = matrix.document_hits(matcher)
+    personal, team = (matrix.densities(*matrix.group_hits(matcher, doc_hits))[:, columns] * 2.5).T
+
+    if doc_output:
+        doc_personal, doc_team = (matrix.densities(*doc_hits)[:, columns] * 2.5).T
+        write_table(doc_output, ['Document', 'Group', 'Words', 'Personal', 'Team'],
+                    zip(matrix.documents, matrix.document_groups(), doc_hits[1].tolist(),
+                        doc_personal.tolist(), doc_team.tolist()))
+        print(f"文档级结果已保存为: {doc_output}")
+    return matrix.labels, personal.tolist(), team.tolist()
+
+
+def batch_main(argv):
+    """
+    批处理模式：时期数量不限，同一时期的多个文档合并计算
+    示例:
+      python 个人到团队主义演变.py --tree 原始数据及数据处理结果/ --figure identity.png
+      python 个人到团队主义演变.py --tree 原始数据及数据处理结果/ --corpus --group-by year
+    """
+    parser = argparse.ArgumentParser(description="Faker 身份认同转变分析 (批处理模式)")
+    add_input_arguments(parser)
+    parser.add_argument('-o', '--output', help='结果表输出路径 (.csv)')
+    parser.add_argument('--match-mode', choices=['jieba', 'raw'], default='jieba',
+                        help='关键词计数方式：jieba 按分词边界 (默认)；raw 不分词直接匹配原文')
+    parser.add_argument('--token-cache', nargs='?', const=DEFAULT_TOKEN_DIR, metavar='目录',
+                        help=f'复用 jieba 分词缓存 (仅 jieba 模式)，不给目录时使用 {DEFAULT_TOKEN_DIR}')
+    parser.add_argument('--plain-jieba', action='store_true',
+                        help='使用原生 jieba 词典，不并入关键词 (用于与旧结果对比)')
+    parser.add_argument('--figure', default='faker_identity_shift.png', help='图表输出路径')
+    add_format_argument(parser)
+    add_corpus_arguments(parser)
+    add_store_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    check_corpus_arguments(parser, args)
+    start_profiling(args)
+
+    分词词典.USE_LEXICON = not args.plain_jieba
+    use_headless()
+    periods = collect_period_files(args, ('.docx',))
+    if not periods:
+        parser.error("没有找到任何 .docx 文件")
+
+    print("=== Faker 身份认同转变分析工具 (批处理模式) ===")
+    use_store(args, periods)
+    token_cache = TokenCache(args.token_cache) if args.token_cache and args.match_mode == 'jieba' else None
+    if args.corpus:
+        stages, p_scores, t_scores = corpus_densities(group_documents(periods, args.group_by),
+                                                      token_cache, args.doc_output)
+    else:
+        stages = list(periods)
+        p_scores = []
+        t_scores = []
+        for stage in stages:
+            print(f"正在分析: {stage} ({len(periods[stage])} 个文档)...")
+            if token_cache:
+                source = token_cache.corpus(periods[stage])
+            else:
+                source = read_word_paragraphs(periods[stage])
+            with PROFILER.stage('关键词密度', doc=stage):
+                p, t = calculate_identity_density(source, args.match_mode)
+            p_scores.append(p)
+            t_scores.append(t)
+
+    print_results(stages, p_scores, t_scores)
+    if token_cache:
+        print(f"[分词缓存] {token_cache.summary()}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Stage', 'Personal', 'Team'])
+            writer.writerows(zip(stages, p_scores, t_scores))
+        print(f"结果已保存为: {args.output}")
+
+    with PROFILER.stage('绘图'):
+        paths = save_figure(plot_identity_shift(stages, p_scores, t_scores), args.figure, args.figure_format)
+    for path in paths:
+        print(f"[可视化完成] 图表已保存为: {path}")
+    finish_profiling(args)
+    return 0
+
+
+def main(argv=None):
+    """带命令行参数时进入批处理模式，否则弹出文件选择窗口"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv:
+        return batch_main(argv)
+    return gui_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
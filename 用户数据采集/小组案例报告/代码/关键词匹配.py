@@ -0,0 +1,210 @@
+"""
+多词典关键词匹配
+把若干个关键词集合编译进同一个匹配器，一遍扫描同时统计所有类别的命中次数
+(两个密度脚本和 综合分析 共用 shared_matcher()：四个词典一次 count()，各自取需要的两类)：
+  - jieba 模式：按 jieba 分词边界计数。默认使用加入了关键词词典的分词器 (见 分词词典)，
+                多字关键词不会再被切开，命中数与原来的统计不同；一个词典的长词整体成词时
+                (如“必须赢”)，其他类别中被它吞掉的关键词 (“必须”“赢”) 按原生 jieba 的切分补记 (见 compound_lookup)。
+                只有加 --plain-jieba (使用 jieba 自带词典) 时才与原来逐词典 `w in keywords` 的统计完全一致
+  - raw 模式  ：不分词，直接在原文上用字典树做最长匹配 (从左到右、不重叠)，
+                分母为“字单位”数 (每个汉字/标点算 1，连续的字母数字算 1，命中的关键词整体算 1)；
+                最长匹配同样会吞掉其他类别的短词，补记方式与 jieba 模式相同
+"""
+from 性能剖析 import PROFILER
+
+# 字典树中标记“到此为一个完整关键词”的键
+_END = ''
+
+
+def iter_words(text):
+    """
+    jieba 分词；text 可以是字符串，也可以是段落的迭代器 (逐段分词，不拼接整篇)
+    段落之间补上一个换行符，与整篇拼接后分词的结果完全一致
+    词典在第一次分词时才载入，并已包含全部关键词 (见 分词词典)
+    """
+    return PROFILER.iterate('jieba分词', _cut(text))
+
+
+def _cut(text):
+    from 分词词典 import get_tokenizer
+
+    if isinstance(text, str):
+        yield from get_tokenizer().cut(text)
+        return
+    for i, para in enumerate(text):
+        if i:
+            yield "\n"
+        yield from get_tokenizer().cut(para)
+
+
+class PreTokenized:
+    """已经分好词的序列 (如来自 分词缓存.TokenCache)，KeywordMatcher.count 不再重复分词"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+
+def _is_word_char(ch):
+    return ch.isascii() and ch.isalnum()
+
+
+class KeywordMatcher:
+    """
+    用法:
+        matcher = KeywordMatcher({'aggression': aggression_keywords, 'maturity': maturity_keywords})
+        counts, total = matcher.count(text)              # jieba 模式
+        counts, total = matcher.count(text, mode='raw')  # 不分词
+    counts 为 {类别: 命中次数}，total 为分母 (词数或字单位数)
+    """
+
+    def __init__(self, lexicons):
+        self.categories = list(lexicons)
+
+        # 关键词 -> 所属类别下标 (一个词可以同时属于多个词典)
+        self.lookup = {}
+        for idx, words in enumerate(lexicons.values()):
+            for word in words:
+                self.lookup[word] = self.lookup.get(word, ()) + (idx,)
+
+        self.trie = {}
+        for word in self.lookup:
+            node = self.trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[_END] = word
+        self._compound_lookup = None
+
+    def compound_lookup(self):
+        """
+        关键词整体命中时的 {词: 类别下标}；同一下标出现几次就记几次
+        原生 jieba 会切开的关键词 (见 分词词典.lexicon_splits) 整体命中时会吞掉其他类别的短词，
+        除了记入它本身所属的类别 (只记一次)，再把原生切分中属于其他类别的关键词补记上：
+        “必须赢”记 aggression 1 次、personal 2 次 (必须 / 赢)，“我们的”记 team 1 次、maturity 1 次 (我们)
+        """
+        if self._compound_lookup is None:
+            from 分词词典 import lexicon_splits
+
+            lookup = dict(self.lookup)
+            for word, pieces in lexicon_splits(self.lookup).items():
+                own = self.lookup.get(word, ())
+                extra = tuple(idx for piece in pieces for idx in self.lookup.get(piece, ()) if idx not in own)
+                if extra:
+                    lookup[word] = own + extra
+            self._compound_lookup = lookup
+        return self._compound_lookup
+
+    def token_lookup(self):
+        """
+        按词计数用的 {词: 类别下标}：分词器并入了关键词词典时 (分词词典.USE_LEXICON) 长词整体成词，
+        用 compound_lookup 补记；原生 jieba 本来就会把它们切开，直接按词查
+        """
+        import 分词词典
+
+        return self.compound_lookup() if 分词词典.USE_LEXICON else self.lookup
+
+    def columns(self, *categories):
+        """类别名对应的列下标 (词频矩阵 的 类别 维度按此取列)"""
+        return [self.categories.index(cat) for cat in categories]
+
+    def _result(self, hits, total):
+        return dict(zip(self.categories, hits)), total
+
+    def count_tokens(self, tokens):
+        """按词计数 (tokens 为任意词序列)，一遍同时统计所有类别"""
+        hits = [0] * len(self.categories)
+        total = 0
+        lookup = self.token_lookup()
+        for token in tokens:
+            total += 1
+            cats = lookup.get(token)
+            if cats:
+                for idx in cats:
+                    hits[idx] += 1
+        return self._result(hits, total)
+
+    def count_raw(self, text):
+        """不分词，在原文上做最长匹配；text 可以是字符串或段落迭代器"""
+        paragraphs = [text] if isinstance(text, str) else text
+        hits = [0] * len(self.categories)
+        total = 0
+        trie = self.trie
+        lookup = self.compound_lookup()
+
+        for para in paragraphs:
+            i, n = 0, len(para)
+            while i < n:
+                ch = para[i]
+                if ch.isspace():
+                    i += 1
+                    continue
+
+                # 沿字典树向后走，记录最长的完整关键词
+                node, j, match_end, cats = trie, i, 0, None
+                while j < n and para[j] in node:
+                    node = node[para[j]]
+                    j += 1
+                    if _END in node:
+                        match_end, cats = j, lookup[node[_END]]
+
+                # 英文关键词 (如 SKT、T1) 两侧不能紧挨其它字母数字
+                if cats and (_is_word_char(para[i]) and i > 0 and _is_word_char(para[i - 1])
+                             or _is_word_char(para[match_end - 1]) and match_end < n
+                             and _is_word_char(para[match_end])):
+                    cats = None
+
+                total += 1
+                if cats:
+                    for idx in cats:
+                        hits[idx] += 1
+                    i = match_end
+                elif _is_word_char(ch):
+                    while i < n and _is_word_char(para[i]):
+                        i += 1
+                else:
+                    i += 1
+        return self._result(hits, total)
+
+    def count(self, text, mode='jieba'):
+        """mode: 'jieba' 按分词边界计数；'raw' 跳过分词"""
+        if isinstance(text, PreTokenized) and mode == 'raw':
+            raise ValueError("raw 模式需要原文，不能使用分词缓存")
+        with PROFILER.stage('关键词计数') as stage:
+            if isinstance(text, PreTokenized):
+                result = self.count_tokens(text)
+            elif mode == 'raw':
+                result = self.count_raw(text)
+            else:
+                result = self.count_tokens(iter_words(text))
+            stage.items = result[1]
+        return result
+
+
+_shared = None
+
+
+def shared_matcher():
+    """四个词典共用的匹配器 (第一次调用时编译，之后复用)"""
+    global _shared
+    if _shared is None:
+        _shared = KeywordMatcher(load_all_lexicons())
+    return _shared
+
+
+# load_all_lexicons 读取词典的脚本 (分词词典 按这两个文件的大小 / 修改时间判断词典是否可能变化)
+LEXICON_SOURCES = ('心态演变分析.py', '个人到团队主义演变.py')
+
+
+def load_all_lexicons():
+    """汇总两个密度脚本中的四个词典 (同一个匹配器一次统计全部)"""
+    import 个人到团队主义演变 as identity
+    import 心态演变分析 as mindset
+
+    return {
+        'aggression': mindset.aggression_keywords,
+        'maturity': mindset.maturity_keywords,
+        'personal': identity.personal_keywords,
+        'team': identity.team_keywords,
+    }
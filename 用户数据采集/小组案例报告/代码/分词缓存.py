@@ -0,0 +1,111 @@
+"""
+jieba 分词结果的磁盘缓存 (两个密度脚本及后续的词典分析共用)
+键 = 文档内容哈希 + jieba 词典版本 (见 分词词典.dictionary_version)；每个文档存为一个 .npz：
+  vocab: 文档内出现过的词 (UTF-8，\\0 分隔)
+  ids  : 按顺序排列的词编号 (uint16 / uint32)
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from 关键词匹配 import PreTokenized, iter_words
+from 文本提取 import read_paragraphs, stored_hash
+from 分词词典 import dictionary_version
+from 性能剖析 import PROFILER
+
+DEFAULT_TOKEN_DIR = os.path.join('.faker_cache', 'tokens')
+
+# 文本提取 / 分词规则变化时递增，使旧缓存失效
+TOKENIZER_TAG = 'docx-stream-jieba-v1'
+
+
+def file_hash(file_path):
+    """文档内容哈希 (按块读取，不整体载入内存；文本存储中已记录时直接使用)"""
+    stored = stored_hash(file_path)
+    if stored is not None:
+        return stored
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TokenCache:
+    """
+    用法:
+        cache = TokenCache()
+        words = cache.tokens('前期采访.docx')            # 命中时不再解析/分词
+        counts, total = shared_matcher().count(cache.corpus(files))
+    """
+
+    def __init__(self, folder=DEFAULT_TOKEN_DIR, version=None):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.version = f"{TOKENIZER_TAG}-{version or dictionary_version()}"
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, file_path):
+        return os.path.join(self.folder, f"{file_hash(file_path)}-{self.version}.npz")
+
+    def tokens(self, file_path, paragraphs=None):
+        """
+        返回文档的分词结果 (列表)，优先读取缓存
+        paragraphs: 调用方已经解析好的段落，未命中时直接分词，不再重新读取文档
+        """
+        if not os.path.exists(file_path):
+            return []
+        path = self._path(file_path)
+        if os.path.exists(path):
+            try:
+                with PROFILER.stage('分词缓存读取', doc=os.path.basename(file_path)) as stage:
+                    with np.load(path) as data:
+                        vocab = bytes(data['vocab']).decode('utf-8').split('\0')
+                        ids = data['ids']
+                    words = [vocab[i] for i in ids.tolist()]
+                    stage.items = len(words)
+                self.hits += 1
+                return words
+            except (OSError, ValueError, KeyError):
+                pass  # 缓存文件损坏，重新分词
+
+        self.misses += 1
+        words = list(iter_words(read_paragraphs(file_path) if paragraphs is None else paragraphs))
+        self._save(path, words)
+        return words
+
+    @staticmethod
+    def _save(path, words):
+        index = {}
+        ids = np.fromiter((index.setdefault(w, len(index)) for w in words), dtype=np.int64, count=len(words))
+        dtype = np.uint16 if len(index) <= np.iinfo(np.uint16).max else np.uint32
+        vocab = np.frombuffer('\0'.join(index).encode('utf-8'), dtype=np.uint8)
+
+        # 先写临时文件再替换，避免并发运行时读到写了一半的缓存
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, vocab=vocab, ids=ids.astype(dtype))
+        os.replace(tmp, path)
+
+    def corpus(self, file_paths):
+        """
+        多个文档依次拼接的分词结果，与 iter_words(read_word_paragraphs(files)) 相同
+        返回 PreTokenized，KeywordMatcher.count 不会再次分词
+        """
+        def generate():
+            first = True
+            for f in file_paths:
+                words = self.tokens(f)
+                if not words:
+                    continue
+                if not first:
+                    yield "\n"
+                first = False
+                yield from words
+
+        return PreTokenized(generate())
+
+    def summary(self):
+        return f"分词缓存命中 {self.hits} / 未命中 {self.misses} 个文档"
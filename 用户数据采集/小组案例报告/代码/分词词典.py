@@ -0,0 +1,249 @@
+"""
+jieba 词典的预构建与延迟加载
+jieba 首次分词时要从 dict.txt 构建前缀词典 (约 1 秒)，而且词典里没有
+“单杀”“必须赢”“兄弟们”这类领域词，会被切开导致关键词漏计。
+这里把四个关键词词典并入主词典，构建一次后序列化到磁盘，
+之后只在第一次真正需要分词时才载入 (分词缓存全部命中时完全不会载入)。
+
+四个词典并入同一个分词器后，一个词典的长词会吞掉另一个词典的短词 (“我们的”整体成词后，
+沉稳词典的“我们”不再出现)。lexicon_splits 记下原生 jieba 对每个领域词的切分 (splits.json)，
+关键词匹配.KeywordMatcher.compound_lookup 据此把被吞掉的关键词补记到各自的类别。
+
+词典版本按内容计算 (要读 dict.txt 并导入两个密度脚本取关键词)，算一次后记在 versions.json 中，
+以 jieba 版本号和 dict.txt / 两个脚本的大小、修改时间为键；这些都没变时不导入 jieba 也不导入脚本。
+
+启动耗时 (实测)：分词缓存全部命中时不导入 jieba，词典相关的开销只有查版本号约 0.03s
+(原始数据中 8 个文档的关键词计数共约 0.12~0.15s，含导入 numpy)；
+需要分词时导入 jieba 约 0.18s，载入预构建词典约 0.33s (重新构建 1~2.5s)。
+载入的下限是把约 50 万个前缀词条还原成 Python 字典，达不到 100ms，
+因此“热启动”靠分词缓存 (见 分词缓存) 完全跳过 jieba，而不是把词典载入压到 100ms 以内。
+
+预构建: python 分词词典.py
+"""
+import gc
+import hashlib
+import json
+import marshal
+import os
+import time
+
+DEFAULT_DICT_DIR = os.path.join('.faker_cache', 'jieba')
+
+# 是否把关键词词典并入 jieba 词典 (置为 False 即为原生 jieba 分词)
+USE_LEXICON = True
+
+# versions.json 最多保留的条目数
+MAX_VERSIONS = 64
+
+_tokenizer = None
+_version = None
+_splits = {}
+
+
+def lexicon_words():
+    """需要保证整体切分的领域词 (四个关键词词典的并集)"""
+    if not USE_LEXICON:
+        return []
+    from 关键词匹配 import load_all_lexicons
+
+    words = set()
+    for lexicon in load_all_lexicons().values():
+        words |= set(lexicon)
+    return sorted(words)
+
+
+def _content_version():
+    """按内容计算的词典版本：jieba 版本号 + 主词典内容 + 追加的领域词"""
+    import jieba
+
+    digest = hashlib.sha1(jieba.__version__.encode('utf-8'))
+    with jieba.dt.get_dict_file() as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update('\0'.join(lexicon_words()).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _jieba_files():
+    """jieba 的 __init__.py (含版本号) 与 dict.txt 的路径 (不导入 jieba)；找不到安装位置时返回 None"""
+    from importlib import util
+
+    try:
+        spec = util.find_spec('jieba')
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin:
+        return None
+    return [spec.origin, os.path.join(os.path.dirname(spec.origin), 'dict.txt')]
+
+
+def _file_stamps(paths):
+    """各文件的 路径、大小、修改时间；有文件不存在时返回 None"""
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        parts.append(f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}")
+    return parts
+
+
+def _source_key():
+    """
+    不导入 jieba 就能得到的来源指纹：jieba 的 __init__.py (含版本号)、dict.txt 和关键词脚本的路径、大小、修改时间
+    找不到 jieba 的安装位置时返回 None (只能按内容计算)
+    """
+    from 关键词匹配 import LEXICON_SOURCES
+
+    paths = _jieba_files()
+    if paths is None:
+        return None
+    if USE_LEXICON:
+        here = os.path.dirname(os.path.abspath(__file__))
+        paths += [os.path.join(here, name) for name in LEXICON_SOURCES]
+    stamps = _file_stamps(paths)
+    if stamps is None:
+        return None
+    return hashlib.sha1('\0'.join([str(USE_LEXICON)] + stamps).encode('utf-8')).hexdigest()[:16]
+
+
+def dictionary_version(folder=DEFAULT_DICT_DIR):
+    """
+    词典版本：jieba 版本号 + 主词典内容 + 追加的领域词，任何一项变化都会重新构建
+    来源文件都没变时直接取 versions.json 中记下的版本，不导入 jieba
+    """
+    global _version
+    if _version is not None:
+        return _version
+    key = _source_key()
+    path = os.path.join(folder, 'versions.json')
+    versions = _read_json(path)
+    if key is not None and key in versions:
+        _version = versions[key]
+        return _version
+
+    _version = _content_version()
+    if key is not None:
+        versions.pop(key, None)
+        versions[key] = _version
+        _write_json(path, dict(list(versions.items())[-MAX_VERSIONS:]))
+    return _version
+
+
+def _read_json(path):
+    """读取 JSON 字典，文件不存在或已损坏时返回空字典"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    """先写临时文件再替换，并发运行时不会读到写了一半的文件"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _split_lexicon(tokenizer, words):
+    """原生词典下会被切成多个词的领域词 {词: [切分结果]} (tokenizer 尚未加入领域词)"""
+    splits = {}
+    for word in words:
+        pieces = list(tokenizer.cut(word))
+        if len(pieces) > 1:
+            splits[word] = pieces
+    return splits
+
+
+def lexicon_splits(words, folder=DEFAULT_DICT_DIR):
+    """
+    领域词在原生 jieba 下的切分 {词: [切分结果]}，只含会被切开的词 (如 “必须赢” -> 必须 / 赢)
+    与是否并入领域词 (USE_LEXICON) 无关；以 jieba 安装文件的大小、修改时间和词表为键记在 splits.json 中，
+    只有第一次要载入原生词典计算，之后不导入 jieba；没有安装 jieba 时为空
+    """
+    paths = _jieba_files()
+    stamps = _file_stamps(paths) if paths is not None else None
+    if stamps is None:
+        return {}
+    key = hashlib.sha1('\0'.join(stamps + sorted(words)).encode('utf-8')).hexdigest()[:16]
+    if key in _splits:
+        return _splits[key]
+
+    path = os.path.join(folder, 'splits.json')
+    saved = _read_json(path)
+    if key not in saved:
+        import jieba
+
+        tokenizer = jieba.Tokenizer()
+        tokenizer.initialize()
+        saved[key] = _split_lexicon(tokenizer, words)
+        _write_json(path, dict(list(saved.items())[-MAX_VERSIONS:]))
+    _splits[key] = saved[key]
+    return _splits[key]
+
+
+def build_tokenizer():
+    """从 dict.txt 构建前缀词典并加入领域词，返回 (tokenizer, 耗时)"""
+    import jieba
+
+    start = time.perf_counter()
+    tokenizer = jieba.Tokenizer()
+    tokenizer.initialize()
+    for word in lexicon_words():
+        tokenizer.add_word(word)
+    return tokenizer, time.perf_counter() - start
+
+
+def get_tokenizer(folder=DEFAULT_DICT_DIR, verbose=True):
+    """
+    第一次调用时载入预构建的词典 (不存在则构建并保存)，之后直接复用
+    """
+    global _tokenizer
+    if _tokenizer is not None:
+        return _tokenizer
+
+    import jieba
+
+    path = os.path.join(folder, f"dict-{dictionary_version(folder)}.marshal")
+    start = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        # marshal.load(文件) 逐字节读取很慢，先整体读入再 loads；
+        # 反序列化几十万个小对象时暂停垃圾回收，避免反复触发全量扫描
+        gc.disable()
+        try:
+            freq, total, build_seconds = marshal.loads(data)
+        finally:
+            gc.enable()
+        tokenizer = jieba.Tokenizer()
+        tokenizer.FREQ, tokenizer.total = freq, total
+        tokenizer.initialized = True
+        load_seconds = time.perf_counter() - start
+        if verbose:
+            print(f"[分词词典] 载入预构建词典 {load_seconds:.3f}s "
+                  f"(重新构建需 {build_seconds:.3f}s，节省 {build_seconds - load_seconds:.3f}s)")
+    except (OSError, EOFError, ValueError, TypeError):
+        tokenizer, build_seconds = build_tokenizer()
+        os.makedirs(folder, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            marshal.dump((tokenizer.FREQ, tokenizer.total, build_seconds), f)
+        os.replace(tmp, path)
+        if verbose:
+            print(f"[分词词典] 已构建并保存词典 {build_seconds:.3f}s -> {path}")
+
+    _tokenizer = tokenizer
+    return tokenizer
+
+
+if __name__ == "__main__":
+    words = lexicon_words()
+    tokenizer = get_tokenizer()
+    sample = "兄弟们一起必须赢，单杀对面"
+    print(f"领域词 {len(words)} 个 (原生 jieba 会切开的 {len(lexicon_splits(words))} 个)；"
+          f"示例分词: {' / '.join(tokenizer.cut(sample))}")
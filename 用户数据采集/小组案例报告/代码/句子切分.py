@@ -0,0 +1,230 @@
+"""
+文本清洗 + 分句
+sentences(paragraphs): 段落拼成约 64K 字符的块，删时间戳、按边界 split 都在 re 的 C 代码里完成，
+    不再逐段 clean + split；整篇只有一段的转写稿按窗口切开，内存只与窗口大小有关。
+spans(text): 只产出句子的位置 (start, end, gaps)，需要回到原文定位时使用；
+    [segmenter.text(t, s) for s in spans('\\n'.join(paragraphs))] 与 sentences(paragraphs) 的结果相同。
+
+切分规则 (与旧的 [。！？!?] 切分相比):
+  - ；; 也是句子边界
+  - 省略号 …… / … / ... 是句子边界，连续的句末标点 (如 ？！、。……) 算一个边界
+  - 句末标点后紧跟的右引号 / 右括号 (”’」』》） 等) 归入边界，不会漏到下一句开头
+  - 时间戳按 timestamp_patterns 匹配 (默认 [12:30] 这类格式)，在句首时直接跳过，在句中时记为 gap
+  - 段内换行视为空格；没有以句末标点结尾的段落与下一段以空格相连
+
+用法:
+    segmenter = Segmenter(timestamp_patterns=(r'\\[\\d{2}:\\d{2}.*?\\]', r'\\(\\d{1,2}:\\d{2}\\)'))
+    for span in segmenter.spans(text):
+        sentence = segmenter.text(text, span)
+    sentences = list(segmenter.sentences(paragraphs))
+"""
+import hashlib
+import re
+from bisect import bisect_left, bisect_right
+
+# 默认的时间戳格式 (正则)，可在 Segmenter 或命令行 --timestamp-pattern 中替换
+TIMESTAMP_PATTERNS = (r'\[\d{2}:\d{2}.*?\]',)
+
+TERMINATORS = '。！？!?；;…'
+CLOSERS = '”’」』》）)"\''
+
+MIN_LENGTH = 4
+
+# sentences() 处理超长文本时每个窗口的字符数
+WINDOW_CHARS = 1 << 16
+
+# 切分规则变化时递增，使按句统计的缓存 (稳定性统计库) 失效
+SEGMENTER_TAG = 'segmenter-v1'
+
+
+class Segmenter:
+    """
+    spans(text) 产出 (start, end, gaps)：句子在 text 中的位置 (已去掉首尾空白)，
+    gaps 为句中需要删掉的时间戳位置，绝大多数句子为空元组
+    """
+
+    def __init__(self, timestamp_patterns=TIMESTAMP_PATTERNS, min_length=MIN_LENGTH, window=WINDOW_CHARS):
+        self.timestamp_patterns = tuple(timestamp_patterns or ())
+        self.min_length = min_length
+        self.window = window
+        # 边界 = 一个句末标点 + 其后连续的句末标点、右引号 / 右括号和空白
+        # 以字符类开头的正则可以走 re 的快速前缀扫描，比分支写法快 2~3 倍；
+        # 英文省略号 ... 的分支只在文本里确实有 ... 时才使用
+        terminators = re.escape(TERMINATORS)
+        tail = f"[{terminators}{re.escape(CLOSERS)}\\s]*"
+        self.tail = re.compile(tail)
+        self.boundary = re.compile(f"[{terminators}]{tail}")
+        dots = f"(?:[{terminators}]|\\.{{3,}}){tail}"
+        self.dots_boundary = re.compile(dots)
+        self.stamp = None
+        if self.timestamp_patterns:
+            self.stamp = re.compile('|'.join(f"(?:{p})" for p in self.timestamp_patterns))
+
+    @property
+    def version(self):
+        """规则版本 + 时间戳格式，用于缓存失效"""
+        digest = hashlib.sha1('\0'.join(self.timestamp_patterns).encode('utf-8')).hexdigest()[:8]
+        return f"{SEGMENTER_TAG}-{self.min_length}-{digest}"
+
+    def _boundary(self, text):
+        return self.dots_boundary if '...' in text else self.boundary
+
+    def _scan(self, text):
+        """
+        产出全部句子 (不按长度过滤)：(start, end, gaps, 是否以句末标点结尾)
+        句子边界在删掉时间戳后的文本上查找 (与 sentences 相同)，再换算回原文位置
+        """
+        stamps = [m.span() for m in self.stamp.finditer(text)] if self.stamp is not None else []
+        if not stamps:
+            # 绝大多数段落没有时间戳，直接在原文上找边界 (边界已吞掉其后的空白)
+            start = 0
+            while start < len(text) and text[start].isspace():
+                start += 1
+            for m in self._boundary(text).finditer(text):
+                end = m.start()
+                if end > start and text[end - 1].isspace():
+                    yield self._trim(text, start, end, (), True)
+                else:
+                    yield start, end, (), True
+                start = m.end()
+            if start < len(text):
+                yield self._trim(text, start, len(text), (), False)
+            return
+
+        # 每个时间戳在删除后文本中的位置，以及到它为止累计删掉的长度
+        cleaned = self.stamp.sub('', text)
+        starts = [s for s, _ in stamps]
+        ends = [e for _, e in stamps]
+        positions, removed = [], []
+        total = 0
+        for s, e in stamps:
+            positions.append(s - total)
+            total += e - s
+            removed.append(total)
+
+        def to_source(pos, skip_stamps):
+            # skip_stamps: 句首位置跳过恰好位于此处的时间戳；句尾位置停在它们之前
+            i = bisect_right(positions, pos) if skip_stamps else bisect_left(positions, pos)
+            return pos + (removed[i - 1] if i else 0)
+
+        def span(start, end, terminated):
+            start, end, _, _ = self._trim(cleaned, start, end, (), terminated)
+            src_start, src_end = to_source(start, True), to_source(end, False)
+            gaps = tuple(stamps[bisect_left(starts, src_start):bisect_right(ends, src_end)])
+            return src_start, src_end, gaps, terminated
+
+        start = 0
+        for m in self._boundary(cleaned).finditer(cleaned):
+            yield span(start, m.start(), True)
+            start = m.end()
+        if start < len(cleaned):
+            yield span(start, len(cleaned), False)
+
+    @staticmethod
+    def _trim(text, start, end, gaps, terminated):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end, tuple(gaps), terminated
+
+    def _long_enough(self, text, start, end, gaps):
+        if not gaps:
+            return end - start >= self.min_length
+        return len(self.text(text, (start, end, gaps))) >= self.min_length
+
+    def spans(self, text):
+        """产出长度不少于 min_length 的句子位置 (start, end, gaps)"""
+        min_length = self.min_length
+        for start, end, gaps, _ in self._scan(text):
+            if gaps:
+                if self._long_enough(text, start, end, gaps):
+                    yield start, end, gaps
+            elif end - start >= min_length:
+                yield start, end, gaps
+
+    @staticmethod
+    def text(text, span):
+        """按位置切出句子：删掉句中的时间戳，换行换成空格"""
+        start, end, gaps = span[:3]
+        if gaps:
+            pieces = []
+            for s, e in gaps:
+                pieces.append(text[start:s])
+                start = e
+            pieces.append(text[start:end])
+            sentence = ''.join(pieces).strip()
+        else:
+            sentence = text[start:end]
+        if '\n' in sentence or '\r' in sentence:
+            sentence = sentence.replace('\n', ' ').replace('\r', ' ')
+        return sentence
+
+    def _windows(self, text):
+        """把超长文本切成约 window 个字符的窗口，每个窗口 (最后一个除外) 在一个句子边界处结束"""
+        start = 0
+        while start < len(text):
+            m = self.boundary.search(text, start + self.window)
+            end = m.end() if m is not None else len(text)
+            yield text[start:end]
+            start = end
+
+    def _blocks(self, paragraphs):
+        """把连续的段落以换行拼成约 window 个字符的块，减少逐段的调用开销"""
+        block, size = [], 0
+        for para in paragraphs:
+            block.append(para)
+            size += len(para) + 1
+            if size >= self.window:
+                yield '\n'.join(block)
+                block, size = [], 0
+        if block:
+            yield '\n'.join(block)
+
+    def sentences(self, paragraphs):
+        """
+        逐段分句，产出句子字符串 (与逐段 spans + text 的结果相同)
+        没有以句末标点结尾的段落与下一段以空格相连。
+        需要字符串时不必逐句计算位置：段落以换行拼成块 (换行使时间戳不会跨段匹配，删掉时间戳后再换成空格)，
+        删时间戳、按边界 split 都在 C 里完成，超长的块按窗口切开，同一时刻只有一个窗口的句子驻留内存
+        """
+        min_length = self.min_length
+        remove_stamps = self.stamp.sub if self.stamp is not None else None
+        split, dots_split = self.boundary.split, self.dots_boundary.split
+        # 上一块最后一个边界之后的内容；'' 表示上一块恰好在句子边界处结束，None 表示还没有上一块
+        pending = None
+        for block in self._blocks(paragraphs):
+            # pending 已经删过时间戳，只处理新的块 (再删一次会把嵌套时间戳删掉后剩下的部分也删掉)
+            if remove_stamps is not None:
+                block = remove_stamps('', block)
+            text = pending + '\n' + block if pending else block
+            if pending == '':
+                # 紧接在边界之后：块首的右引号、空白等本应由上一个边界吞掉
+                text = text[self.tail.match(text).end():]
+            for chunk in (text,) if len(text) <= 2 * self.window else self._windows(text):
+                if '\n' in chunk or '\r' in chunk:
+                    chunk = chunk.replace('\n', ' ').replace('\r', ' ')
+                parts = dots_split(chunk) if '...' in chunk else split(chunk)
+                last = parts.pop()
+                if parts or not last.isspace() and last:
+                    pending = last  # 只剩空白 (如整块都是时间戳) 时保持原来的状态
+                yield from [sent for sent in map(str.strip, parts) if len(sent) >= min_length]
+
+        if pending and len(pending.strip()) >= min_length:
+            yield pending.strip()
+
+
+def add_segmenter_arguments(parser):
+    """为解析器添加统一的分句参数"""
+    group = parser.add_argument_group('分句')
+    group.add_argument('--timestamp-pattern', action='append', metavar='正则',
+                       help='时间戳格式，可重复指定，替换默认的 ' + ' '.join(TIMESTAMP_PATTERNS))
+    group.add_argument('--legacy-split', action='store_true',
+                       help='使用旧的分句规则 (只按 。！？!? 切分，用于与旧结果对比)')
+
+
+def segmenter_from_args(args):
+    """按命令行参数创建 Segmenter；--legacy-split 时返回 None (调用方退回旧规则)"""
+    if args.legacy_split:
+        return None
+    return Segmenter(args.timestamp_pattern or TIMESTAMP_PATTERNS)
@@ -0,0 +1,156 @@
+"""
+紧凑的句子级结果缓冲 (按列存储)
+代替“每句一个 dict”的行列表，百万句规模下内存占用低几倍：
+  Sentiment_Score  可增长的 float64 数组
+  Period / Source  整数编码，同一个字符串只存一份，转出时为 category
+  Sentence         全部句子的 UTF-8 字节连续存放，另存 int64 偏移量 (与 Arrow large_string 的内存布局相同)
+每句约 8 + 4 + 4 + 8 字节再加句子本身的字节数；to_arrow() / to_frame() 直接引用这些数组，不复制
+(没有安装 pyarrow 时 Sentence 列退回为 Python 字符串)。
+
+用法:
+    buffer = SentenceBuffer()
+    buffer.append(sentences, scores, '前期', '采访.docx')   # 每个文档追加一次
+    df = buffer.to_frame()                                  # 或 buffer.to_arrow()
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('Period', 'Source', 'Sentence', 'Sentiment_Score')
+
+
+class _Growable:
+    """按需倍增容量的一维 numpy 数组，view() 返回已写入部分的视图"""
+
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        end = self.size + len(values)
+        if end > len(self.data):
+            # 换成新数组而不是原地 resize：之前导出的视图 (如 Arrow 表) 仍然有效
+            grown = np.empty(max(end, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class _Interned:
+    """字符串 -> 整数编码 (按首次出现的顺序)"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class SentenceBuffer:
+    """
+    keep_text=False 时不保存句子文本，只保留时期、来源和得分 (用于统计)
+    """
+
+    def __init__(self, keep_text=True):
+        self.keep_text = keep_text
+        self.scores = _Growable(np.float64)
+        self.periods = _Interned()
+        self.sources = _Interned()
+        self.period_codes = _Growable(np.int32)
+        self.source_codes = _Growable(np.int32)
+        self.text = _Growable(np.uint8, 1 << 16)
+        self.offsets = _Growable(np.int64)
+        self.offsets.extend([0])
+
+    def __len__(self):
+        return self.scores.size
+
+    @property
+    def nbytes(self):
+        """已占用的数组字节数 (不含预留容量)"""
+        return sum(a.view().nbytes for a in (self.scores, self.period_codes, self.source_codes,
+                                             self.text, self.offsets))
+
+    def append(self, sentences, scores, period, source):
+        """追加一个文档的结果 (同一时期、同一来源)；不保存文本时 sentences 可以为 None"""
+        scores = np.asarray(scores if isinstance(scores, np.ndarray) else list(scores), dtype=np.float64)
+        n = len(scores)
+        self.scores.extend(scores)
+        self.period_codes.extend(np.full(n, self.periods.code(period), dtype=np.int32))
+        self.source_codes.extend(np.full(n, self.sources.code(source), dtype=np.int32))
+        if self.keep_text:
+            self._append_text(sentences)
+
+    def append_frame(self, frame):
+        """追加一个 DataFrame (列同 COLUMNS)，其中的时期 / 来源可以不止一个"""
+        self.scores.extend(frame['Sentiment_Score'].to_numpy(dtype=np.float64))
+        for column, interned, codes in (('Period', self.periods, self.period_codes),
+                                        ('Source', self.sources, self.source_codes)):
+            local, uniques = pd.factorize(frame[column])
+            lookup = np.array([interned.code(v) for v in uniques], dtype=np.int32)
+            codes.extend(lookup[local])
+        if self.keep_text:
+            self._append_text(frame['Sentence'])
+
+    def _append_text(self, sentences):
+        encoded = [str(s).encode('utf-8') for s in sentences]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self.offsets.extend(self.offsets.data[self.offsets.size - 1] + np.cumsum(lengths))
+        self.text.extend(np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    # ------------------------------------------
+    # 转出 (不复制)
+    # ------------------------------------------
+
+    def _categorical(self, interned, codes):
+        return pd.Categorical.from_codes(codes.view(), categories=pd.Index(interned.values, dtype=object))
+
+    def sentences(self):
+        """Sentence 列：有 pyarrow 时为 pyarrow.LargeStringArray (零复制)，否则为字符串列表"""
+        n = len(self)
+        try:
+            import pyarrow as pa
+        except ImportError:
+            offsets, text = self.offsets.view(), self.text.view().tobytes()
+            return [text[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(n)]
+        return pa.LargeStringArray.from_buffers(n, pa.py_buffer(self.offsets.view()),
+                                                pa.py_buffer(self.text.view()))
+
+    def to_arrow(self):
+        """pyarrow.Table；Period / Source 为字典编码列"""
+        import pyarrow as pa
+
+        n = len(self)
+        columns = {}
+        for name, interned, codes in (('Period', self.periods, self.period_codes),
+                                      ('Source', self.sources, self.source_codes)):
+            indices = pa.Array.from_buffers(pa.int32(), n, [None, pa.py_buffer(codes.view())])
+            columns[name] = pa.DictionaryArray.from_arrays(indices, pa.array(interned.values, pa.string()))
+        if self.keep_text:
+            columns['Sentence'] = self.sentences()
+        columns['Sentiment_Score'] = pa.Array.from_buffers(pa.float64(), n,
+                                                           [None, pa.py_buffer(self.scores.view())])
+        return pa.table(columns)
+
+    def to_frame(self):
+        """pandas DataFrame；Period / Source 为 category，Sentence 有 pyarrow 时为 Arrow 字符串"""
+        columns = {
+            'Period': self._categorical(self.periods, self.period_codes),
+            'Source': self._categorical(self.sources, self.source_codes),
+        }
+        if self.keep_text:
+            sentences = self.sentences()
+            if not isinstance(sentences, list):
+                sentences = pd.arrays.ArrowExtensionArray(sentences)
+            columns['Sentence'] = sentences
+        columns['Sentiment_Score'] = self.scores.view()
+        return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,154 @@
+"""
+批处理 (无界面) 模式的公共工具
+四个分析脚本共用：收集输入文件、解析清单、按目录推断时期
+"""
+import csv
+import glob
+import json
+import os
+
+
+# ==========================================
+# 1. 输入文件收集
+# ==========================================
+
+def expand_paths(patterns, exts):
+    """
+    把 文件 / 目录 / 通配符 展开为文件列表 (保持给定顺序，去重)
+    exts: 允许的扩展名，例如 ('.docx',)
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = sorted(
+                os.path.join(dirpath, name)
+                for dirpath, _, names in os.walk(pattern)
+                for name in names
+            )
+        elif glob.has_magic(pattern):
+            candidates = sorted(glob.glob(pattern, recursive=True))
+        else:
+            candidates = [pattern]
+
+        for path in candidates:
+            name = os.path.basename(path)
+            # 跳过 Word 打开文档时产生的 ~$ 临时文件
+            if name.startswith('~$') or not name.lower().endswith(exts):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def source_labels(files):
+    """
+    各文档的来源标签 {文件: 标签}：相对于这些文档共同所在目录的路径 (以 / 分隔)
+    同一目录下的文档即为文件名；不同子目录中的同名文档不会混淆
+    """
+    if not files:
+        return {}
+    paths = [os.path.abspath(f) for f in files]
+    try:
+        root = os.path.commonpath([os.path.dirname(p) for p in paths])
+    except ValueError:  # Windows 上位于不同的盘符
+        return {f: p.replace(os.sep, '/') for f, p in zip(files, paths)}
+    return {f: os.path.relpath(p, root).replace(os.sep, '/') for f, p in zip(files, paths)}
+
+
+def load_manifest(manifest_path, exts):
+    """
+    读取清单文件，返回 {时期: [文件, ...]}
+    支持两种格式 (相对路径以清单所在目录为基准):
+      JSON: {"前期": ["2013-2015_Genius/", "a.docx"], "后期": ["2020-2025/*.docx"]}
+      CSV : 每行 "路径,时期"，可带表头 path,period
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+
+    def resolve(p):
+        return p if os.path.isabs(p) else os.path.join(base, p)
+
+    entries = []
+    if manifest_path.lower().endswith('.json'):
+        with open(manifest_path, encoding='utf-8') as f:
+            mapping = json.load(f)
+        for period, paths in mapping.items():
+            if isinstance(paths, str):
+                paths = [paths]
+            entries.extend((period, resolve(p)) for p in paths)
+    else:
+        with open(manifest_path, encoding='utf-8-sig', newline='') as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or not row[0].strip() or row[0].startswith('#'):
+                    continue
+                if row[0].strip().lower() == 'path':
+                    continue
+                entries.append((row[1].strip(), resolve(row[0].strip())))
+
+    periods = {}
+    for period, path in entries:
+        periods.setdefault(period, []).extend(expand_paths([path], exts))
+    return periods
+
+
+def periods_from_tree(root, exts):
+    """
+    按原始数据目录结构划分时期：root 下每个子目录即一个时期
+    (如 2013-2015_Genius/、2017-2019_Struggle/、2020-2025/)
+    """
+    periods = {}
+    for name in sorted(os.listdir(root)):
+        sub = os.path.join(root, name)
+        if os.path.isdir(sub):
+            files = expand_paths([sub], exts)
+            if files:
+                periods[name] = files
+    return periods
+
+
+# ==========================================
+# 2. 命令行参数
+# ==========================================
+
+def add_input_arguments(parser):
+    """为解析器添加统一的输入参数"""
+    group = parser.add_argument_group('输入 (任选其一或组合使用)')
+    group.add_argument('--period', action='append', default=[], metavar='时期=路径',
+                       help='指定某个时期的文件/目录/通配符，可重复，例如 --period 前期=2013-2015_Genius/')
+    group.add_argument('--manifest', metavar='清单',
+                       help='JSON 或 CSV 清单文件，描述文件与时期的对应关系')
+    group.add_argument('--tree', metavar='目录',
+                       help='原始数据根目录，每个子目录视为一个时期')
+    group.add_argument('inputs', nargs='*', default=[],
+                       help='文件/目录/通配符，时期取自所在目录名')
+
+
+def collect_period_files(args, exts):
+    """
+    汇总命令行中所有输入，返回 {时期: [文件, ...]} (按出现顺序)
+    """
+    periods = {}
+
+    def merge(mapping):
+        for period, files in mapping.items():
+            bucket = periods.setdefault(period, [])
+            bucket.extend(f for f in files if f not in bucket)
+
+    if args.manifest:
+        merge(load_manifest(args.manifest, exts))
+    if args.tree:
+        merge(periods_from_tree(args.tree, exts))
+    for spec in args.period:
+        if '=' not in spec:
+            raise SystemExit(f"❌ --period 格式应为 时期=路径: {spec}")
+        period, pattern = spec.split('=', 1)
+        merge({period.strip(): expand_paths([pattern], exts)})
+    for pattern in args.inputs:
+        for path in expand_paths([pattern], exts):
+            if os.path.isdir(pattern):
+                # 目录参数：以目录名作为时期
+                period = os.path.basename(os.path.normpath(pattern))
+            else:
+                period = os.path.basename(os.path.dirname(os.path.abspath(path)))
+            merge({period: [path]})
+
+    return periods
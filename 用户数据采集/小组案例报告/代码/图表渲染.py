@@ -0,0 +1,134 @@
+"""
+无界面批量出图
+批处理模式切换到 Agg 后端，所有图表直接写成 PNG / SVG / PDF，不弹窗、也不需要显示器。
+
+生成大量报告时每种图表只搭建一次：ReusableFigure 第一次渲染时创建画布、坐标轴、标题、
+网格、图例等不变的部分并计算好布局 (tight_layout)，之后每份语料只更新数据
+(柱高、折线、数值标签、标注)。时期的数量或名称变化时才重新搭建。
+单纯复用 Figure 对象再清空重画几乎省不了时间，真正的开销在重建各个图元和重新计算布局。
+
+用法:
+    use_headless()
+    fig = renderer(VarianceFigure).render(stats)    # 交互模式下每次新建，可直接 plt.show()
+    save_figure(fig, 'out/variance.png', formats=('png', 'pdf'))
+"""
+import abc
+import argparse
+import os
+
+import matplotlib.pyplot as plt
+
+FORMATS = ('png', 'svg', 'pdf')
+
+# use_headless() 之后为 True：同一种图表共用一个画布，绘图后不关闭
+HEADLESS = False
+
+
+def use_headless():
+    """切换到 Agg 后端 (无界面批处理)"""
+    global HEADLESS
+    plt.switch_backend('Agg')
+    HEADLESS = True
+
+
+def parse_formats(text):
+    """'png,svg' -> ('png', 'svg')"""
+    formats = tuple(f.strip().lower().lstrip('.') for f in text.split(',') if f.strip())
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"不支持的图表格式: {', '.join(unknown)} (可选 {', '.join(FORMATS)})")
+    return formats
+
+
+def add_format_argument(parser):
+    """为解析器添加统一的 --figure-format 参数"""
+    def formats(text):
+        try:
+            return parse_formats(text)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
+    parser.add_argument('--figure-format', type=formats, metavar='格式',
+                        help=f"图表格式 ({'/'.join(FORMATS)})，逗号分隔可同时输出多种，默认按图表路径的扩展名")
+
+
+def save_figure(fig, path, formats=None):
+    """
+    保存图表，返回写出的路径列表
+    formats 为空时按 path 的扩展名 (没有扩展名时为 png)；否则每种格式各写一份，扩展名随格式替换
+    """
+    base, ext = os.path.splitext(path)
+    if not formats:
+        formats = (ext.lstrip('.').lower() or 'png',)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        out = path if ext.lstrip('.').lower() == fmt else f"{base}.{fmt}"
+        fig.savefig(out, format=fmt)
+        paths.append(out)
+    return paths
+
+
+def finish_figure(fig, show=False):
+    """显示或释放图表：交互模式下弹窗；无界面模式下保留画布供下一份报告复用"""
+    if show:
+        plt.show()
+    elif not HEADLESS:
+        plt.close(fig)
+
+
+class ReusableFigure(abc.ABC):
+    """
+    子类实现:
+      layout_key(*data): 决定布局的部分 (如时期名称)，变化时重新搭建
+      build(*data)     : 创建 self.fig 及不随数据变化的部分
+      update(*data)    : 更新随数据变化的部分
+    """
+
+    def __init__(self):
+        self.fig = None
+        self.key = None
+
+    def layout_key(self, *data):
+        return ()
+
+    @abc.abstractmethod
+    def build(self, *data):
+        """创建 self.fig 及不随数据变化的部分"""
+
+    @abc.abstractmethod
+    def update(self, *data):
+        """更新随数据变化的部分"""
+
+    def render(self, *data):
+        key = self.layout_key(*data)
+        if self.fig is None or key != self.key:
+            if self.fig is not None:
+                plt.close(self.fig)
+            self.build(*data)
+            self.key = key
+            self.update(*data)
+            self.fig.tight_layout()
+        else:
+            self.update(*data)
+        return self.fig
+
+    @staticmethod
+    def rescale(ax):
+        """按新数据重新计算坐标范围 (与首次绘制时的自动范围一致)"""
+        ax.relim()
+        ax.autoscale_view()
+
+
+_RENDERERS = {}
+
+
+def renderer(cls):
+    """无界面模式下同一种图表共用一个实例；交互模式下每次新建 (各自成为独立窗口)"""
+    if not HEADLESS:
+        return cls()
+    if cls not in _RENDERERS:
+        _RENDERERS[cls] = cls()
+    return _RENDERERS[cls]
@@ -0,0 +1,187 @@
+"""
+可合并的在线统计量 (按块更新，一遍扫描)
+  RunningStats : 单组的 count / mean / M2 (Welford)，块与块之间用 Chan 公式合并，
+                 可选保留固定大小的均匀随机样本 (蓄水池抽样)，供箱线图使用
+  GroupStats   : 按分组键维护多个 RunningStats，每块数据只做一次 factorize + bincount，
+                 与分组数无关 (不再为每个组构造一次布尔掩码)
+两者都可以合并 (多进程 / 多文件的部分结果直接相加) 和序列化 (to_dict / from_dict)。
+"""
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    """
+    用法:
+        stats = RunningStats(sample_size=10000)
+        for chunk in chunks:
+            stats.update(chunk)
+        stats.count, stats.mean, stats.std(), stats.sample
+    """
+
+    def __init__(self, sample_size=0, keep_all=False, rng=None):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sample_size = sample_size
+        self.keep_all = keep_all
+        self._rng = rng if rng is not None else np.random.default_rng()
+        # 蓄水池：每个值配一个均匀随机键，始终保留键最小的 sample_size 个，合并时同样处理
+        self._sample = np.empty(0)
+        self._keys = np.empty(0)
+        self._chunks = []
+
+    def _merge_moments(self, count, mean, m2):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def _merge_sample(self, values, keys):
+        if self.sample_size <= 0 or len(values) == 0:
+            return
+        values = np.concatenate([self._sample, values])
+        keys = np.concatenate([self._keys, keys])
+        if len(values) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size - 1)[:self.sample_size]
+            values, keys = values[keep], keys[keep]
+        self._sample, self._keys = values, keys
+
+    def update(self, values):
+        """加入一块数值 (一维数组，NaN 需事先去除)"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        mean = values.mean()
+        self._merge_moments(len(values), mean, float(((values - mean) ** 2).sum()))
+        if self.sample_size > 0:
+            self._merge_sample(values, self._rng.random(len(values)))
+        if self.keep_all:
+            self._chunks.append(values)
+
+    def merge(self, other):
+        """并入另一个 RunningStats 的结果"""
+        self._merge_moments(other.count, other.mean, other.m2)
+        self._merge_sample(other._sample, other._keys)
+        if self.keep_all:
+            self._chunks.extend(other._chunks)
+        return self
+
+    def variance(self, ddof=0):
+        """方差；ddof=0 同 np.var，ddof=1 同 pandas 的 var"""
+        if self.count <= ddof:
+            return float('nan')
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=0):
+        return float(np.sqrt(self.variance(ddof)))
+
+    @property
+    def sample(self):
+        """全部数值 (keep_all) 或蓄水池样本"""
+        if self.keep_all:
+            return np.concatenate(self._chunks) if self._chunks else np.empty(0)
+        return self._sample
+
+    def to_dict(self):
+        """序列化 (只含统计量和样本，不含 keep_all 的全部数值)"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'sample': self._sample.tolist(),
+            'keys': self._keys.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data, sample_size=0, rng=None):
+        stats = cls(sample_size=sample_size, rng=rng)
+        stats.count, stats.mean, stats.m2 = int(data['count']), float(data['mean']), float(data['m2'])
+        stats._sample = np.asarray(data.get('sample', []), dtype=float)
+        stats._keys = np.asarray(data.get('keys', []), dtype=float)
+        return stats
+
+
+class GroupStats:
+    """
+    用法:
+        groups = GroupStats(sample_size=10000)
+        for chunk in chunks:
+            groups.update(chunk['Year'], chunk['Sentiment_Score'])
+        for key, stats in groups.items(): ...
+    分组键按首次出现的顺序保存
+    """
+
+    def __init__(self, sample_size=0, keep_all=False, seed=None):
+        self.sample_size = sample_size
+        self.keep_all = keep_all
+        self._rng = np.random.default_rng(seed)
+        self.groups = {}
+
+    def _get(self, key):
+        stats = self.groups.get(key)
+        if stats is None:
+            stats = self.groups[key] = RunningStats(self.sample_size, self.keep_all, self._rng)
+        return stats
+
+    def update(self, keys, values):
+        """加入一块数据：keys 为分组键，values 为对应数值 (NaN 会被忽略)"""
+        codes, uniques = pd.factorize(np.asarray(keys), use_na_sentinel=False)
+        self.update_codes(codes, uniques, values)
+
+    def update_codes(self, codes, uniques, values):
+        """
+        同 update，但分组键已经 factorize 过：codes[i] 为 values[i] 所属分组在 uniques 中的下标
+        (调用方可以只对少量 uniques 做键的转换，而不是对每一行)
+        """
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        if not valid.all():
+            codes, values = codes[valid], values[valid]
+        if len(values) == 0:
+            return
+
+        counts = np.bincount(codes, minlength=len(uniques))
+        means = np.bincount(codes, weights=values, minlength=len(uniques)) / np.maximum(counts, 1)
+        m2 = np.bincount(codes, weights=(values - means[codes]) ** 2, minlength=len(uniques))
+
+        # 只有需要保留数值时才按组拆分 (一次稳定排序)
+        need_values = self.sample_size > 0 or self.keep_all
+        if need_values:
+            order = np.argsort(codes, kind='stable')
+            parts = np.split(values[order], np.cumsum(counts)[:-1])
+
+        for i, key in enumerate(uniques):
+            if counts[i] == 0:
+                continue
+            stats = self._get(key)
+            stats._merge_moments(int(counts[i]), float(means[i]), float(m2[i]))
+            if need_values:
+                if self.sample_size > 0:
+                    stats._merge_sample(parts[i], self._rng.random(len(parts[i])))
+                if self.keep_all:
+                    stats._chunks.append(parts[i])
+
+    def merge(self, other):
+        for key, stats in other.groups.items():
+            self._get(key).merge(stats)
+        return self
+
+    def items(self):
+        return self.groups.items()
+
+    def __len__(self):
+        return len(self.groups)
+
+    def to_dict(self):
+        return {str(key): stats.to_dict() for key, stats in self.groups.items()}
+
+    @classmethod
+    def from_dict(cls, data, sample_size=0, seed=None):
+        groups = cls(sample_size=sample_size, seed=seed)
+        for key, value in data.items():
+            groups.groups[key] = RunningStats.from_dict(value, sample_size, groups._rng)
+        return groups
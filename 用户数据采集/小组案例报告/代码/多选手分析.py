@@ -0,0 +1,495 @@
+"""
+多选手分析：选手注册表 + 进程池调度
+同一套指标 (各时期句数 / 均值 / 方差、波动性、锋芒 / 沉稳密度、个人 / 团队密度，与 综合分析 相同)
+跑遍整份选手名单，全部结果汇总到一张以 (选手, 时期) 为键的表中。
+  注册表   JSON / CSV 给出每位选手的语料目录与时期划分；或用 --roster 目录 (每个子目录一位选手，
+           选手目录下的每个子目录为一个时期，与 --tree 相同)
+  调度     每位选手是进程池中的一个任务 (进程内串行打分，不再嵌套进程池)，语料大的选手先开始，
+           整份名单的吞吐随核心数增长
+  失败隔离 单个选手出错只记录错误 (详见 logs/<选手>.log)，不影响其他选手；工作进程异常退出 (如内存不足)
+           时当时在运行的选手逐个单独重跑，其余选手换一个新的进程池继续
+  断点续跑 每完成一位选手就把结果记入 progress.json；文件 (路径 / 大小 / 修改时间) 和分析设置都没变的
+           已完成选手直接沿用结果，中断后重跑只补做未完成或失败的选手
+
+注册表格式 (相对路径以注册表所在目录为基准):
+  JSON: {"Faker": "faker/",                                            (同 {"tree": "faker/"})
+         "Chovy": {"dir": "chovy/", "periods": {"前期": "2018-2020/", "后期": ["2021-*/*.docx"]}},
+         "ShowMaker": {"manifest": "showmaker/清单.csv"}}                (清单格式见 命令行工具.load_manifest)
+  CSV : 每行 "选手,路径,时期"，可带表头 subject,path,period；时期为空时该路径按 --tree 的目录结构划分时期
+  同一位选手只能出现在一份名单 (注册表 / --roster 目录) 中，重复时报错，不会用后一份静默覆盖
+
+示例:
+  python 多选手分析.py --registry 选手.json --out-dir 多选手结果/ --engine batch --workers 0
+  python 多选手分析.py --roster 选手语料/ --out-dir 多选手结果/ --engine batch --token-cache
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from datetime import datetime
+from itertools import chain
+
+from 命令行工具 import expand_paths, load_manifest, periods_from_tree
+from 分词缓存 import DEFAULT_TOKEN_DIR, TokenCache
+from 情感缓存 import DEFAULT_CACHE_PATH, SentimentCache, snownlp_model_version
+from 结果输出 import WRITERS, open_writer
+from 句子缓冲 import SentenceBuffer
+from 句子切分 import add_segmenter_arguments, segmenter_from_args
+from 监视模式 import partial_path, write_csv_atomic, write_frame_atomic
+import 分词词典
+import 情绪稳定性 as stability
+import 情绪波动 as volatility
+import 综合分析 as combined
+
+SUMMARY_NAME = 'roster_summary.csv'
+FAILURES_NAME = 'roster_failures.csv'
+PROGRESS_NAME = 'progress.json'
+
+# 进度文件格式变化时递增
+PROGRESS_TAG = 'roster-v1'
+
+
+# ==========================================
+# 1. 选手注册表
+# ==========================================
+
+def _merge(periods, mapping):
+    """按出现顺序合并 {时期: [文件]} (同 命令行工具.collect_period_files)"""
+    for period, files in mapping.items():
+        bucket = periods.setdefault(period, [])
+        bucket.extend(f for f in files if f not in bucket)
+
+
+def subject_periods(spec, base, exts=('.docx',)):
+    """
+    按注册表中一位选手的配置返回 {时期: [文件, ...]}
+    spec: 目录字符串 (按子目录划分时期)，或包含 dir / tree / manifest / periods 的字典 (可组合)
+    """
+    def resolve(p, root=base):
+        return p if os.path.isabs(p) else os.path.join(root, p)
+
+    if isinstance(spec, str):
+        spec = {'tree': spec}
+    root = resolve(spec['dir']) if spec.get('dir') else base
+    periods = {}
+    if spec.get('manifest'):
+        _merge(periods, load_manifest(resolve(spec['manifest'], root), exts))
+    if spec.get('tree'):
+        _merge(periods, periods_from_tree(resolve(spec['tree'], root), exts))
+    for period, paths in (spec.get('periods') or {}).items():
+        if isinstance(paths, str):
+            paths = [paths]
+        _merge(periods, {period: expand_paths([resolve(p, root) for p in paths], exts)})
+    if not any(key in spec for key in ('manifest', 'tree', 'periods')):
+        _merge(periods, periods_from_tree(root, exts))  # 只给了 dir
+    return periods
+
+
+def load_registry(path, exts=('.docx',)):
+    """读取注册表 (JSON / CSV，格式见模块说明)，返回 {选手: {时期: [文件, ...]}}"""
+    base = os.path.dirname(os.path.abspath(path))
+    subjects = {}
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            registry = json.load(f)
+        for name, spec in registry.items():
+            subjects[str(name)] = subject_periods(spec, base, exts)
+        return subjects
+
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[0].strip() or row[0].startswith('#'):
+                continue
+            if row[0].strip().lower() == 'subject':
+                continue
+            name, target = row[0].strip(), row[1].strip()
+            period = row[2].strip() if len(row) > 2 else ''
+            spec = {'periods': {period: target}} if period else {'tree': target}
+            _merge(subjects.setdefault(name, {}), subject_periods(spec, base, exts))
+    return subjects
+
+
+def roster_from_tree(root, exts=('.docx',)):
+    """root 下每个子目录为一位选手，选手目录下的每个子目录为一个时期"""
+    subjects = {}
+    for name in sorted(os.listdir(root)):
+        sub = os.path.join(root, name)
+        if os.path.isdir(sub):
+            subjects[name] = periods_from_tree(sub, exts)
+    return subjects
+
+
+def safe_name(subject):
+    """选手名用作文件名时替换掉路径分隔符等字符"""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', '_', subject).strip() or '_'
+
+
+def corpus_bytes(periods):
+    total = 0
+    for files in periods.values():
+        for f in files:
+            try:
+                total += os.path.getsize(f)
+            except OSError:
+                pass
+    return total
+
+
+def fingerprint(periods, settings_tag):
+    """选手语料 (时期划分 + 各文件的路径 / 大小 / 修改时间) 与分析设置的指纹，用于断点续跑"""
+    digest = hashlib.sha1(settings_tag.encode('utf-8'))
+    for period, files in periods.items():
+        digest.update(f"\0{period}".encode('utf-8'))
+        for f in files:
+            try:
+                st = os.stat(f)
+                digest.update(f"\0{os.path.abspath(f)}\0{st.st_size}\0{st.st_mtime_ns}".encode('utf-8'))
+            except OSError:
+                digest.update(f"\0{os.path.abspath(f)}\0missing".encode('utf-8'))
+    return digest.hexdigest()
+
+
+# ==========================================
+# 2. 单个选手的分析 (在工作进程中运行)
+# ==========================================
+
+def _init_worker(settings):
+    """进程池初始化：同步分析设置，并提前加载模型和词典 (同一进程依次处理多位选手，只加载一次)"""
+    from 图表渲染 import use_headless
+
+    use_headless()
+    stability.ENGINE = settings['engine']
+    stability.SEGMENTER = settings['segmenter']
+    分词词典.USE_LEXICON = settings['use_lexicon']
+    volatility.INTERACTIVE = False
+    stability._score_chunk(["预热情感模型"])
+    if settings['match_mode'] == 'jieba':
+        分词词典.get_tokenizer(verbose=False)
+
+
+def period_metrics(subject, periods, settings, sentence_path=None):
+    """
+    一位选手各时期的指标 (与 综合分析 的汇总表相同，另加 Subject 列)
+    sentence_path: 同时写出句子级结果 (格式按扩展名，见 结果输出)
+    """
+    cache = None
+    if settings['cache']:
+        cache = SentimentCache(settings['cache'], version=settings['model_version'],
+                               max_entries=settings['cache_size'])
+    token_cache = TokenCache(settings['token_cache']) if settings['token_cache'] else None
+    try:
+        pending, densities = combined.analyze_periods(periods, None, cache, token_cache, settings['match_mode'])
+        buffer = SentenceBuffer(keep_text=False)
+        writer = open_writer(partial_path(sentence_path)) if sentence_path else None
+        try:
+            for frame in combined.iter_frames(pending):
+                if writer is not None:
+                    writer.write(frame)
+                buffer.append_frame(frame)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is not None:
+            os.replace(writer.path, sentence_path)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    stats, volatilities = None, {}
+    if len(buffer):
+        df = buffer.to_frame()
+        stats = df.groupby('Period', sort=False, observed=True)['Sentiment_Score'].agg(['count', 'mean', 'var'])
+        stats.index = stats.index.astype(object)
+        volatilities, _, _ = volatility.analyze_file_volatility(df, score_col='Sentiment_Score', group_col='Period')
+    rows = combined.summarize(list(periods), stats, volatilities, densities)
+    return [{'Subject': subject, **row} for row in rows], len(buffer)
+
+
+def analyze_subject(subject, periods, settings):
+    """
+    任务入口：分析一位选手，返回结果字典 (不抛出异常，失败时 status 为 failed)
+    过程输出写入 <out>/logs/<选手>.log，多位选手并行时不会混在终端里
+    """
+    name = safe_name(subject)
+    start = time.perf_counter()
+    log_path = os.path.join(settings['out_dir'], 'logs', f"{name}.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    sentence_path = None
+    if settings['sentences']:
+        sentence_path = os.path.join(settings['out_dir'], 'sentences', f"{name}.{settings['sentences']}")
+        os.makedirs(os.path.dirname(sentence_path), exist_ok=True)
+    with open(log_path, 'w', encoding='utf-8') as log, redirect_stdout(log):
+        try:
+            rows, sentences = period_metrics(subject, periods, settings, sentence_path)
+        except Exception as e:
+            traceback.print_exc(file=log)
+            return {'status': 'failed', 'error': f"{type(e).__name__}: {e}",
+                    'seconds': round(time.perf_counter() - start, 3)}
+    return {'status': 'done', 'rows': rows, 'sentences': sentences,
+            'seconds': round(time.perf_counter() - start, 3)}
+
+
+# ==========================================
+# 3. 调度
+# ==========================================
+
+def _collect(futures, running, on_done):
+    """把已完成的任务从 running 中取出并交给 on_done，返回因进程池崩溃而没有结果的任务"""
+    broken = []
+    for future in futures:
+        task = running.pop(future)
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            broken.append(task)
+            continue
+        except Exception as e:  # 结果无法传回 (如无法序列化) 等
+            result = {'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'seconds': 0}
+        on_done(task[0], result)
+    return broken
+
+
+def _run_pool(queue, settings, workers, on_done):
+    """
+    用一个进程池依次处理 queue 中的 (选手, 时期) 任务，同时在运行的任务不超过 workers 个
+    (工作进程异常退出时，只有这几位选手的结果不确定)；返回进程池崩溃时在运行的任务，正常结束时返回 []
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(settings,)) as executor:
+        running = {}
+        while queue or running:
+            while queue and len(running) < workers:
+                task = queue.popleft()
+                running[executor.submit(analyze_subject, *task, settings)] = task
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = _collect(done, running, on_done)
+            if broken:
+                wait(running)
+                return broken + _collect(list(running), running, on_done)
+    return []
+
+
+def schedule(tasks, settings, workers, on_done):
+    """
+    tasks: [(选手, {时期: [文件]}), ...]，按开始顺序排列
+    每完成一位选手调用一次 on_done(选手, 结果)
+    """
+    queue = deque(tasks)
+    suspects = []
+    while queue:
+        suspects.extend(_run_pool(queue, settings, workers, on_done))
+    # 无法判断是哪一位选手让进程崩溃的：逐个在单独的进程中重跑，只有真正出问题的选手记为失败
+    for task in suspects:
+        if _run_pool(deque([task]), settings, 1, on_done):
+            on_done(task[0], {'status': 'failed', 'error': '工作进程异常退出 (可能是内存不足)', 'seconds': 0})
+
+
+class Progress:
+    """
+    断点续跑的进度记录 (<out>/progress.json)，每完成一位选手原子地重写一次
+    用法:
+        progress = Progress(out_dir)
+        progress.is_done(subject, fp)          # 指纹相同且上次已完成
+        progress.record(subject, fp, result)
+    """
+
+    def __init__(self, out_dir, restart=False):
+        self.path = os.path.join(out_dir, PROGRESS_NAME)
+        self.subjects = {} if restart else self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('subjects', {}) if data.get('tag') == PROGRESS_TAG else {}
+
+    def is_done(self, subject, fp):
+        entry = self.subjects.get(subject)
+        return entry is not None and entry['status'] == 'done' and entry['fingerprint'] == fp
+
+    def record(self, subject, fp, result):
+        self.subjects[subject] = {'fingerprint': fp, 'finished': datetime.now().isoformat(timespec='seconds'),
+                                  **result}
+        self.save()
+
+    def save(self):
+        tmp = partial_path(self.path)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'tag': PROGRESS_TAG, 'subjects': self.subjects}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+
+# ==========================================
+# 4. 汇总输出
+# ==========================================
+
+def write_summary(rows, path):
+    """全部选手的结果写为一张表 (CSV 带 BOM 便于 Excel 打开；其余格式见 结果输出)"""
+    import pandas as pd
+
+    if path.lower().endswith('.csv'):
+        header = list(rows[0]) if rows else ['Subject', 'Period']
+        write_csv_atomic(path, header, ([row[c] for c in header] for row in rows))
+    else:
+        write_frame_atomic(pd.DataFrame(rows), path)
+    print(f"汇总结果已保存为: {path} ({len(rows)} 行)")
+
+
+def print_roster(subjects, progress):
+    print("\n📊 各选手结果:")
+    print(f"{'选手':<16} | {'状态':<6} | {'时期':>4} | {'句数':>8} | {'耗时(s)':>8} | 说明")
+    print("-" * 80)
+    for subject in subjects:
+        entry = progress.subjects.get(subject, {})
+        rows = entry.get('rows', [])
+        sentences = sum(row['Sentences'] for row in rows)
+        note = entry.get('error', '') if entry.get('status') == 'failed' else ''
+        print(f"{subject:<16} | {entry.get('status', '-'):<6} | {len(rows):>4} | {sentences:>8} | "
+              f"{entry.get('seconds', 0):>8.1f} | {note}")
+
+
+# ==========================================
+# 5. 主程序
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多选手批量分析 (选手注册表 + 进程池调度，可断点续跑)")
+    group = parser.add_argument_group('选手名单 (任选其一或组合使用)')
+    group.add_argument('--registry', action='append', default=[], metavar='注册表',
+                       help='JSON 或 CSV 注册表，给出每位选手的语料目录与时期划分，可重复')
+    group.add_argument('--roster', action='append', default=[], metavar='目录',
+                       help='每个子目录为一位选手、选手目录下每个子目录为一个时期，可重复')
+    group.add_argument('--only', action='append', default=[], metavar='选手',
+                       help='只分析这些选手 (可重复)')
+    parser.add_argument('--out-dir', default='多选手结果', help='输出目录 (汇总表、进度、各选手日志)')
+    parser.add_argument('--summary', default=SUMMARY_NAME,
+                        help='汇总表文件名 (位于 --out-dir 下)，按扩展名选择格式 (.csv/.parquet/.feather/.xlsx)')
+    parser.add_argument('--sentences', choices=list(WRITERS), metavar='格式',
+                        help=f"同时写出每位选手的句子级结果 sentences/<选手>.<格式> ({'/'.join(WRITERS)})")
+    parser.add_argument('--workers', type=int, default=0,
+                        help='同时分析的选手数 (进程数)，默认 0 表示使用全部 CPU 核心')
+    parser.add_argument('--restart', action='store_true', help='忽略 progress.json，全部选手重新分析')
+    parser.add_argument('--engine', choices=['snownlp', 'batch'], default=stability.ENGINE,
+                        help='打分引擎：snownlp 逐句打分；batch 向量化批量打分 (结果等价，快一个数量级)')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='路径',
+                        help=f'启用得分缓存 (SQLite，各进程共用)，不给路径时使用 {DEFAULT_CACHE_PATH}')
+    parser.add_argument('--cache-size', type=int, default=2_000_000,
+                        help='缓存最多保存的句子数，超出后按最近使用时间淘汰')
+    parser.add_argument('--match-mode', choices=['jieba', 'raw'], default='jieba',
+                        help='关键词计数方式：jieba 按分词边界 (默认)；raw 不分词直接匹配原文')
+    parser.add_argument('--token-cache', nargs='?', const=DEFAULT_TOKEN_DIR, metavar='目录',
+                        help=f'复用 jieba 分词缓存 (仅 jieba 模式)，不给目录时使用 {DEFAULT_TOKEN_DIR}')
+    parser.add_argument('--plain-jieba', action='store_true',
+                        help='使用原生 jieba 词典，不并入关键词 (用于与旧结果对比)')
+    add_segmenter_arguments(parser)
+    args = parser.parse_args(argv)
+    if not (args.registry or args.roster):
+        parser.error("请用 --registry 或 --roster 指定选手名单")
+
+    subjects, origins = {}, {}
+    for source, roster in chain(((path, load_registry(path)) for path in args.registry),
+                                ((root, roster_from_tree(root)) for root in args.roster)):
+        for name, periods in roster.items():
+            origins.setdefault(name, []).append(source)
+            subjects[name] = periods
+    duplicates = {name: sources for name, sources in origins.items() if len(sources) > 1}
+    if duplicates:
+        parser.error("这些选手在多个名单中重复出现 (请改名或只保留一处): " +
+                     '; '.join(f"{name} ({', '.join(sources)})" for name, sources in duplicates.items()))
+    if args.only:
+        unknown = [s for s in args.only if s not in subjects]
+        if unknown:
+            parser.error(f"名单中没有这些选手: {', '.join(unknown)}")
+        subjects = {s: subjects[s] for s in args.only}
+    if not subjects:
+        parser.error("选手名单为空")
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    分词词典.USE_LEXICON = not args.plain_jieba
+    segmenter = segmenter_from_args(args)
+    settings = {
+        'engine': args.engine,
+        'segmenter': segmenter,
+        'use_lexicon': not args.plain_jieba,
+        'match_mode': args.match_mode,
+        'cache': args.cache,
+        'cache_size': args.cache_size,
+        'model_version': snownlp_model_version(),
+        'token_cache': args.token_cache if args.match_mode == 'jieba' else None,
+        'sentences': args.sentences,
+        'out_dir': os.path.abspath(args.out_dir),
+    }
+    # 影响结果的设置 (引擎只影响速度，得分等价，不计入)
+    settings_tag = '\0'.join([
+        settings['model_version'],
+        'legacy-split' if segmenter is None else segmenter.version,
+        args.match_mode,
+        分词词典.dictionary_version() if args.match_mode == 'jieba' else '-',
+        args.sentences or '-',
+    ])
+
+    progress = Progress(args.out_dir, args.restart)
+    fingerprints = {s: fingerprint(periods, settings_tag) for s, periods in subjects.items()}
+    tasks = []
+    for subject, periods in subjects.items():
+        if progress.is_done(subject, fingerprints[subject]):
+            continue
+        if not periods:
+            progress.record(subject, fingerprints[subject],
+                            {'status': 'failed', 'error': '没有找到任何 .docx 文件', 'seconds': 0})
+            continue
+        tasks.append((subject, periods))
+    # 语料大的选手先开始，避免最后只剩一个大任务在跑
+    tasks.sort(key=lambda task: corpus_bytes(task[1]), reverse=True)
+
+    workers = args.workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks) or 1))
+    print(f"=== 多选手分析: {len(subjects)} 位选手，待分析 {len(tasks)} 位，{workers} 个进程 ===")
+    start = time.perf_counter()
+    finished = 0
+
+    def on_done(subject, result):
+        nonlocal finished
+        finished += 1
+        progress.record(subject, fingerprints[subject], result)
+        mark = '✅' if result['status'] == 'done' else '❌'
+        note = f"{result.get('sentences', 0)} 句" if result['status'] == 'done' else result['error']
+        print(f"[{finished}/{len(tasks)}] {mark} {subject} ({result['seconds']:.1f}s) {note}")
+
+    try:
+        schedule(tasks, settings, workers, on_done)
+    except KeyboardInterrupt:
+        print("\n已中断，已完成的选手记录在 progress.json 中，重新运行时从断点继续。")
+        return 130
+
+    print_roster(subjects, progress)
+    rows = [row for s in subjects for row in progress.subjects.get(s, {}).get('rows', [])]
+    write_summary(rows, os.path.join(args.out_dir, args.summary))
+    failed = [s for s in subjects if progress.subjects.get(s, {}).get('status') != 'done']
+    failures_path = os.path.join(args.out_dir, FAILURES_NAME)
+    if failed:
+        write_csv_atomic(failures_path, ['Subject', 'Error', 'Log'],
+                         ([s, progress.subjects[s].get('error', ''),
+                           os.path.join(args.out_dir, 'logs', f"{safe_name(s)}.log")] for s in failed))
+        print(f"⚠️ {len(failed)} 位选手失败，详见 {failures_path}")
+    elif os.path.exists(failures_path):
+        os.remove(failures_path)
+    print(f"总用时 {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,246 +1,424 @@
-import matplotlib.pyplot as plt
-import numpy as np
-import jieba
-import docx
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import os
-import platform
-
-# ==========================================
-# 1. 配置与中文字体
-# ==========================================
-# 解决 Matplotlib 中文乱码问题
-system_name = platform.system()
-if system_name == "Windows":
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
-elif system_name == "Darwin":  # MacOS
-    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
-else:
-    plt.rcParams['font.sans-serif'] = ['sans-serif']
-
-plt.rcParams['axes.unicode_minus'] = False
-
-# ==========================================
-# 2. 定义情感维度词典 (核心评分标准)
-# ==========================================
-
-# 🔴 维度 A: 锋芒/攻击性 (Aggression/Ego)
-# 代表：早期“大魔王”时期的自信、征服欲和自我中心
-aggression_keywords = {
-    "杀", "击杀", "单杀", "碾压", "摧毁", "打爆",
-    "证明", "最强", "第一", "冠军", "无敌", "神",
-    "我", "我的", "自己", "统治", "愤怒", "垃圾",
-    "处刑", "傲慢", "野心", "王座", "必须赢", "赢"
-}
-
-# 🟢 维度 B: 沉稳/谦虚 (Maturity/Humility)
-# 代表：后期“求道者”时期的感恩、团队、客观和哲学思考
-maturity_keywords = {
-    "感谢", "感激", "谢谢", "运气", "多亏", "抱歉",
-    "队友", "团队", "我们", "大家", "配合", "失误",
-    "学习", "过程", "客观", "健康", "心态", "读书",
-    "冥想", "平静", "享受", "准备", "不足", "改进",
-    "粉丝", "责任", "沉稳", "接受", "下滑"
-}
-
-
-# ==========================================
-# 3. 工具函数
-# ==========================================
-
-def read_word_file(filepath):
-    """读取 .docx 文件中的所有文本"""
-    if not filepath:
-        return ""
-    try:
-        doc = docx.Document(filepath)
-        full_text = []
-        for para in doc.paragraphs:
-            if para.text.strip():
-                full_text.append(para.text.strip())
-        return "\n".join(full_text)
-    except Exception as e:
-        print(f"❌ 读取文件失败: {filepath}\n错误: {e}")
-        return ""
-
-
-def calculate_density(text):
-    """
-    计算文本中两类关键词的密度
-    返回: (锋芒得分, 沉稳得分)
-    """
-    if not text:
-        return 0, 0
-
-    words = list(jieba.cut(text))
-    total_words = len(words)
-
-    if total_words == 0:
-        return 0, 0
-
-    agg_count = sum(1 for w in words if w in aggression_keywords)
-    mat_count = sum(1 for w in words if w in maturity_keywords)
-
-    # 计算密度系数 (为了图表显示效果，乘以 100)
-    agg_score = (agg_count / total_words) * 100
-    mat_score = (mat_count / total_words) * 100
-
-    return agg_score, mat_score
-
-
-# ==========================================
-# 4. 主程序
-# ==========================================
-
-def main():
-    root = tk.Tk()
-    root.withdraw()  # 隐藏主窗口
-
-    print("=== Faker 心态演变分析工具启动 ===")
-
-    # 存储三个阶段的数据
-    stages = ["前期 (2013-2017)", "中期 (2018-2021)", "后期 (2022-至今)"]
-    file_paths = []
-
-    # --- 1. 依次选择文件 ---
-    messagebox.showinfo("步骤说明", "请依次选择三个时期的 Word 文档：\n1. 前期\n2. 中期\n3. 后期")
-
-    for stage in stages:
-        print(f"📂 请选择 [{stage}] 的文档...")
-        path = filedialog.askopenfilename(
-            title=f"选择 {stage} 的采访文档",
-            filetypes=[("Word Documents", "*.docx")]
-        )
-        if not path:
-            print(f"⚠️ 跳过或未选择 {stage}，程序将使用模拟数据演示该阶段。")
-            file_paths.append(None)
-        else:
-            file_paths.append(path)
-
-    # --- 2. 计算得分 ---
-    agg_scores = []
-    mat_scores = []
-
-    # 默认模拟数据 (以防用户未选择文件)
-    mock_data = [
-        ("我要杀光他们证明我是最强", 8.0, 1.0),  # 前期: 高锋芒
-        ("输了很难过但我必须承担责任", 4.0, 3.5),  # 中期: 纠结
-        ("感谢队友和粉丝让我享受过程", 1.5, 7.0)  # 后期: 高沉稳
-    ]
-
-    print("\n📊 分析结果:")
-    print("-" * 50)
-    print(f"{'阶段':<15} | {'锋芒指数 (Agg)':<15} | {'沉稳指数 (Mat)':<15}")
-    print("-" * 50)
-
-    for i, path in enumerate(file_paths):
-        if path:
-            text = read_word_file(path)
-            a_score, m_score = calculate_density(text)
-            # 简单的归一化/放大处理，确保图表好看
-            # 如果文本很长，密度可能会很小，这里做个动态调整
-            scale_factor = 2.0
-            a_score *= scale_factor
-            m_score *= scale_factor
-        else:
-            # 使用模拟数据
-            a_score, m_score = mock_data[i][1], mock_data[i][2]
-
-        agg_scores.append(a_score)
-        mat_scores.append(m_score)
-        print(f"{stages[i]:<15} | {a_score:<15.2f} | {m_score:<15.2f}")
-
-    # ==========================================
-    # 5. 可视化生成
-    # ==========================================
-
-    # --- 图表 A: 演变折线图 ---
-    plt.figure(figsize=(14, 6))
-
-    x_axis = np.arange(len(stages))
-
-    # 绘制曲线
-    plt.plot(x_axis, agg_scores, marker='o', linestyle='-', linewidth=3, color='#d62728',
-             label='锋芒/攻击性 (Aggression)')
-    plt.plot(x_axis, mat_scores, marker='s', linestyle='-', linewidth=3, color='#2ca02c', label='沉稳/谦逊 (Humility)')
-
-    # 填充交叉区域
-    # 为了 fill_between 正常工作，需要插值让曲线平滑 (这里简化处理，直接连线)
-    plt.fill_between(x_axis, agg_scores, mat_scores, where=(np.array(agg_scores) > np.array(mat_scores)),
-                     interpolate=True, color='#d62728', alpha=0.1)
-    plt.fill_between(x_axis, agg_scores, mat_scores, where=(np.array(agg_scores) <= np.array(mat_scores)),
-                     interpolate=True, color='#2ca02c', alpha=0.1)
-
-    # 装饰图表
-    plt.title('Faker 职业生涯心态演变轨迹 (基于词频占比分析)', fontsize=16, pad=20)
-    plt.ylabel('关键词密度指数', fontsize=12)
-    plt.xticks(x_axis, stages, fontsize=12)
-    plt.grid(True, linestyle='--', alpha=0.5)
-    plt.legend(fontsize=12)
-
-    # 标注关键节点
-    for i, txt in enumerate(agg_scores):
-        plt.annotate(f"{txt:.1f}", (x_axis[i], agg_scores[i]), textcoords="offset points", xytext=(0, 5), ha='center',
-                     color='#d62728')
-    for i, txt in enumerate(mat_scores):
-        plt.annotate(f"{txt:.1f}", (x_axis[i], mat_scores[i]), textcoords="offset points", xytext=(0, -15), ha='center',
-                     color='#2ca02c')
-
-    plt.tight_layout()
-    plt.show()
-
-    # --- 图表 B: 前后期雷达对比图 ---
-    # 这是一个简化的五维推断，基于我们的两个核心得分进行映射
-    # 逻辑：
-    # 攻击欲 ≈ 锋芒指数
-    # 自我中心 ≈ 锋芒指数 * 0.8
-    # 团队意识 ≈ 沉稳指数 * 1.2
-    # 抗压能力 ≈ (沉稳指数 + 锋芒指数) / 2 (中期通常最低)
-    # 哲学/感恩 ≈ 沉稳指数
-
-    def get_radar_data(agg, mat):
-        # 限制在 0-10 分之间
-        def limit(x): return min(max(x, 1), 10)
-
-        return [
-            limit(agg * 1.2),  # 攻击欲
-            limit(agg * 1.0),  # 自我中心
-            limit(mat * 1.5),  # 团队意识
-            limit((agg + mat) / 1.5),  # 抗压/心态管理
-            limit(mat * 1.2)  # 哲学/感恩
-        ]
-
-    labels = np.array(['攻击欲', '自我中心', '团队意识', '抗压/心态', '哲学/感恩'])
-    num_vars = len(labels)
-    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-    angles += angles[:1]  # 闭合
-
-    # 获取前期和后期的数据
-    data_early = get_radar_data(agg_scores[0], mat_scores[0])
-    data_late = get_radar_data(agg_scores[2], mat_scores[2])
-
-    data_early += data_early[:1]
-    data_late += data_late[:1]
-
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-
-    # 绘图
-    ax.plot(angles, data_early, color='#d62728', linewidth=2, label='前期 (Early)')
-    ax.fill(angles, data_early, color='#d62728', alpha=0.25)
-
-    ax.plot(angles, data_late, color='#2ca02c', linewidth=2, label='后期 (Late)')
-    ax.fill(angles, data_late, color='#2ca02c', alpha=0.25)
-
-    ax.set_yticklabels([])
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(labels, fontsize=12)
-    plt.title('Faker 心态模型重构对比 (前期 vs 后期)', fontsize=16, pad=20)
-    plt.legend(loc='upper right', bbox_to_anchor=(0.1, 0.1))
-
-    plt.tight_layout()
-    plt.show()
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import matplotlib.pyplot as plt
+import numpy as np
+import os
+import sys
+import csv
+import argparse
+import platform
+
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+except ImportError:  # 无界面服务器可能没有 Tk，批处理模式不依赖它
+    tk = None
+
+from itertools import chain
+
+from 命令行工具 import add_input_arguments, collect_period_files
+from 文本提取 import read_paragraphs, read_text
+from 关键词匹配 import shared_matcher
+from 分词缓存 import DEFAULT_TOKEN_DIR, TokenCache
+from 文本存储 import add_store_arguments, use_store
+from 词频矩阵 import (DocumentTermMatrix, add_corpus_arguments, check_corpus_arguments, group_documents,
+                  write_table)
+import 分词词典
+from 图表渲染 import ReusableFigure, add_format_argument, renderer, save_figure, use_headless
+from 性能剖析 import PROFILER, add_profile_arguments, finish_profiling, start_profiling
+
+# ==========================================
+# 1. 配置与中文字体
+# ==========================================
+# 解决 Matplotlib 中文乱码问题
+system_name = platform.system()
+if system_name == "Windows":
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
+elif system_name == "Darwin":  # MacOS
+    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
+else:
+    plt.rcParams['font.sans-serif'] = ['sans-serif']
+
+plt.rcParams['axes.unicode_minus'] = False
+
+# ==========================================
+# 2. 定义情感维度词典 (核心评分标准)
+# ==========================================
+
+# 🔴 维度 A: 锋芒/攻击性 (Aggression/Ego)
+# 代表：早期“大魔王”时期的自信、征服欲和自我中心
+aggression_keywords = {
+    "杀", "击杀", "单杀", "碾压", "摧毁", "打爆",
+    "证明", "最强", "第一", "冠军", "无敌", "神",
+    "我", "我的", "自己", "统治", "愤怒", "垃圾",
+    "处刑", "傲慢", "野心", "王座", "必须赢", "赢"
+}
+
+# 🟢 维度 B: 沉稳/谦虚 (Maturity/Humility)
+# 代表：后期“求道者”时期的感恩、团队、客观和哲学思考
+maturity_keywords = {
+    "感谢", "感激", "谢谢", "运气", "多亏", "抱歉",
+    "队友", "团队", "我们", "大家", "配合", "失误",
+    "学习", "过程", "客观", "健康", "心态", "读书",
+    "冥想", "平静", "享受", "准备", "不足", "改进",
+    "粉丝", "责任", "沉稳", "接受", "下滑"
+}
+
+
+# ==========================================
+# 3. 工具函数
+# ==========================================
+
+def read_word_file(filepath):
+    """读取 .docx 文件中的所有文本"""
+    return read_text(filepath)
+
+
+def read_word_paragraphs(filepaths):
+    """逐段读取多个 .docx (流式)，供 calculate_density 直接消费"""
+    return chain.from_iterable(read_paragraphs(f) for f in filepaths)
+
+
+def calculate_density(text, mode='jieba'):
+    """
+    计算文本中两类关键词的密度
+    text: 字符串或段落迭代器 (见 read_word_paragraphs)
+    mode: 'jieba' 按分词边界计数；'raw' 跳过分词 (见 关键词匹配.KeywordMatcher)
+    返回: (锋芒得分, 沉稳得分)
+    """
+    if not text:
+        return 0, 0
+    # 四个词典共用一个匹配器 (见 关键词匹配.shared_matcher)，个人 / 团队的命中同时得到
+    return density_from_counts(*shared_matcher().count(text, mode))
+
+
+def density_from_counts(counts, total_words):
+    """由共用匹配器的一次计数 (counts, total_words) 得到 (锋芒得分, 沉稳得分)"""
+    agg_count, mat_count = counts['aggression'], counts['maturity']
+
+    if total_words == 0:
+        return 0, 0
+
+    # 计算密度系数 (为了图表显示效果，乘以 100)
+    agg_score = (agg_count / total_words) * 100
+    mat_score = (mat_count / total_words) * 100
+
+    return agg_score, mat_score
+
+
+def print_results(stages, agg_scores, mat_scores):
+    """打印各阶段的锋芒 / 沉稳指数"""
+    print("\n📊 分析结果:")
+    print("-" * 50)
+    print(f"{'阶段':<15} | {'锋芒指数 (Agg)':<15} | {'沉稳指数 (Mat)':<15}")
+    print("-" * 50)
+    for i in range(len(stages)):
+        print(f"{stages[i]:<15} | {agg_scores[i]:<15.2f} | {mat_scores[i]:<15.2f}")
+
+
+# 简单的归一化/放大处理，确保图表好看
+# 如果文本很长，密度可能会很小，这里做个动态调整
+SCALE_FACTOR = 2.0
+
+
+# ==========================================
+# 4. 可视化生成
+# ==========================================
+
+class EvolutionFigure(ReusableFigure):
+    """图表 A: 锋芒 / 沉稳两条演变折线，交叉区域按占优一方着色"""
+
+    def layout_key(self, stages, agg_scores, mat_scores):
+        return tuple(stages)
+
+    def build(self, stages, agg_scores, mat_scores):
+        self.fig = plt.figure(figsize=(14, 6))
+        ax = self.ax = self.fig.gca()
+        x_axis = self.x = np.arange(len(stages))
+        zeros = [0] * len(stages)
+
+        # 绘制曲线
+        self.agg_line, = ax.plot(x_axis, zeros, marker='o', linestyle='-', linewidth=3, color='#d62728',
+                                 label='锋芒/攻击性 (Aggression)')
+        self.mat_line, = ax.plot(x_axis, zeros, marker='s', linestyle='-', linewidth=3, color='#2ca02c',
+                                 label='沉稳/谦逊 (Humility)')
+        self.fills = []
+
+        # 装饰图表
+        ax.set_title('Faker 职业生涯心态演变轨迹 (基于词频占比分析)', fontsize=16, pad=20)
+        ax.set_ylabel('关键词密度指数', fontsize=12)
+        ax.set_xticks(x_axis, stages, fontsize=12)
+        ax.grid(True, linestyle='--', alpha=0.5)
+        ax.legend(fontsize=12)
+
+        # 标注关键节点
+        self.agg_labels = [ax.annotate('', (x, 0), textcoords="offset points", xytext=(0, 5), ha='center',
+                                       color='#d62728') for x in x_axis]
+        self.mat_labels = [ax.annotate('', (x, 0), textcoords="offset points", xytext=(0, -15), ha='center',
+                                       color='#2ca02c') for x in x_axis]
+
+    def update(self, stages, agg_scores, mat_scores):
+        ax, x_axis = self.ax, self.x
+        self.agg_line.set_ydata(agg_scores)
+        self.mat_line.set_ydata(mat_scores)
+
+        # 填充交叉区域 (填充区域随数据变化，每次重建)
+        for fill in self.fills:
+            fill.remove()
+        agg, mat = np.array(agg_scores), np.array(mat_scores)
+        self.fills = [
+            ax.fill_between(x_axis, agg, mat, where=(agg > mat), interpolate=True, color='#d62728', alpha=0.1),
+            ax.fill_between(x_axis, agg, mat, where=(agg <= mat), interpolate=True, color='#2ca02c', alpha=0.1),
+        ]
+
+        for labels, scores in ((self.agg_labels, agg_scores), (self.mat_labels, mat_scores)):
+            for x, label, value in zip(x_axis, labels, scores):
+                label.xy = (x, value)
+                label.set_text(f"{value:.1f}")
+        self.rescale(ax)
+
+
+def plot_evolution(stages, agg_scores, mat_scores):
+    """图表 A: 演变折线图，返回 Figure"""
+    return renderer(EvolutionFigure).render(stages, agg_scores, mat_scores)
+
+
+# --- 图表 B: 前后期雷达对比图 ---
+# 这是一个简化的五维推断，基于我们的两个核心得分进行映射
+# 逻辑：
+# 攻击欲 ≈ 锋芒指数
+# 自我中心 ≈ 锋芒指数 * 0.8
+# 团队意识 ≈ 沉稳指数 * 1.2
+# 抗压能力 ≈ (沉稳指数 + 锋芒指数) / 2 (中期通常最低)
+# 哲学/感恩 ≈ 沉稳指数
+
+def get_radar_data(agg, mat):
+    """
+    agg / mat 为单个得分时返回五个维度的列表；
+    为各阶段 (或各文档) 得分的数组时一次算出全部，返回 [[五个维度], ...]
+    """
+    agg, mat = np.asarray(agg, dtype=float), np.asarray(mat, dtype=float)
+    data = np.stack([
+        agg * 1.2,  # 攻击欲
+        agg * 1.0,  # 自我中心
+        mat * 1.5,  # 团队意识
+        (agg + mat) / 1.5,  # 抗压/心态管理
+        mat * 1.2  # 哲学/感恩
+    ], axis=-1)
+    # 限制在 0-10 分之间
+    return np.clip(data, 1, 10).tolist()
+
+
+RADAR_LABELS = ['攻击欲', '自我中心', '团队意识', '抗压/心态', '哲学/感恩']
+
+
+class RadarFigure(ReusableFigure):
+    """图表 B: 首末阶段雷达对比图"""
+
+    def build(self, agg_scores, mat_scores):
+        num_vars = len(RADAR_LABELS)
+        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
+        self.angles = angles + angles[:1]  # 闭合
+        zeros = [0] * len(self.angles)
+
+        self.fig = plt.figure(figsize=(8, 8))
+        ax = self.ax = self.fig.add_subplot(polar=True)
+
+        # 绘图
+        self.early_line, = ax.plot(self.angles, zeros, color='#d62728', linewidth=2, label='前期 (Early)')
+        self.early_fill, = ax.fill(self.angles, zeros, color='#d62728', alpha=0.25)
+
+        self.late_line, = ax.plot(self.angles, zeros, color='#2ca02c', linewidth=2, label='后期 (Late)')
+        self.late_fill, = ax.fill(self.angles, zeros, color='#2ca02c', alpha=0.25)
+
+        ax.set_yticklabels([])
+        ax.set_xticks(self.angles[:-1])
+        ax.set_xticklabels(RADAR_LABELS, fontsize=12)
+        ax.set_title('Faker 心态模型重构对比 (前期 vs 后期)', fontsize=16, pad=20)
+        ax.legend(loc='upper right', bbox_to_anchor=(0.1, 0.1))
+
+    def update(self, agg_scores, mat_scores):
+        # 获取前期和后期的数据
+        radar = get_radar_data(agg_scores, mat_scores)
+        data_early, data_late = radar[0], radar[-1]
+
+        for line, fill, data in ((self.early_line, self.early_fill, data_early),
+                                 (self.late_line, self.late_fill, data_late)):
+            data = data + data[:1]
+            line.set_ydata(data)
+            fill.set_xy(np.column_stack([self.angles, data]))
+        self.rescale(self.ax)
+
+
+def plot_radar(agg_scores, mat_scores):
+    """图表 B: 首末阶段雷达对比图，返回 Figure"""
+    return renderer(RadarFigure).render(agg_scores, mat_scores)
+
+
+# ==========================================
+# 5. 主程序
+# ==========================================
+
+def gui_main():
+    root = tk.Tk()
+    root.withdraw()  # 隐藏主窗口
+
+    print("=== Faker 心态演变分析工具启动 ===")
+
+    # 存储三个阶段的数据
+    stages = ["前期 (2013-2017)", "中期 (2018-2021)", "后期 (2022-至今)"]
+    file_paths = []
+
+    # --- 1. 依次选择文件 ---
+    messagebox.showinfo("步骤说明", "请依次选择三个时期的 Word 文档：\n1. 前期\n2. 中期\n3. 后期")
+
+    for stage in stages:
+        print(f"📂 请选择 [{stage}] 的文档...")
+        path = filedialog.askopenfilename(
+            title=f"选择 {stage} 的采访文档",
+            filetypes=[("Word Documents", "*.docx")]
+        )
+        if not path:
+            print(f"⚠️ 跳过或未选择 {stage}，程序将使用模拟数据演示该阶段。")
+            file_paths.append(None)
+        else:
+            file_paths.append(path)
+
+    # --- 2. 计算得分 ---
+    agg_scores = []
+    mat_scores = []
+
+    # 默认模拟数据 (以防用户未选择文件)
+    mock_data = [
+        ("我要杀光他们证明我是最强", 8.0, 1.0),  # 前期: 高锋芒
+        ("输了很难过但我必须承担责任", 4.0, 3.5),  # 中期: 纠结
+        ("感谢队友和粉丝让我享受过程", 1.5, 7.0)  # 后期: 高沉稳
+    ]
+
+    for i, path in enumerate(file_paths):
+        if path:
+            a_score, m_score = calculate_density(read_word_paragraphs([path]))
+            a_score *= SCALE_FACTOR
+            m_score *= SCALE_FACTOR
+        else:
+            # 使用模拟数据
+            a_score, m_score = mock_data[i][1], mock_data[i][2]
+
+        agg_scores.append(a_score)
+        mat_scores.append(m_score)
+
+    print_results(stages, agg_scores, mat_scores)
+
+    # 两张图同时显示，不必关掉第一张才看到第二张
+    plot_evolution(stages, agg_scores, mat_scores)
+    plot_radar(agg_scores, mat_scores)
+    plt.show()
+
+
+def corpus_densities(grouped, token_cache=None, doc_output=None):
+    """
+    语料模式：整个语料建一个 文档-词 矩阵 (见 词频矩阵)，一次乘法得到所有文档、所有组的得分
+    返回 (组名, 锋芒得分, 沉稳得分)；doc_output 给出时另存每个文档的得分与雷达维度
+    """
+    print(f"正在建立文档-词矩阵: {sum(len(files) for files in grouped.values())} 个文档, {len(grouped)} 组...")
+    matrix = DocumentTermMatrix.build(grouped, token_cache)
+    print(f"[文档-词矩阵] {matrix.summary()}")
+    matcher = shared_matcher()
+    columns = matcher.columns('aggression', 'maturity')
+    doc_hits = matrix.document_hits(matcher)
+    agg, mat = (matrix.densities(*matrix.group_hits(matcher, doc_hits))[:, columns] * SCALE_FACTOR).T
+
+    if doc_output:
+        doc_agg, doc_mat = (matrix.densities(*doc_hits)[:, columns] * SCALE_FACTOR).T
+        radar = get_radar_data(doc_agg, doc_mat)
+        write_table(doc_output, ['Document', 'Group', 'Words', 'Aggression', 'Maturity'] + RADAR_LABELS,
+                    ([path, group, words, a, m] + dims for path, group, words, a, m, dims in
+                     zip(matrix.documents, matrix.document_groups(), doc_hits[1].tolist(),
+                         doc_agg.tolist(), doc_mat.tolist(), radar)))
+        print(f"文档级结果已保存为: {doc_output}")
+    return matrix.labels, agg.tolist(), mat.tolist()
+
+
+def batch_main(argv):
+    """
+    批处理模式：不使用模拟数据，时期数量不限，同一时期的多个文档合并计算
+    示例:
+      python 心态演变分析.py --tree 原始数据及数据处理结果/ --figure-dir figures/
+      python 心态演变分析.py --tree 原始数据及数据处理结果/ --corpus --group-by year --doc-output docs.csv
+    """
+    parser = argparse.ArgumentParser(description="Faker 心态演变分析 (批处理模式)")
+    add_input_arguments(parser)
+    parser.add_argument('-o', '--output', help='结果表输出路径 (.csv)')
+    parser.add_argument('--match-mode', choices=['jieba', 'raw'], default='jieba',
+                        help='关键词计数方式：jieba 按分词边界 (默认)；raw 不分词直接匹配原文')
+    parser.add_argument('--token-cache', nargs='?', const=DEFAULT_TOKEN_DIR, metavar='目录',
+                        help=f'复用 jieba 分词缓存 (仅 jieba 模式)，不给目录时使用 {DEFAULT_TOKEN_DIR}')
+    parser.add_argument('--plain-jieba', action='store_true',
+                        help='使用原生 jieba 词典，不并入关键词 (用于与旧结果对比)')
+    parser.add_argument('--figure-dir', default='.', help='图表输出目录')
+    add_format_argument(parser)
+    add_corpus_arguments(parser)
+    add_store_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    check_corpus_arguments(parser, args)
+    start_profiling(args)
+
+    分词词典.USE_LEXICON = not args.plain_jieba
+    use_headless()
+    periods = collect_period_files(args, ('.docx',))
+    if not periods:
+        parser.error("没有找到任何 .docx 文件")
+
+    print("=== Faker 心态演变分析工具 (批处理模式) ===")
+    use_store(args, periods)
+    token_cache = TokenCache(args.token_cache) if args.token_cache and args.match_mode == 'jieba' else None
+    if args.corpus:
+        stages, agg_scores, mat_scores = corpus_densities(group_documents(periods, args.group_by),
+                                                          token_cache, args.doc_output)
+    else:
+        stages = list(periods)
+        agg_scores = []
+        mat_scores = []
+        for stage in stages:
+            print(f"正在分析: {stage} ({len(periods[stage])} 个文档)...")
+            if token_cache:
+                source = token_cache.corpus(periods[stage])
+            else:
+                source = read_word_paragraphs(periods[stage])
+            with PROFILER.stage('关键词密度', doc=stage):
+                a_score, m_score = calculate_density(source, args.match_mode)
+            agg_scores.append(a_score * SCALE_FACTOR)
+            mat_scores.append(m_score * SCALE_FACTOR)
+
+    print_results(stages, agg_scores, mat_scores)
+    if token_cache:
+        print(f"[分词缓存] {token_cache.summary()}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Stage', 'Aggression', 'Maturity'])
+            writer.writerows(zip(stages, agg_scores, mat_scores))
+        print(f"结果已保存为: {args.output}")
+
+    figures = (('faker_mindset_evolution.png', lambda: plot_evolution(stages, agg_scores, mat_scores)),
+               ('faker_mindset_radar.png', lambda: plot_radar(agg_scores, mat_scores)))
+    for name, plot in figures:
+        with PROFILER.stage('绘图', doc=name):
+            paths = save_figure(plot(), os.path.join(args.figure_dir, name), args.figure_format)
+        for path in paths:
+            print(f"[可视化完成] 图表已保存为: {path}")
+    finish_profiling(args)
+    return 0
+
+
+def main(argv=None):
+    """带命令行参数时进入批处理模式，否则弹出文件选择窗口"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv:
+        return batch_main(argv)
+    return gui_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""
+可选的分阶段性能剖析 (默认关闭)
+记录每个阶段的墙钟时间、CPU 时间、处理条目数和内存，按阶段、按文档汇总，
+运行结束时打印汇总表，并可写出 JSON 或 Chrome trace (chrome://tracing、ui.perfetto.dev 打开)。
+
+两种计时方式:
+    with PROFILER.stage('结果写出', doc='采访.docx') as s:   # 一段代码
+        writer.write(frame)
+        s.items = len(frame)
+    paragraphs = PROFILER.iterate('docx解析', read_paragraphs(path))  # 惰性迭代器：只累计 next() 内的耗时
+
+阶段可以嵌套，汇总表中的“独占”时间已扣除嵌套的子阶段 (流式处理中各个迭代器交替执行，
+独占时间才是各阶段真正的开销)。未指定 doc 时沿用外层阶段的 doc。
+关闭时 stage() 返回一个什么都不做的共享对象，iterate() 原样返回迭代器，不增加逐条开销。
+进程池中子进程的耗时不计入，只体现为主进程等待结果的时间；后台线程 (如 文本提取.prefetch) 各自维护阶段栈。
+"""
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+def peak_rss_mb():
+    """
+    本进程的峰值常驻内存 (Linux 上 ru_maxrss 单位为 KB，macOS 上为字节)
+    Windows 没有 resource 模块：装了 psutil 时取峰值工作集，否则记为 0
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return 0.0
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+_PAGE_MB = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024) if hasattr(os, 'sysconf') else 0
+
+
+def _rss_mb():
+    """当前常驻内存；读不到 /proc 时退回峰值内存"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+class _NullStage:
+    """关闭时 stage() 返回的共享对象"""
+
+    items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Frame:
+    """调用栈上的一个活动阶段，child 为其中嵌套子阶段的墙钟时间之和"""
+
+    __slots__ = ('name', 'doc', 'child')
+
+    def __init__(self, name, doc):
+        self.name = name
+        self.doc = doc
+        self.child = 0.0
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'doc', 'items', 'frame', 'start', 'cpu', 'rss')
+
+    def __init__(self, profiler, name, doc, items):
+        self.profiler = profiler
+        self.name = name
+        self.doc = doc
+        self.items = items
+
+    def __enter__(self):
+        self.rss = _rss_mb()
+        self.frame = self.profiler._push(self.name, self.doc)
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        cpu = time.process_time() - self.cpu
+        wall = end - self.start
+        self.profiler._pop(self.frame, wall)
+        rss = _rss_mb()
+        self.profiler._record(self.name, self.doc, self.start, end - self.start, wall, wall - self.frame.child,
+                              cpu, self.items, rss, rss - self.rss)
+        return False
+
+
+class Profiler:
+    """
+    用法:
+        PROFILER.enable()
+        ...  # 各脚本中的 stage() / iterate() 开始记录
+        PROFILER.report()
+        PROFILER.write('profile.json')              # 或 fmt='chrome'
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+        self.events = []
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+
+    @property
+    def _stack(self):
+        """当前线程的阶段栈 (嵌套关系只在同一线程内成立)"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def disable(self):
+        self.enabled = False
+
+    # ------------------------------------------
+    # 记录
+    # ------------------------------------------
+
+    def _current_doc(self, doc):
+        if doc is not None:
+            return doc
+        for frame in reversed(self._stack):
+            if frame.doc is not None:
+                return frame.doc
+        return None
+
+    def _push(self, name, doc):
+        frame = _Frame(name, doc)
+        self._stack.append(frame)
+        return frame
+
+    def _pop(self, frame, wall):
+        # 正常情况下 frame 就在栈顶；生成器被提前丢弃时可能不是，只移除它自己
+        stack = self._stack
+        if stack and stack[-1] is frame:
+            stack.pop()
+        elif frame in stack:
+            stack.remove(frame)
+        if stack:
+            stack[-1].child += wall
+
+    def _record(self, name, doc, start, span, wall, own, cpu, items, rss, rss_delta):
+        self.events.append({
+            'name': name,
+            'doc': doc,
+            'start': start - self._origin,
+            'span': span,
+            'wall': wall,
+            'self': own,
+            'cpu': cpu,
+            'items': items,
+            'rss_mb': rss,
+            'rss_delta_mb': rss_delta,
+            'peak_rss_mb': peak_rss_mb(),
+        })
+
+    def stage(self, name, doc=None, items=None):
+        """为一段代码计时的上下文管理器；可以在块内设置 .items"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, self._current_doc(doc), items)
+
+    def iterate(self, name, iterable, doc=None):
+        """
+        包装一个 (惰性) 迭代器：累计每次 next() 的耗时，条目数为产出的元素个数，
+        迭代结束 (或被丢弃) 时记录一次
+        """
+        if not self.enabled:
+            return iterable
+        return self._iterate(name, iter(iterable), self._current_doc(doc))
+
+    def _iterate(self, name, iterator, doc):
+        perf, cpu_time = time.perf_counter, time.process_time
+        wall = own = cpu = 0.0
+        items = 0
+        first = last = None
+        rss = _rss_mb()
+        try:
+            while True:
+                frame = self._push(name, doc)
+                c0 = cpu_time()
+                t0 = perf()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    t1 = perf()
+                    cpu += cpu_time() - c0
+                    self._pop(frame, t1 - t0)
+                    wall += t1 - t0
+                    own += t1 - t0 - frame.child
+                    first = t0 if first is None else first
+                    last = t1
+                items += 1
+                yield item
+        finally:
+            if first is not None:
+                end = _rss_mb()
+                self._record(name, doc, first, last - first, wall, own, cpu, items, end, end - rss)
+
+    # ------------------------------------------
+    # 汇总与输出
+    # ------------------------------------------
+
+    @staticmethod
+    def _aggregate(events, key):
+        totals = {}
+        for e in events:
+            t = totals.setdefault(key(e), {'calls': 0, 'wall': 0.0, 'self': 0.0, 'cpu': 0.0, 'items': 0,
+                                           'rss_delta_mb': 0.0, 'peak_rss_mb': 0.0})
+            t['calls'] += 1
+            t['wall'] += e['wall']
+            t['self'] += e['self']
+            t['cpu'] += e['cpu']
+            t['items'] += e['items'] or 0
+            t['rss_delta_mb'] += e['rss_delta_mb']
+            t['peak_rss_mb'] = max(t['peak_rss_mb'], e['peak_rss_mb'])
+        return totals
+
+    def summary(self):
+        """按阶段汇总 (按首次出现的顺序)，返回字典列表"""
+        totals = self._aggregate(self.events, lambda e: e['name'])
+        return [{'stage': name, **t} for name, t in totals.items()]
+
+    def documents(self):
+        """按 (文档, 阶段) 汇总"""
+        totals = self._aggregate([e for e in self.events if e['doc'] is not None],
+                                 lambda e: (e['doc'], e['name']))
+        return [{'doc': doc, 'stage': name, **t} for (doc, name), t in totals.items()]
+
+    def report(self, per_document=True):
+        """打印汇总表"""
+        if not self.events:
+            return
+        total = sum(e['self'] for e in self.events) or 1e-9
+        print("\n[性能剖析] 各阶段耗时 (独占时间已扣除嵌套的子阶段)")
+        print(f"{'阶段':<12} | {'次数':>6} | {'独占(s)':>9} | {'占比':>6} | {'总计(s)':>9} | {'CPU(s)':>8} | "
+              f"{'条目':>9} | {'条目/秒':>10} | {'内存增量MB':>10} | {'峰值MB':>8}")
+        print("-" * 118)
+        for row in sorted(self.summary(), key=lambda r: -r['self']):
+            rate = row['items'] / row['self'] if row['items'] and row['self'] > 0 else 0
+            print(f"{row['stage']:<12} | {row['calls']:>6} | {row['self']:>9.3f} | {row['self'] / total:>6.1%} | "
+                  f"{row['wall']:>9.3f} | {row['cpu']:>8.3f} | {row['items']:>9} | {rate:>10.0f} | "
+                  f"{row['rss_delta_mb']:>10.1f} | {row['peak_rss_mb']:>8.1f}")
+
+        docs = self.documents()
+        if per_document and docs:
+            print("\n[性能剖析] 各文档耗时 (独占, 秒)")
+            by_doc = {}
+            for row in docs:
+                by_doc.setdefault(row['doc'], []).append(f"{row['stage']} {row['self']:.3f}")
+            for doc, parts in by_doc.items():
+                print(f"  {doc}: " + "，".join(parts))
+
+    def to_dict(self):
+        return {
+            'meta': {
+                'argv': sys.argv,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': datetime.now().isoformat(timespec='seconds'),
+            },
+            'stages': self.summary(),
+            'documents': self.documents(),
+            'events': self.events,
+        }
+
+    def chrome_trace(self):
+        """Chrome trace 事件格式：每个阶段一条轨道，迭代器阶段的时长为首次到末次 next() 的跨度"""
+        tracks = {}
+        events = []
+        for e in self.events:
+            tid = tracks.setdefault(e['name'], len(tracks) + 1)
+            args = {'doc': e['doc'], 'items': e['items'], 'self_ms': round(e['self'] * 1e3, 3),
+                    'busy_ms': round(e['wall'] * 1e3, 3), 'cpu_ms': round(e['cpu'] * 1e3, 3),
+                    'rss_mb': round(e['rss_mb'], 1)}
+            events.append({'name': e['name'] if e['doc'] is None else f"{e['name']} {e['doc']}",
+                           'cat': e['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                           'ts': round(e['start'] * 1e6, 1), 'dur': round(e['span'] * 1e6, 1), 'args': args})
+        for name, tid in tracks.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path, fmt='json'):
+        """写出剖析结果：fmt='json' 为汇总 + 全部事件，'chrome' 为 Chrome trace"""
+        data = self.chrome_trace() if fmt == 'chrome' else self.to_dict()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        print(f"[性能剖析] 已保存为: {path}")
+
+
+# 全部脚本共用一个剖析器
+PROFILER = Profiler()
+
+DEFAULT_PROFILE_PATH = 'faker_profile.json'
+
+
+def add_profile_arguments(parser):
+    """为解析器添加统一的剖析参数"""
+    group = parser.add_argument_group('性能剖析')
+    group.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_PATH, metavar='路径',
+                       help='记录各阶段的耗时 / CPU / 条目数 / 内存，运行结束时打印汇总表并保存 '
+                            f'(不给路径时为 {DEFAULT_PROFILE_PATH})')
+    group.add_argument('--profile-format', choices=['json', 'chrome'], default='json',
+                       help='剖析结果格式：json 汇总 + 事件；chrome 为 Chrome trace (ui.perfetto.dev 可打开)')
+
+
+def start_profiling(args):
+    """按命令行参数开启剖析"""
+    if args.profile:
+        PROFILER.enable()
+
+
+def finish_profiling(args):
+    """打印汇总表并写出剖析结果 (未开启时什么都不做)"""
+    if args.profile and PROFILER.enabled:
+        PROFILER.report()
+        PROFILER.write(args.profile, args.profile_format)
+        PROFILER.disable()
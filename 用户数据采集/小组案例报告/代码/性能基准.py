@@ -0,0 +1,312 @@
+"""
+性能基准测试
+用 语料生成 生成的可复现语料，分阶段测量各个分析函数的耗时、吞吐量和峰值内存，
+结果可以保存为基线，之后的运行与基线逐项对比，判断改动是变快还是变慢。
+
+每个阶段默认在独立的子进程中运行 (互不影响缓存和峰值内存)：
+  extract           extract_text_from_docx          (MB/s 按 .docx 文件大小)
+  split             split_sentences
+  sentiment         analyze_sentiment (batch 引擎)
+  sentiment_snownlp analyze_sentiment (SnowNLP 逐句，只取前 --snownlp-limit 句)
+  density           calculate_density (心态演变分析)
+  identity          calculate_identity_density (个人到团队主义演变)
+  volatility        load_data + analyze_file_volatility (MB/s 按得分表大小；CSV / Excel 经由表格缓存)
+  volatility_nocache 同上，但不使用表格缓存，每次直接解析原文件
+  volatility_chunked analyze_file_volatility_chunked
+
+示例:
+  python 性能基准.py --sizes 1k,10k,100k --save-baseline 基线.json
+  python 性能基准.py --sizes 1k,10k,100k --baseline 基线.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing
+
+from 性能剖析 import peak_rss_mb
+from 语料生成 import GENERATOR_VERSION, generate_corpus, parse_size
+
+DEFAULT_CORPUS_DIR = os.path.join('.faker_cache', 'bench')
+
+# 与基线相比，耗时变化超过这个比例才算变快 / 变慢 (小于它视为测量噪声)
+THRESHOLD = 0.10
+
+
+# ==========================================
+# 1. 各阶段：setup 准备输入 (不计时)，run 为被测调用，返回处理的句数
+# ==========================================
+
+def _read_text(corpus):
+    from 情绪稳定性 import extract_text_from_docx
+
+    return extract_text_from_docx(corpus['docx'])
+
+
+def _setup_extract(corpus, options):
+    import 情绪稳定性  # noqa: F401  (导入开销不计入)
+    return corpus['docx']
+
+
+def _run_extract(path):
+    from 情绪稳定性 import extract_text_from_docx
+
+    extract_text_from_docx(path)
+
+
+def _setup_split(corpus, options):
+    return _read_text(corpus)
+
+
+def _run_split(text):
+    from 情绪稳定性 import split_sentences
+
+    return len(split_sentences(text))
+
+
+def _setup_sentiment(corpus, options):
+    import 情绪稳定性
+
+    情绪稳定性.ENGINE = 'batch'
+    情绪稳定性.get_batch_scorer()
+    return _read_text(corpus)
+
+
+def _run_sentiment(text):
+    from 情绪稳定性 import analyze_sentiment
+
+    return len(analyze_sentiment(text, '前期', 'bench'))
+
+
+def _setup_sentiment_snownlp(corpus, options):
+    import 情绪稳定性
+
+    情绪稳定性.ENGINE = 'snownlp'
+    sentences = 情绪稳定性.split_sentences(_read_text(corpus))[:options['snownlp_limit']]
+    return '。'.join(sentences) + '。'
+
+
+def _setup_density(corpus, options):
+    from 分词词典 import get_tokenizer
+
+    get_tokenizer(verbose=False)  # 词典载入属于一次性开销，单独由 分词词典.py 报告
+    return _read_text(corpus)
+
+
+def _run_density(text):
+    from 心态演变分析 import calculate_density
+
+    calculate_density(text)
+
+
+def _run_identity(text):
+    from 个人到团队主义演变 import calculate_identity_density
+
+    calculate_identity_density(text)
+
+
+def _setup_volatility(corpus, options):
+    import 情绪波动
+    from 表格缓存 import TableCache
+
+    情绪波动.INTERACTIVE = False
+    情绪波动.TABLE_CACHE = TableCache()
+    return corpus['scores']
+
+
+def _setup_volatility_nocache(corpus, options):
+    import 情绪波动
+
+    path = _setup_volatility(corpus, options)
+    情绪波动.TABLE_CACHE = None
+    return path
+
+
+def _run_volatility(path):
+    import 情绪波动
+
+    df = 情绪波动.load_data(path)
+    情绪波动.analyze_file_volatility(df, score_col='Sentiment_Score', group_col='Period')
+
+
+def _run_volatility_chunked(path):
+    import 情绪波动
+
+    情绪波动.analyze_file_volatility_chunked(path, score_col='Sentiment_Score', group_col='Period')
+
+
+# 阶段名 -> (setup, run, MB/s 依据的文件)
+STAGES = {
+    'extract': (_setup_extract, _run_extract, 'docx'),
+    'split': (_setup_split, _run_split, None),
+    'sentiment': (_setup_sentiment, _run_sentiment, None),
+    'sentiment_snownlp': (_setup_sentiment_snownlp, _run_sentiment, None),
+    'density': (_setup_density, _run_density, None),
+    'identity': (_setup_density, _run_identity, None),
+    'volatility': (_setup_volatility, _run_volatility, 'scores'),
+    'volatility_nocache': (_setup_volatility_nocache, _run_volatility, 'scores'),
+    'volatility_chunked': (_setup_volatility, _run_volatility_chunked, 'scores'),
+}
+
+
+def run_stage(stage, corpus, options):
+    """在当前进程中运行一个阶段，返回耗时 (取 repeat 次中最快的一次) 与内存"""
+    setup, run, _ = STAGES[stage]
+    arg = setup(corpus, options)
+    rss_before = peak_rss_mb()
+    best = None
+    items = None
+    for _ in range(options['repeat']):
+        start = time.perf_counter()
+        result = run(arg)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        items = result if isinstance(result, int) else items
+    rss_peak = peak_rss_mb()
+    return {'seconds': best, 'items': items, 'peak_rss_mb': rss_peak, 'rss_growth_mb': rss_peak - rss_before}
+
+
+# ==========================================
+# 2. 运行与报告
+# ==========================================
+
+def prepare_corpus(size, seed, folder=DEFAULT_CORPUS_DIR, scores_format='csv'):
+    """生成 (或复用已生成的) 语料，返回各文件路径与大小"""
+    folder = os.path.join(folder, f"v{GENERATOR_VERSION}-seed{seed}")
+    docx_path = os.path.join(folder, f"语料_{size}.docx")
+    scores_path = os.path.join(folder, f"得分_{size}.{scores_format}")
+    if not (os.path.exists(docx_path) and os.path.exists(scores_path)):
+        print(f"正在生成 {size} 句的合成语料...")
+        generate_corpus(folder, size, seed, scores_format)
+    return {
+        'sentences': size,
+        'docx': docx_path,
+        'scores': scores_path,
+        'docx_bytes': os.path.getsize(docx_path),
+        'scores_bytes': os.path.getsize(scores_path),
+    }
+
+
+def benchmark(sizes, stages, seed=0, repeat=1, isolate=True, snownlp_limit=2000, scores_format='csv'):
+    """逐个规模、逐个阶段运行，返回结果列表"""
+    options = {'repeat': repeat, 'snownlp_limit': snownlp_limit}
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for size in sizes:
+        corpus = prepare_corpus(size, seed, scores_format=scores_format)
+        for stage in stages:
+            print(f"  [{size} 句] {stage} ...", end='', flush=True)
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    measured = executor.submit(run_stage, stage, corpus, options).result()
+            else:
+                measured = run_stage(stage, corpus, options)
+
+            items = measured['items'] or size
+            if stage == 'sentiment_snownlp':
+                items = min(items, snownlp_limit)
+            source = STAGES[stage][2]
+            mb = corpus[f'{source}_bytes'] / 1e6 if source else None
+            seconds = max(measured['seconds'], 1e-9)
+            row = {
+                'size': size,
+                'stage': stage,
+                'seconds': measured['seconds'],
+                'sentences_per_s': items / seconds,
+                'mb_per_s': mb / seconds if mb else None,
+                'peak_rss_mb': measured['peak_rss_mb'],
+                'rss_growth_mb': measured['rss_growth_mb'],
+            }
+            results.append(row)
+            print(f" {row['seconds']:.3f}s")
+    return results
+
+
+def print_report(results, baseline=None, threshold=THRESHOLD):
+    """打印结果表；给出基线时附上与基线的耗时比值，返回变慢的项目数"""
+    base = {(r['size'], r['stage']): r for r in (baseline or {}).get('results', [])}
+    print(f"\n{'规模':>8} | {'阶段':<18} | {'耗时(s)':>9} | {'句/秒':>11} | {'MB/秒':>7} | "
+          f"{'峰值内存MB':>10} | {'增长MB':>7} | 与基线相比")
+    print("-" * 110)
+    regressions = 0
+    for r in results:
+        mbps = f"{r['mb_per_s']:.1f}" if r['mb_per_s'] else '-'
+        compare = ''
+        old = base.get((r['size'], r['stage']))
+        if old:
+            ratio = r['seconds'] / max(old['seconds'], 1e-9)
+            if ratio > 1 + threshold:
+                compare = f"⚠️ 变慢 {ratio:.2f}x"
+                regressions += 1
+            elif ratio < 1 - threshold:
+                compare = f"✅ 变快 {1 / ratio:.2f}x"
+            else:
+                compare = f"持平 {ratio:.2f}x"
+        print(f"{r['size']:>8} | {r['stage']:<18} | {r['seconds']:>9.3f} | {r['sentences_per_s']:>11.0f} | "
+              f"{mbps:>7} | {r['peak_rss_mb']:>10.1f} | {r['rss_growth_mb']:>7.1f} | {compare}")
+    return regressions
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'generator_version': GENERATOR_VERSION,
+        'time': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Faker 分析脚本性能基准")
+    parser.add_argument('--sizes', default='1k,10k', help='语料规模 (句)，逗号分隔，如 1k,10k,100k,1m')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"要运行的阶段，可选 {', '.join(STAGES)}")
+    parser.add_argument('--seed', type=int, default=0, help='语料随机种子')
+    parser.add_argument('--repeat', type=int, default=1, help='每个阶段重复次数 (取最快一次)')
+    parser.add_argument('--snownlp-limit', type=int, default=2000, help='SnowNLP 逐句打分阶段最多处理的句数')
+    parser.add_argument('--scores-format', choices=['csv', 'xlsx', 'parquet', 'feather'], default='csv',
+                        help='波动性阶段使用的得分表格式')
+    parser.add_argument('--in-process', action='store_true', help='所有阶段在同一进程内运行 (峰值内存会累积)')
+    parser.add_argument('-o', '--output', help='把本次结果保存为 JSON')
+    parser.add_argument('--save-baseline', metavar='路径', help='把本次结果保存为基线')
+    parser.add_argument('--baseline', metavar='路径', help='与之前保存的基线对比')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='判定变快 / 变慢的耗时变化比例')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有阶段变慢时以非零状态退出')
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"未知阶段: {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print("=== Faker 分析脚本性能基准 ===")
+    results = benchmark(sizes, stages, args.seed, args.repeat, not args.in_process,
+                        args.snownlp_limit, args.scores_format)
+    regressions = print_report(results, baseline, args.threshold)
+
+    report = {'meta': machine_info(), 'results': results}
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"\n结果已保存为: {path}")
+
+    if baseline and baseline.get('meta', {}).get('platform') != report['meta']['platform']:
+        print("\n注意：基线来自不同的机器 / 系统，耗时对比仅供参考。")
+    if regressions:
+        print(f"\n⚠️ 共 {regressions} 项比基线慢 {args.threshold:.0%} 以上")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
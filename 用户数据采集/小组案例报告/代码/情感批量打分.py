@@ -0,0 +1,273 @@
+"""
+批量情感打分引擎 (与 SnowNLP(sent).sentiments 数值等价)
+
+SnowNLP 对每个句子都要新建对象、分词、再逐词查朴素贝叶斯表，
+其中字标注分词 (二阶 HMM 的 Viterbi 解码) 占了 99% 以上的时间。
+这里把两部分模型一次性载入 NumPy 数组：
+  1. 分词：所有句子的汉字片段去重后按长度分桶，整桶一起做向量化 Viterbi，
+     平局时的取舍顺序与 SnowNLP 的实现保持一致，分词结果完全相同
+  2. 打分：词表索引 + 对数概率差向量，整批句子一次稀疏矩阵乘法得到得分
+"""
+import re
+import sys
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+
+# SnowNLP 只对连续汉字片段做字标注分词，其余部分按空白切开
+re_zh = re.compile('([一-龥]+)')
+
+# 每次向量化 Viterbi 同时处理的片段数，限制中间数组的内存
+RUN_CHUNK = 4096
+
+# 字标注状态：b/m/e/s 四种，外加句首 BOS (放在最后，保证平局时优先取真实标签)
+TAGS = ('b', 'm', 'e', 's', 'BOS')
+BOS = 4
+N_TAGS = 5
+
+
+class VectorizedSegmenter:
+    """SnowNLP 字标注分词 (CharacterBasedGenerativeModel) 的批量向量化实现"""
+
+    def __init__(self, model=None):
+        if model is None:
+            from snownlp import seg
+            model = seg.segger.segger
+
+        self.l1, self.l2, self.l3 = model.l1, model.l2, model.l3
+        self.uni_total = model.uni.total
+
+        # 字符编号：0 号留给句首的空字符，未登录字统一映射为 unk
+        chars = sorted({w for w, _ in model.uni.d if w})
+        self.char_index = {c: i + 1 for i, c in enumerate(chars)}
+        self.unk = len(chars) + 1
+        n_states = (self.unk + 1) * N_TAGS
+
+        def state(item):
+            w, t = item
+            return self.char_index[w] * N_TAGS + TAGS.index(t) if w else BOS
+
+        self.n_states = n_states
+        self.uni = np.zeros(n_states, dtype=np.float64)
+        for item, count in model.uni.d.items():
+            self.uni[state(item)] = count
+
+        # 字符是否出现在模型中 (对应 SnowNLP 的 not_found 分支)
+        self.known = np.zeros(self.unk + 1, dtype=bool)
+        self.known[1:self.unk] = True
+
+        bi_keys = np.fromiter((state(a) * n_states + state(b) for a, b in model.bi.d),
+                              dtype=np.int64, count=len(model.bi.d))
+        bi_counts = np.fromiter(model.bi.d.values(), dtype=np.float64, count=len(model.bi.d))
+        order = np.argsort(bi_keys)
+        self.bi_keys, self.bi_counts = bi_keys[order], bi_counts[order]
+
+        tri_keys = np.fromiter(((state(a) * n_states + state(b)) * n_states + state(c)
+                                for a, b, c in model.tri.d),
+                               dtype=np.int64, count=len(model.tri.d))
+        tri_counts = np.fromiter(model.tri.d.values(), dtype=np.float64, count=len(model.tri.d))
+        order = np.argsort(tri_keys)
+        self.tri_keys, self.tri_counts = tri_keys[order], tri_counts[order]
+
+    @staticmethod
+    def _lookup(keys, counts, query):
+        pos = np.searchsorted(keys, query)
+        pos[pos == len(keys)] = 0
+        return np.where(keys[pos] == query, counts[pos], 0.0)
+
+    def _log_prob_tables(self, trigrams):
+        """
+        为每个 (前前字, 前字, 当前字) 计算 5x5x4 的转移对数概率表
+        与 CharacterBasedGenerativeModel.log_prob 的运算顺序一致
+        """
+        tags = np.arange(N_TAGS, dtype=np.int64)
+        c1 = trigrams[:, 0, None, None, None]
+        c2 = trigrams[:, 1, None, None, None]
+        c3 = trigrams[:, 2, None, None, None]
+        s1 = np.where(c1 == 0, BOS, c1 * N_TAGS + tags[:, None, None])
+        s2 = np.where(c2 == 0, BOS, c2 * N_TAGS + tags[None, :, None])
+        s3 = c3 * N_TAGS + tags[None, None, :4]
+        s1, s2, s3 = np.broadcast_arrays(s1, s2, s3)
+
+        uni = self.l1 * (self.uni[s3] / self.uni_total)
+        u2 = self.uni[s2]
+        bi_count = self._lookup(self.bi_keys, self.bi_counts, s2 * self.n_states + s3)
+        b12 = self._lookup(self.bi_keys, self.bi_counts, s1 * self.n_states + s2)
+        tri_count = self._lookup(self.tri_keys, self.tri_counts,
+                                 (s1 * self.n_states + s2) * self.n_states + s3)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bi = np.where(u2 != 0, (self.l2 * bi_count) / u2, 0.0)
+            tri = np.where(b12 != 0, (self.l3 * tri_count) / b12, 0.0)
+            total = uni + bi + tri
+            return np.where(total != 0, np.log(total), -np.inf)
+
+    def tag_runs(self, runs):
+        """对一批连续汉字片段做字标注，返回 {片段: 标签序列}"""
+        result = {}
+        by_length = {}
+        for run in runs:
+            by_length.setdefault(len(run), []).append(run)
+
+        for length, bucket in by_length.items():
+            for start in range(0, len(bucket), RUN_CHUNK):
+                chunk = bucket[start:start + RUN_CHUNK]
+                ids = np.array([[self.char_index.get(ch, self.unk) for ch in run] for run in chunk],
+                               dtype=np.int64)
+                for run, row in zip(chunk, self._viterbi(ids)):
+                    result[run] = row
+        return result
+
+    def _viterbi(self, ids):
+        n_runs, length = ids.shape
+        padded = np.concatenate([np.zeros((n_runs, 2), dtype=np.int64), ids], axis=1)
+        windows = np.stack([padded[:, i:i + 3] for i in range(length)], axis=1).reshape(-1, 3)
+        unique, inverse = np.unique(windows, axis=0, return_inverse=True)
+        tables = self._log_prob_tables(unique)
+        inverse = inverse.reshape(n_runs, length)
+
+        # score[r, a, b]: 以 (前一字标签 a, 当前字标签 b) 结尾的最优路径
+        score = np.full((n_runs, N_TAGS, N_TAGS), -np.inf)
+        score[:, BOS, BOS] = 0.0
+        back = np.empty((n_runs, length, N_TAGS, 4), dtype=np.int8)
+        rows = np.arange(n_runs)
+
+        for i in range(length):
+            cand = score[:, :, :, None] + tables[inverse[:, i]]
+            best = cand.argmax(axis=1)
+            new = np.take_along_axis(cand, best[:, None], axis=1)[:, 0]
+
+            # 未登录字：不计概率，沿用最后一个前驱 (SnowNLP 中后写入者覆盖)
+            unknown = ~self.known[ids[:, i]]
+            if unknown.any():
+                last = BOS if i < 2 else 3
+                best[unknown] = last
+                new[unknown] = score[unknown, last, :, None]
+
+            back[:, i] = best
+            score = np.full((n_runs, N_TAGS, N_TAGS), -np.inf)
+            score[:, :, :4] = new
+
+        # 终点：SnowNLP 按 (当前标签, 前一标签) 的插入顺序取第一个最大值
+        flat = score[:, :, :4].transpose(0, 2, 1).reshape(n_runs, -1).argmax(axis=1)
+        cur, prev = flat // N_TAGS, flat % N_TAGS
+        tags = np.empty((n_runs, length), dtype=np.int8)
+        for i in range(length - 1, -1, -1):
+            tags[:, i] = cur
+            cur, prev = prev, back[rows, i, prev, cur]
+        return [[TAGS[t] for t in row] for row in tags]
+
+    @staticmethod
+    def words_from_tags(run, tags):
+        """把标签序列还原为词 (同 snownlp.seg.seg.Seg.seg)"""
+        words = []
+        tmp = ''
+        for ch, t in zip(run, tags):
+            if t == 'e':
+                words.append(tmp + ch)
+                tmp = ''
+            elif t == 'b' or t == 's':
+                if tmp:
+                    words.append(tmp)
+                tmp = ch
+            else:
+                tmp += ch
+        if tmp:
+            words.append(tmp)
+        return words
+
+    def seg_many(self, sentences):
+        """批量分词，结果与 snownlp.seg.seg 逐句调用相同"""
+        pieces = [re_zh.split(sent) for sent in sentences]
+        runs = {s.strip() for parts in pieces for s in parts if s.strip() and re_zh.match(s.strip())}
+        tagged = self.tag_runs(runs)
+
+        results = []
+        for parts in pieces:
+            words = []
+            for s in parts:
+                s = s.strip()
+                if not s:
+                    continue
+                if re_zh.match(s):
+                    words += self.words_from_tags(s, tagged[s])
+                else:
+                    words += [word.strip() for word in s.split() if word.strip()]
+            results.append(words)
+        return results
+
+
+class BatchSentimentScorer:
+    """
+    批量情感打分：返回 (sentiments - 0.5) * 2，与 情绪稳定性.score_sentence 等价
+    用法:
+        scorer = BatchSentimentScorer()
+        scores = scorer.score(sentences)   # np.ndarray
+    """
+
+    def __init__(self):
+        from snownlp import normal, sentiment
+
+        self.stop = normal.stop
+        self.segmenter = VectorizedSegmenter()
+
+        # 朴素贝叶斯：logit(P(pos)) = 先验差 + Σ 每个词的对数概率差
+        bayes = sentiment.classifier.classifier
+        pos, neg = bayes.d['pos'], bayes.d['neg']
+        words = sorted(set(pos.d) | set(neg.d))
+        self.vocab = {w: i for i, w in enumerate(words)}
+        pos_counts = np.array([pos.d.get(w, pos.none) for w in words], dtype=np.float64)
+        neg_counts = np.array([neg.d.get(w, neg.none) for w in words], dtype=np.float64)
+
+        # 最后一列对应未登录词 (两类都按 none=1 计数)
+        self.oov = len(words)
+        self.weights = np.append(
+            (np.log(pos_counts) - np.log(pos.total)) - (np.log(neg_counts) - np.log(neg.total)),
+            (np.log(pos.none) - np.log(pos.total)) - (np.log(neg.none) - np.log(neg.total)))
+        self.prior = (np.log(pos.getsum()) - np.log(bayes.total)) - (np.log(neg.getsum()) - np.log(bayes.total))
+
+    def tokenize_many(self, sentences):
+        """分词并过滤停用词 (同 snownlp.sentiment.Sentiment.handle)"""
+        return [[w for w in words if w not in self.stop] for words in self.segmenter.seg_many(sentences)]
+
+    def score(self, sentences):
+        """对一批句子打分，返回映射到 -1 到 1 的得分数组"""
+        if len(sentences) == 0:
+            return np.zeros(0)
+        docs = self.tokenize_many(sentences)
+        lengths = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+        cols = np.fromiter((self.vocab.get(w, self.oov) for d in docs for w in d),
+                           dtype=np.int64, count=int(lengths.sum()))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        counts = sparse.csr_matrix((np.ones(len(cols)), cols, indptr),
+                                   shape=(len(docs), len(self.weights)))
+
+        logits = self.prior + counts @ self.weights
+        scores = (expit(logits) - 0.5) * 2
+        # 空句在 SnowNLP 中会抛异常，情绪稳定性.score_sentence 将其记为 0 分
+        scores[[not sent for sent in sentences]] = 0.0
+        return scores
+
+
+def verify(sentences, tolerance=1e-9):
+    """与逐句 SnowNLP 结果对比，返回最大误差 (用于升级 SnowNLP 后自检)"""
+    from snownlp import SnowNLP
+
+    expected = np.array([(SnowNLP(sent).sentiments - 0.5) * 2 if sent else 0.0 for sent in sentences])
+    actual = BatchSentimentScorer().score(sentences)
+    max_error = float(np.max(np.abs(expected - actual))) if len(sentences) else 0.0
+    return max_error, max_error <= tolerance
+
+
+if __name__ == "__main__":
+    # 自检: python 情感批量打分.py 结果.xlsx  (读取其中的 Sentence 列)
+    import pandas as pd
+
+    if len(sys.argv) < 2:
+        print("用法: python 情感批量打分.py <包含 Sentence 列的 xlsx/csv>")
+        sys.exit(2)
+    path = sys.argv[1]
+    df = pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path)
+    error, ok = verify(df['Sentence'].dropna().astype(str).tolist())
+    print(f"最大误差: {error:.3e} -> {'✅ 一致' if ok else '❌ 不一致'}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,145 @@
+"""
+SnowNLP 情感得分的持久化缓存 (SQLite)
+键 = sha1(打分器版本 + 清洗后的句子)，模型或映射方式变化时旧条目自动失效
+超过容量上限时按最近使用时间 (LRU) 淘汰
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join('.faker_cache', 'sentiment.sqlite')
+
+# 得分映射方式：(s.sentiments - 0.5) * 2，修改映射时需同步修改此标记
+SCORER_TAG = 'snownlp-sentiments-v1'
+
+# SQLite 单条语句的参数个数有上限，分批查询
+_BATCH = 500
+
+
+def snownlp_model_version():
+    """根据 SnowNLP 情感模型文件内容生成版本号 (重新训练模型后自动变化)"""
+    from snownlp import sentiment
+
+    digest = hashlib.sha1(SCORER_TAG.encode('utf-8'))
+    for path in (sentiment.data_path, sentiment.data_path + '.3'):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class SentimentCache:
+    """
+    句子 -> 情感得分 的磁盘缓存
+    用法:
+        with SentimentCache(version=snownlp_model_version()) as cache:
+            cached = cache.get_many(sentences)
+            cache.put_many({sent: score, ...})
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, version='', max_entries=2_000_000):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS scores ('
+            ' key BLOB PRIMARY KEY, score REAL NOT NULL, last_used REAL NOT NULL'
+            ') WITHOUT ROWID')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_last_used ON scores (last_used)')
+        self.conn.commit()
+        # 条目数的运行计数：写入、淘汰时增减，避免每次写入都 COUNT(*) 全表
+        self.count = len(self)
+
+    def _key(self, sentence):
+        return hashlib.sha1(f"{self.version}\0{sentence}".encode('utf-8')).digest()
+
+    def get_many(self, sentences):
+        """查询一批句子，返回 {句子: 得分} (只含命中的句子)"""
+        keys = {}
+        for sent in sentences:
+            keys.setdefault(self._key(sent), sent)
+
+        found = {}
+        key_list = list(keys)
+        for i in range(0, len(key_list), _BATCH):
+            batch = key_list[i:i + _BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f'SELECT key, score FROM scores WHERE key IN ({placeholders})', batch)
+            for key, score in rows:
+                found[keys[key]] = score
+
+        # 刷新命中条目的使用时间，供 LRU 淘汰
+        if found:
+            now = time.time()
+            self.conn.executemany('UPDATE scores SET last_used = ? WHERE key = ?',
+                                  ((now, self._key(sent)) for sent in found))
+            self.conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, scores):
+        """写入 {句子: 得分}，超过容量时淘汰最久未使用的条目"""
+        if not scores:
+            return
+        now = time.time()
+        rows = [(self._key(sent), score, now) for sent, score in scores.items()]
+        inserted = self.conn.executemany(
+            'INSERT OR IGNORE INTO scores (key, score, last_used) VALUES (?, ?, ?)', rows).rowcount
+        if inserted < len(rows):
+            # 被忽略的是已有的条目 (如其他进程刚写入)：只对这些条目覆盖得分并刷新使用时间。
+            # 刚插入的条目 last_used 为 now，更早的即已有条目；写事务仍未提交，其他进程插不进来
+            scores = {key: score for key, score, _ in rows}
+            existing = []
+            key_list = list(scores)
+            for i in range(0, len(key_list), _BATCH):
+                batch = key_list[i:i + _BATCH]
+                placeholders = ','.join('?' * len(batch))
+                existing.extend(key for key, in self.conn.execute(
+                    f'SELECT key FROM scores WHERE key IN ({placeholders}) AND last_used < ?', batch + [now]))
+            self.conn.executemany('UPDATE scores SET score = ?, last_used = ? WHERE key = ?',
+                                  ((scores[key], now, key) for key in existing))
+        self.count += inserted
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        if self.count <= self.max_entries:
+            return
+        # 运行计数超限时才精确计数 (同时纠正其他进程写入造成的偏差)
+        self.count = len(self)
+        excess = self.count - self.max_entries
+        if excess > 0:
+            self.count -= self.conn.execute(
+                'DELETE FROM scores WHERE key IN '
+                '(SELECT key FROM scores ORDER BY last_used LIMIT ?)', (excess,)).rowcount
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def summary(self):
+        """命中率统计文本"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"缓存命中 {self.hits} / 未命中 {self.misses} (命中率 {rate:.1f}%)，共 {len(self)} 条"
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,215 +1,764 @@
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-import platform
-import tkinter as tk
-from tkinter import filedialog, simpledialog, messagebox
-import os
-
-# ==========================================
-# 1. 配置与中文字体
-# ==========================================
-system_name = platform.system()
-if system_name == "Windows":
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
-elif system_name == "Darwin":  # MacOS
-    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
-else:
-    plt.rcParams['font.sans-serif'] = ['sans-serif']
-
-plt.rcParams['axes.unicode_minus'] = False
-
-
-# ==========================================
-# 2. 核心分析逻辑
-# ==========================================
-
-def load_data(filepath):
-    """读取 CSV 或 Excel 文件"""
-    if not filepath:
-        return None
-
-    try:
-        if filepath.endswith('.csv'):
-            # 尝试不同的编码读取 CSV
-            try:
-                df = pd.read_csv(filepath, encoding='utf-8')
-            except UnicodeDecodeError:
-                df = pd.read_csv(filepath, encoding='gbk')
-        elif filepath.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(filepath)
-        else:
-            messagebox.showerror("错误", "不支持的文件格式。请选择 CSV 或 Excel 文件。")
-            return None
-        return df
-    except Exception as e:
-        messagebox.showerror("读取失败", f"无法读取文件：{e}")
-        return None
-
-
-def analyze_file_volatility(df):
-    """
-    分析数据框中的情感波动性
-    """
-    # 1. 寻找分数列
-    score_col = None
-    possible_cols = ['Sentiment_Score', 'Score', 'Sentiment', '得分', '情感得分', '分数']
-
-    for col in possible_cols:
-        if col in df.columns:
-            score_col = col
-            break
-
-    if not score_col:
-        # 如果没找到，让用户输入
-        score_col = simpledialog.askstring("列名确认",
-                                           f"未找到默认得分列。\n现有列名：{list(df.columns)}\n请输入包含情感得分的列名：")
-        if not score_col or score_col not in df.columns:
-            messagebox.showerror("错误", "无效的列名，无法分析。")
-            return None, None, None
-
-    # 2. 寻找分组列 (例如年份或时期)
-    group_col = None
-    possible_group_cols = ['Year', 'Period', 'Stage', 'Event', '时期', '年份', '阶段']
-
-    for col in possible_group_cols:
-        if col in df.columns:
-            group_col = col
-            break
-
-    if not group_col:
-        group_col = simpledialog.askstring("列名确认",
-                                           f"未找到默认分组列(如Year/Period)。\n现有列名：{list(df.columns)}\n请输入用于分组(前期/中期/后期)的列名：")
-        if not group_col or group_col not in df.columns:
-            # 如果用户不输入分组，就当做整体分析
-            print("未指定分组，将视为单组数据分析。")
-            group_col = None
-
-    # 3. 开始分析
-    results = {}
-    raw_scores = {}
-
-    if group_col:
-        # 按组分析
-        groups = df[group_col].unique()
-        # 尝试排序 (如果组名包含年份)
-        try:
-            groups = sorted(groups)
-        except:
-            pass
-
-        for group in groups:
-            group_data = df[df[group_col] == group][score_col].dropna()
-            if len(group_data) > 0:
-                raw_scores[str(group)] = group_data.values
-                results[str(group)] = np.std(group_data.values)
-    else:
-        # 整体分析
-        data = df[score_col].dropna()
-        if len(data) > 0:
-            raw_scores["All Data"] = data.values
-            results["All Data"] = np.std(data.values)
-
-    return results, raw_scores, score_col
-
-
-def main():
-    root = tk.Tk()
-    root.withdraw()  # 隐藏主窗口
-
-    print("=== Faker 情感波动性分析工具 (自定义文件版) ===")
-    print("请选择包含情感得分的 CSV 或 Excel 文件...")
-
-    # 1. 选择文件
-    file_path = filedialog.askopenfilename(
-        title="选择情感分析结果文件",
-        filetypes=[("Data Files", "*.csv *.xlsx *.xls")]
-    )
-
-    if not file_path:
-        print("未选择文件，程序退出。")
-        return
-
-    print(f"正在读取: {os.path.basename(file_path)}...")
-    df = load_data(file_path)
-
-    if df is None:
-        return
-
-    # 2. 分析数据
-    volatilities, all_scores_dict, score_col_name = analyze_file_volatility(df)
-
-    if not volatilities:
-        print("分析失败，没有有效数据。")
-        return
-
-    # 准备绘图数据
-    labels = list(volatilities.keys())
-    vol_values = list(volatilities.values())
-    score_distributions = list(all_scores_dict.values())
-
-    print(f"\n📊 分析结果 (基于列: {score_col_name}):")
-    print(f"{'分组':<15} | {'波动性 (标准差)':<15} | {'心理状态评价'}")
-    print("-" * 60)
-
-    for label, vol in volatilities.items():
-        if vol > 0.5:
-            status = "极度不稳定 (High)"  # 假设得分是 -1到1 或类似的小数
-        elif vol > 15:
-            status = "极度不稳定 (High)"  # 假设得分是 0-100
-        elif vol > 10:
-            status = "波动较大 (Moderate)"
-        else:
-            status = "相对稳定 (Stable)"
-        print(f"{label:<15} | {vol:<15.4f} | {status}")
-
-    # ==========================================
-    # 3. 可视化
-    # ==========================================
-    plt.figure(figsize=(12, 8))
-
-    # --- 子图 1: 箱线图 ---
-    plt.subplot(2, 1, 1)
-    box = plt.boxplot(score_distributions, labels=labels, patch_artist=True, vert=False)
-
-    # 自动生成颜色
-    colors = plt.cm.Set3(np.linspace(0, 1, len(labels)))
-    for patch, color in zip(box['boxes'], colors):
-        patch.set_facecolor(color)
-        patch.set_alpha(0.7)
-
-    plt.title(f'各时期情感得分分布 (列: {score_col_name})', fontsize=14)
-    plt.xlabel('情感得分 (Score)', fontsize=12)
-    plt.grid(axis='x', linestyle='--', alpha=0.3)
-
-    # --- 子图 2: 波动性趋势 ---
-    plt.subplot(2, 1, 2)
-    x = np.arange(len(labels))
-    plt.plot(x, vol_values, marker='o', markersize=10, linewidth=3, color='#FF5733', linestyle='-')
-    plt.fill_between(x, vol_values, color='#FF5733', alpha=0.1)
-
-    plt.title('心理波动性 (标准差) 演变趋势', fontsize=14)
-    plt.ylabel('标准差 (Standard Deviation)', fontsize=12)
-    plt.xticks(x, labels, fontsize=12)
-    plt.grid(axis='y', linestyle='--', alpha=0.3)
-
-    # 尝试自动标注最大最小值
-    max_idx = np.argmax(vol_values)
-    min_idx = np.argmin(vol_values)
-
-    plt.annotate('波动最大', xy=(max_idx, vol_values[max_idx]),
-                 xytext=(max_idx, vol_values[max_idx] * 1.1),
-                 ha='center', color='#d62728', fontweight='bold',
-                 arrowprops=dict(arrowstyle='->', color='#d62728'))
-
-    plt.annotate('最稳定', xy=(min_idx, vol_values[min_idx]),
-                 xytext=(min_idx, vol_values[min_idx] * 1.1),
-                 ha='center', color='#2ca02c', fontweight='bold',
-                 arrowprops=dict(arrowstyle='->', color='#2ca02c'))
-
-    plt.tight_layout()
-    plt.show()
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import platform
+import os
+import sys
+import csv
+import argparse
+
+try:
+    import tkinter as tk
+    from tkinter import filedialog, simpledialog, messagebox
+except ImportError:  # 无界面服务器可能没有 Tk，批处理模式不依赖它
+    tk = None
+
+from 命令行工具 import expand_paths
+from 在线统计 import GroupStats
+from 结果输出 import open_writer
+from 表格缓存 import CACHED_EXTS, DEFAULT_TABLE_DIR, TableCache, csv_encodings, detect_encoding
+from 显著性检验 import bootstrap_ci, compare, describe_comparison
+from 图表渲染 import ReusableFigure, add_format_argument, renderer, save_figure, use_headless
+from 性能剖析 import PROFILER, add_profile_arguments, finish_profiling, start_profiling
+
+# ==========================================
+# 1. 配置与中文字体
+# ==========================================
+system_name = platform.system()
+if system_name == "Windows":
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
+elif system_name == "Darwin":  # MacOS
+    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
+else:
+    plt.rcParams['font.sans-serif'] = ['sans-serif']
+
+plt.rcParams['axes.unicode_minus'] = False
+
+# 批处理模式下置为 False：错误只打印，不弹窗
+INTERACTIVE = True
+
+# 分块读取时每块的行数，以及箱线图默认保留的每组样本数
+CHUNK_ROWS = 200_000
+SAMPLE_SIZE = 10_000
+
+# 滚动波动性：窗口大小与步长 (单位：句)；自动识别的来源列
+ROLLING_WINDOW = 50
+ROLLING_STEP = 10
+SOURCE_COLS = ['Source', '来源', '文件', 'Event']
+
+# 自动识别的得分列与分组列 (按优先顺序)
+SCORE_COLS = ['Sentiment_Score', 'Score', 'Sentiment', '得分', '情感得分', '分数']
+GROUP_COLS = ['Year', 'Period', 'Stage', 'Event', '时期', '年份', '阶段']
+
+# CSV / Excel 的列式旁路缓存 (见 表格缓存)，由 batch_main / gui_main 创建；
+# 作为模块导入时默认为 None，不读写 .faker_cache/。批处理模式下可用 --no-table-cache 关闭
+TABLE_CACHE = None
+
+
+def report_error(title, message):
+    """交互模式弹窗提示，批处理模式直接打印"""
+    if INTERACTIVE:
+        messagebox.showerror(title, message)
+    else:
+        print(f"❌ {title}: {message}")
+
+
+# ==========================================
+# 2. 核心分析逻辑
+# ==========================================
+
+def load_data(filepath, columns=None):
+    """
+    读取 CSV / Excel / Parquet / Feather 文件；columns 给出时只读取这些列
+    CSV / Excel 经由列式旁路缓存 (TABLE_CACHE)，第二次读取起只是内存映射
+    """
+    if not filepath:
+        return None
+
+    try:
+        if filepath.endswith(CACHED_EXTS):
+            if TABLE_CACHE is not None:
+                df = TABLE_CACHE.load(filepath, columns)
+            elif filepath.endswith('.csv'):
+                # 编码按开头的样本检测一次 (见 表格缓存.detect_encoding)
+                df = pd.read_csv(filepath, encoding=detect_encoding(filepath), usecols=columns)
+            else:
+                df = pd.read_excel(filepath, usecols=columns)
+        elif filepath.endswith('.parquet'):
+            df = pd.read_parquet(filepath, columns=columns)
+        elif filepath.endswith(('.feather', '.arrow')):
+            df = pd.read_feather(filepath, columns=columns)
+        else:
+            report_error("错误", "不支持的文件格式。请选择 CSV、Excel、Parquet 或 Feather 文件。")
+            return None
+        return df
+    except Exception as e:
+        report_error("读取失败", f"无法读取文件：{e}")
+        return None
+
+
+def read_columns(filepath, encoding=None):
+    """只读取表头 (列名列表)，不载入数据；CSV 未指定编码时按样本检测"""
+    if TABLE_CACHE is not None and filepath.endswith(CACHED_EXTS):
+        columns = TABLE_CACHE.columns(filepath)
+        if columns is not None:
+            return columns
+    if filepath.endswith('.csv'):
+        encoding = encoding or detect_encoding(filepath)
+        return list(pd.read_csv(filepath, encoding=encoding, nrows=0).columns)
+    if filepath.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(filepath, read_only=True)
+        try:
+            header = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            wb.close()
+        return [c for c in header if c is not None]
+    if filepath.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(filepath).schema_arrow.names
+    if filepath.endswith(('.feather', '.arrow')):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        return ipc.open_file(pa.memory_map(filepath, 'r')).schema.names
+    return list(pd.read_excel(filepath, nrows=0).columns)
+
+
+def iter_chunks(filepath, columns, chunk_rows=CHUNK_ROWS, encoding='utf-8'):
+    """
+    按块读取指定的列，每块为一个 DataFrame，内存占用只与块大小有关
+    .xls 无法流式读取，整表作为一块
+    """
+    if filepath.endswith('.csv'):
+        yield from pd.read_csv(filepath, encoding=encoding, usecols=columns, chunksize=chunk_rows)
+    elif filepath.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(filepath, read_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = list(next(rows, ()))
+            index = [header.index(c) for c in columns]
+            block = []
+            for row in rows:
+                block.append([row[i] if i < len(row) else None for i in index])
+                if len(block) >= chunk_rows:
+                    yield pd.DataFrame(block, columns=columns)
+                    block = []
+            if block:
+                yield pd.DataFrame(block, columns=columns)
+        finally:
+            wb.close()
+    elif filepath.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    elif filepath.endswith(('.feather', '.arrow')):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        # 内存映射读取，只有用到的列会被真正读入
+        reader = ipc.open_file(pa.memory_map(filepath, 'r'))
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).select(columns).to_pandas()
+    else:
+        yield pd.read_excel(filepath, usecols=columns)
+
+
+def resolve_columns(columns, score_col=None, group_col=None):
+    """
+    确定得分列与分组列 (显式指定优先，否则按常见列名自动识别，交互模式下询问用户)
+    返回 (score_col, group_col)；score_col 为 None 表示失败，group_col 为 None 表示不分组
+    """
+    columns = list(columns)
+
+    # 1. 寻找分数列
+    if score_col and score_col not in columns:
+        report_error("错误", f"得分列不存在: {score_col}")
+        return None, None
+
+    if not score_col:
+        for col in SCORE_COLS:
+            if col in columns:
+                score_col = col
+                break
+
+    if not score_col and not INTERACTIVE:
+        report_error("错误", f"未找到默认得分列，请用 --score-col 指定。现有列名：{columns}")
+        return None, None
+
+    if not score_col:
+        # 如果没找到，让用户输入
+        score_col = simpledialog.askstring("列名确认",
+                                           f"未找到默认得分列。\n现有列名：{columns}\n请输入包含情感得分的列名：")
+        if not score_col or score_col not in columns:
+            messagebox.showerror("错误", "无效的列名，无法分析。")
+            return None, None
+
+    # 2. 寻找分组列 (例如年份或时期)
+    if group_col and group_col not in columns:
+        report_error("错误", f"分组列不存在: {group_col}")
+        return None, None
+
+    if not group_col:
+        for col in GROUP_COLS:
+            if col in columns:
+                group_col = col
+                break
+
+    if not group_col and not INTERACTIVE:
+        print("未找到分组列，将视为单组数据分析。")
+    elif not group_col:
+        group_col = simpledialog.askstring("列名确认",
+                                           f"未找到默认分组列(如Year/Period)。\n现有列名：{columns}\n请输入用于分组(前期/中期/后期)的列名：")
+        if not group_col or group_col not in columns:
+            # 如果用户不输入分组，就当做整体分析
+            print("未指定分组，将视为单组数据分析。")
+            group_col = None
+
+    return score_col, group_col
+
+
+def analysis_columns(columns, score_col=None, group_col=None):
+    """
+    分析会用到的列 (显式指定的列，以及可能被自动识别的得分列 / 分组列)，用于只读取这几列
+    没有任何可识别的得分列时返回 None (读取整表，交给 resolve_columns 报错或询问)
+    """
+    wanted = [c for c in columns if c in (score_col, group_col) or c in SCORE_COLS or c in GROUP_COLS]
+    if score_col and score_col not in wanted or not any(c in SCORE_COLS or c == score_col for c in wanted):
+        return None
+    return wanted
+
+
+def analyze_file_volatility(df, score_col=None, group_col=None):
+    """
+    分析数据框中的情感波动性
+    score_col / group_col: 显式指定列名 (批处理模式)，为空时自动识别
+    """
+    score_col, group_col = resolve_columns(df.columns, score_col, group_col)
+    if not score_col:
+        return None, None, None
+
+    # 3. 开始分析
+    results = {}
+    raw_scores = {}
+
+    if group_col:
+        # 按组分析：一次 groupby 拆分，不再为每个组扫描一遍整列
+        grouped = dict(tuple(df.groupby(group_col, sort=False, observed=True)[score_col]))
+        groups = list(grouped)
+        # 尝试排序 (如果组名包含年份)
+        try:
+            groups = sorted(groups)
+        except:
+            pass
+
+        for group in groups:
+            group_data = grouped[group].dropna()
+            if len(group_data) > 0:
+                raw_scores[str(group)] = group_data.values
+                results[str(group)] = np.std(group_data.values)
+    else:
+        # 整体分析
+        data = df[score_col].dropna()
+        if len(data) > 0:
+            raw_scores["All Data"] = data.values
+            results["All Data"] = np.std(data.values)
+
+    return results, raw_scores, score_col
+
+
+def _sort_groups(keys):
+    """分组键统一为字符串；全部是数字时按数值排序，否则按字符串排序"""
+    try:
+        return sorted(keys, key=float)
+    except ValueError:
+        return sorted(keys)
+
+
+def analyze_file_volatility_chunked(filepath, score_col=None, group_col=None, chunk_rows=CHUNK_ROWS,
+                                    keep_scores='sample', sample_size=SAMPLE_SIZE):
+    """
+    分块、一遍扫描的波动性分析，适用于内存放不下的大型得分文件
+    每组用可合并的在线统计量 (见 在线统计.GroupStats) 累计 count/mean/std，结果与 np.std 相同
+    keep_scores: 'all' 保留全部得分；'sample' 每组保留 sample_size 个随机样本 (箱线图用)；
+                 'none' 不保留，只输出标准差
+    返回值与 analyze_file_volatility 相同
+    """
+    # 已有列式旁路文件时直接分块读取它 (不在这里转换：整表转换需要一次载入全部数据)
+    sidecar = TABLE_CACHE.existing(filepath) if TABLE_CACHE is not None and filepath.endswith(CACHED_EXTS) else None
+    if sidecar is not None:
+        filepath = sidecar
+    # CSV 编码按样本检测 (见 表格缓存.csv_encodings)，只有样本之后才出现无法解码的内容时才改用 GBK 重读
+    encodings = csv_encodings(filepath) if filepath.endswith('.csv') else (None,)
+    groups = None
+    for encoding in encodings:
+        try:
+            columns = read_columns(filepath, encoding)
+            score_col, group_col = resolve_columns(columns, score_col, group_col)
+            if not score_col:
+                return None, None, None
+
+            groups = GroupStats(sample_size=sample_size if keep_scores == 'sample' else 0,
+                                keep_all=keep_scores == 'all')
+            usecols = [score_col] + ([group_col] if group_col else [])
+            for chunk in PROFILER.iterate('分块读取', iter_chunks(filepath, usecols, chunk_rows, encoding)):
+                scores = pd.to_numeric(chunk[score_col], errors='coerce').to_numpy(dtype=float)
+                if group_col:
+                    # 先 factorize，再只把少量不同的键转换为字符串 (空值的编码为 -1，丢弃)
+                    codes, uniques = pd.factorize(chunk[group_col])
+                    valid = codes >= 0
+                    groups.update_codes(codes[valid], [str(u) for u in uniques], scores[valid])
+                else:
+                    groups.update(np.full(len(scores), "All Data", dtype=object), scores)
+            break
+        except UnicodeDecodeError:
+            groups = None
+        except Exception as e:
+            report_error("读取失败", f"无法读取文件：{e}")
+            return None, None, None
+    if groups is None:
+        report_error("读取失败", "无法识别文件编码 (已尝试 UTF-8 / GBK)")
+        return None, None, None
+
+    results = {}
+    raw_scores = {}
+    for key in _sort_groups(list(groups.groups)):
+        stats = groups.groups[key]
+        if stats.count > 0:
+            results[key] = stats.std()
+            if keep_scores != 'none':
+                raw_scores[key] = stats.sample
+    return results, raw_scores, score_col
+
+
+def rolling_volatility(scores, sources=None, window=ROLLING_WINDOW, step=ROLLING_STEP):
+    """
+    按句子顺序计算每个来源内部的滚动均值 / 标准差 (窗口不跨来源)，所有来源一次完成
+    scores : 按原文顺序排列的得分
+    sources: 每句所属的来源 (如 Source 列)；为空时整列视为一个来源
+    句数不足一个窗口的来源只输出一个覆盖全部句子的窗口
+    返回 DataFrame：Source / Start (窗口在该来源内的起始句号) / Size / Mean / Std (ddof=0，同 np.std)
+    """
+    scores = np.asarray(scores, dtype=float)
+    if sources is None:
+        sources = np.zeros(len(scores), dtype=np.int8)
+    if not isinstance(sources, pd.Series):
+        sources = np.asarray(sources)
+    valid = ~np.isnan(scores)
+    # Series (尤其是 category 列) 直接 factorize，避免先转成对象数组
+    codes, uniques = pd.factorize(sources[valid])
+    scores = scores[valid]
+    keep = codes >= 0
+    codes, scores = codes[keep], scores[keep]
+    if len(scores) == 0:
+        return pd.DataFrame(columns=['Source', 'Start', 'Size', 'Mean', 'Std'])
+
+    # 把同一来源的句子排在一起 (稳定排序，保持原顺序)；结果文件通常已按来源连续排列，此时无需排序
+    if np.any(codes[1:] < codes[:-1]):
+        order = np.argsort(codes, kind='stable')
+        codes, scores = codes[order], scores[order]
+    lengths = np.bincount(codes, minlength=len(uniques))
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    # 先减去各来源的均值再做前缀和，避免 E[x²]-E[x]² 的大数相消
+    centered = scores - (np.bincount(codes, weights=scores) / np.maximum(lengths, 1))[codes]
+    s1 = np.concatenate([[0.0], np.cumsum(centered)])
+    s2 = np.concatenate([[0.0], np.cumsum(centered * centered)])
+
+    # 每个来源的窗口数与窗口宽度，展开为所有窗口的全局起点 (不使用 Python 循环)
+    counts = np.where(lengths >= window, (lengths - window) // step + 1, (lengths > 0).astype(int))
+    sizes = np.where(lengths >= window, window, lengths)
+    owner = np.repeat(np.arange(len(lengths)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    start = offsets[owner] + local * step
+    size = sizes[owner]
+
+    mean_c = (s1[start + size] - s1[start]) / size
+    var = np.maximum((s2[start + size] - s2[start]) / size - mean_c * mean_c, 0.0)
+    source_mean = (np.bincount(codes, weights=scores) / np.maximum(lengths, 1))[owner]
+
+    return pd.DataFrame({
+        'Source': pd.Categorical.from_codes(owner, categories=pd.Index(uniques).astype(str)),
+        'Start': local * step,
+        'Size': size,
+        'Mean': mean_c + source_mean,
+        'Std': np.sqrt(var),
+    })
+
+
+def resolve_source_col(columns, source_col=None):
+    """来源列：显式指定优先，否则按常见列名识别，找不到时返回 None (整列视为一个来源)"""
+    if source_col:
+        return source_col if source_col in columns else None
+    return next((c for c in SOURCE_COLS if c in columns), None)
+
+
+def describe_volatility(vol):
+    """根据标准差给出心理状态评价"""
+    if vol > 0.5:
+        return "极度不稳定 (High)"  # 假设得分是 -1到1 或类似的小数
+    elif vol > 15:
+        return "极度不稳定 (High)"  # 假设得分是 0-100
+    elif vol > 10:
+        return "波动较大 (Moderate)"
+    else:
+        return "相对稳定 (Stable)"
+
+
+def test_volatility(all_scores_dict, n_resamples=10_000, workers=1):
+    """
+    用重抽样代替固定阈值判断波动差异：
+    每组标准差的 bootstrap 95% 置信区间，以及相邻两组标准差差异的置换检验
+    返回 ({组: {'estimate','low','high'}}, [(组a, 组b, 检验结果), ...])
+    """
+    intervals = {label: bootstrap_ci(scores, stat='std', ddof=0, n_resamples=n_resamples, workers=workers)
+                 for label, scores in all_scores_dict.items() if len(scores) > 1}
+    labels = list(intervals)
+    comparisons = [(a, b, compare(all_scores_dict[a], all_scores_dict[b], stat='std', ddof=0,
+                                  n_resamples=n_resamples, workers=workers))
+                   for a, b in zip(labels, labels[1:])]
+    return intervals, comparisons
+
+
+def print_significance(intervals, comparisons):
+    print(f"\n🔬 显著性检验 (bootstrap 置信区间 / 置换检验):")
+    for label, ci in intervals.items():
+        print(f"{label:<15} | 标准差 {ci['estimate']:.4f}  95% CI [{ci['low']:.4f}, {ci['high']:.4f}]")
+    for a, b, result in comparisons:
+        print(describe_comparison(result, a, b, stat='std'))
+
+
+def print_results(volatilities, score_col_name):
+    print(f"\n📊 分析结果 (基于列: {score_col_name}):")
+    print(f"{'分组':<15} | {'波动性 (标准差)':<15} | {'心理状态评价'}")
+    print("-" * 60)
+
+    for label, vol in volatilities.items():
+        print(f"{label:<15} | {vol:<15.4f} | {describe_volatility(vol)}")
+
+
+# ==========================================
+# 3. 可视化
+# ==========================================
+
+class VolatilityFigure(ReusableFigure):
+    """
+    箱线图 + 波动性趋势图
+    箱线图的图元随数据整体变化，每次在原坐标轴上重画；趋势线和标注只更新数据
+    """
+
+    def layout_key(self, volatilities, all_scores_dict, score_col_name):
+        labels = tuple(volatilities)
+        return labels, all(label in all_scores_dict for label in labels), score_col_name
+
+    def build(self, volatilities, all_scores_dict, score_col_name):
+        labels, with_box, _ = self.layout_key(volatilities, all_scores_dict, score_col_name)
+        self.fig = plt.figure(figsize=(12, 8 if with_box else 4))
+
+        # --- 子图 1: 箱线图 (在 update 中绘制) ---
+        self.box_ax = self.fig.add_subplot(2, 1, 1) if with_box else None
+
+        # --- 子图 2: 波动性趋势 ---
+        ax = self.ax = self.fig.add_subplot(2, 1, 2) if with_box else self.fig.gca()
+        x = self.x = np.arange(len(labels))
+        self.line, = ax.plot(x, [0] * len(x), marker='o', markersize=10, linewidth=3, color='#FF5733', linestyle='-')
+        self.fill = None
+
+        ax.set_title('心理波动性 (标准差) 演变趋势', fontsize=14)
+        ax.set_ylabel('标准差 (Standard Deviation)', fontsize=12)
+        ax.set_xticks(x, labels, fontsize=12)
+        ax.grid(axis='y', linestyle='--', alpha=0.3)
+
+        # 自动标注最大最小值
+        self.max_note = ax.annotate('波动最大', xy=(0, 0), ha='center', color='#d62728', fontweight='bold',
+                                    arrowprops=dict(arrowstyle='->', color='#d62728'))
+        self.min_note = ax.annotate('最稳定', xy=(0, 0), ha='center', color='#2ca02c', fontweight='bold',
+                                    arrowprops=dict(arrowstyle='->', color='#2ca02c'))
+        # 标注位置随数据变化，不参与布局计算 (复用画布时布局保持不变)
+        self.max_note.set_in_layout(False)
+        self.min_note.set_in_layout(False)
+
+    def _draw_box(self, labels, all_scores_dict, score_col_name):
+        ax = self.box_ax
+        ax.cla()
+        box = ax.boxplot([all_scores_dict[label] for label in labels], labels=labels, patch_artist=True, vert=False)
+
+        # 自动生成颜色
+        colors = plt.cm.Set3(np.linspace(0, 1, len(labels)))
+        for patch, color in zip(box['boxes'], colors):
+            patch.set_facecolor(color)
+            patch.set_alpha(0.7)
+
+        ax.set_title(f'各时期情感得分分布 (列: {score_col_name})', fontsize=14)
+        ax.set_xlabel('情感得分 (Score)', fontsize=12)
+        ax.grid(axis='x', linestyle='--', alpha=0.3)
+
+    def update(self, volatilities, all_scores_dict, score_col_name):
+        labels = list(volatilities)
+        vol_values = list(volatilities.values())
+        if self.box_ax is not None:
+            self._draw_box(labels, all_scores_dict, score_col_name)
+
+        self.line.set_ydata(vol_values)
+        if self.fill is not None:
+            self.fill.remove()
+        # relim 不统计填充区域，先按折线重算范围，再由 fill_between 把 0 纳入范围 (与直接绘制时一致)
+        self.ax.relim()
+        self.fill = self.ax.fill_between(self.x, vol_values, color='#FF5733', alpha=0.1)
+        self.ax.autoscale_view()
+
+        for note, idx in ((self.max_note, np.argmax(vol_values)), (self.min_note, np.argmin(vol_values))):
+            note.xy = (idx, vol_values[idx])
+            note.xyann = (idx, vol_values[idx] * 1.1)
+
+
+def plot_volatility(volatilities, all_scores_dict, score_col_name):
+    """
+    箱线图 + 波动性趋势图，返回 Figure
+    all_scores_dict 为空时 (未保留得分) 只画波动性趋势
+    """
+    return renderer(VolatilityFigure).render(volatilities, all_scores_dict, score_col_name)
+
+
+class RollingFigure(ReusableFigure):
+    """滚动标准差曲线，每个来源一条"""
+
+    def layout_key(self, rolling, score_col_name, shown):
+        return tuple(shown)
+
+    def build(self, rolling, score_col_name, shown):
+        self.fig = plt.figure(figsize=(12, 5))
+        ax = self.ax = self.fig.gca()
+        self.lines = [ax.plot([], [], linewidth=1.5, label=str(source))[0] for source in shown]
+        self.title = ax.set_title('', fontsize=14)
+        ax.set_xlabel('句子序号 (窗口起点)', fontsize=12)
+        ax.set_ylabel('标准差 (Standard Deviation)', fontsize=12)
+        ax.grid(axis='y', linestyle='--', alpha=0.3)
+        ax.legend(fontsize=9, loc='upper right')
+
+    def update(self, rolling, score_col_name, shown):
+        for line, source in zip(self.lines, shown):
+            part = rolling[rolling['Source'] == source]
+            line.set_data(part['Start'], part['Std'])
+
+        total = rolling['Source'].nunique()
+        title = f'滚动波动性 (窗口 {int(rolling["Size"].max())} 句，列: {score_col_name})'
+        if total > len(shown):
+            title += f'，仅显示 {len(shown)} / {total} 个来源'
+        self.title.set_text(title)
+        self.rescale(self.ax)
+
+
+def plot_rolling_volatility(rolling, score_col_name, max_sources=12):
+    """
+    滚动标准差曲线，每个来源一条 (横轴为窗口起始句号)，返回 Figure
+    来源过多时只画窗口最多的 max_sources 个
+    """
+    sizes = rolling.groupby('Source', observed=True).size().sort_values(ascending=False)
+    shown = list(sizes.index[:max_sources])
+    return renderer(RollingFigure).render(rolling, score_col_name, shown)
+
+
+# ==========================================
+# 4. 主程序
+# ==========================================
+
+def gui_main():
+    global TABLE_CACHE
+
+    TABLE_CACHE = TableCache()
+    root = tk.Tk()
+    root.withdraw()  # 隐藏主窗口
+
+    print("=== Faker 情感波动性分析工具 (自定义文件版) ===")
+    print("请选择包含情感得分的 CSV 或 Excel 文件...")
+
+    # 1. 选择文件
+    file_path = filedialog.askopenfilename(
+        title="选择情感分析结果文件",
+        filetypes=[("Data Files", "*.csv *.xlsx *.xls *.parquet *.feather *.arrow")]
+    )
+
+    if not file_path:
+        print("未选择文件，程序退出。")
+        return
+
+    print(f"正在读取: {os.path.basename(file_path)}...")
+    df = load_data(file_path)
+
+    if df is None:
+        return
+
+    # 2. 分析数据
+    volatilities, all_scores_dict, score_col_name = analyze_file_volatility(df)
+
+    if not volatilities:
+        print("分析失败，没有有效数据。")
+        return
+
+    print_results(volatilities, score_col_name)
+
+    plot_volatility(volatilities, all_scores_dict, score_col_name)
+    plt.show()
+
+
+def rolling_for_file(file_path, score_col, args):
+    """批处理模式下对一个文件计算滚动波动性 (只读取得分列和来源列)"""
+    columns = read_columns(file_path)
+    source_col = resolve_source_col(columns, args.source_col)
+    if args.source_col and source_col is None:
+        report_error("错误", f"来源列不存在: {args.source_col}")
+        return None
+    usecols = [score_col] + ([source_col] if source_col else [])
+    if TABLE_CACHE is not None and file_path.endswith(CACHED_EXTS):
+        df = load_data(file_path, usecols)
+    else:
+        encoding = detect_encoding(file_path) if file_path.endswith('.csv') else None
+        df = pd.concat(PROFILER.iterate('分块读取', iter_chunks(file_path, usecols, args.chunk_rows, encoding)),
+                       ignore_index=True)
+    scores = pd.to_numeric(df[score_col], errors='coerce')
+    sources = df[source_col] if source_col else None
+    return rolling_volatility(scores, sources, window=args.rolling, step=args.step)
+
+
+def batch_main(argv):
+    """
+    批处理模式：逐个分析得分文件，每个文件输出一张图，汇总写入一张表
+    示例:
+      python 情绪波动.py 原始数据及数据处理结果/*_分析结果.xlsx --group-col Year --figure-dir figures/
+    """
+    global INTERACTIVE, TABLE_CACHE
+
+    parser = argparse.ArgumentParser(description="Faker 情感波动性分析 (批处理模式)")
+    parser.add_argument('inputs', nargs='+', help='CSV/Excel/Parquet/Feather 文件、目录或通配符')
+    parser.add_argument('--score-col', help='情感得分列名 (默认自动识别)')
+    parser.add_argument('--group-col', help='分组列名 (默认自动识别，如 Year/Period)')
+    parser.add_argument('--figure-dir', default='.', help='图表输出目录')
+    add_format_argument(parser)
+    parser.add_argument('-o', '--output', help='汇总表输出路径 (.csv)')
+    parser.add_argument('--chunked', action='store_true',
+                        help='分块一遍扫描 (内存占用与文件大小无关，适合 GB 级得分文件)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='分块模式下每块的行数')
+    parser.add_argument('--keep-scores', choices=['all', 'sample', 'none'], default='sample',
+                        help='分块模式下箱线图使用的得分：all 全部保留；sample 每组随机抽样 (默认)；none 不画箱线图')
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE, help='sample 模式下每组保留的样本数')
+    parser.add_argument('--rolling', type=int, nargs='?', const=ROLLING_WINDOW, metavar='窗口',
+                        help=f'同时计算每个来源内部按句子顺序的滚动标准差 (默认窗口 {ROLLING_WINDOW} 句)')
+    parser.add_argument('--step', type=int, default=ROLLING_STEP, help='滚动窗口的步长 (句)')
+    parser.add_argument('--source-col', help='来源列名 (默认自动识别，如 Source)')
+    parser.add_argument('--rolling-output', help='滚动结果输出路径 (.parquet/.feather/.csv/.xlsx)')
+    parser.add_argument('--significance', type=int, nargs='?', const=10_000, default=0, metavar='次数',
+                        help='各组标准差的 bootstrap 置信区间 + 相邻组差异的置换检验 (默认 10000 次重抽样)；'
+                             '分块模式下基于保留的得分 (见 --keep-scores)')
+    parser.add_argument('--workers', type=int, default=1, help='显著性检验使用的进程数 (0 表示全部 CPU 核心)')
+    parser.add_argument('--table-cache', default=DEFAULT_TABLE_DIR, metavar='目录',
+                        help='CSV / Excel 的列式旁路缓存目录 (第一次读取时转换为 Feather，之后只读用到的列)')
+    parser.add_argument('--no-table-cache', action='store_true', help='不使用旁路缓存，每次直接读取原文件')
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    start_profiling(args)
+
+    TABLE_CACHE = None if args.no_table_cache else TableCache(args.table_cache)
+    INTERACTIVE = False
+    use_headless()
+    files = expand_paths(args.inputs, ('.csv', '.xlsx', '.xls', '.parquet', '.feather', '.arrow'))
+    if not files:
+        parser.error("没有找到任何 CSV/Excel 文件")
+
+    print("=== Faker 情感波动性分析工具 (批处理模式) ===")
+    summary = []
+    failed = 0
+    rolling_writer = open_writer(args.rolling_output) if args.rolling and args.rolling_output else None
+    for file_path in files:
+        name = os.path.basename(file_path)
+        print(f"\n正在读取: {name}...")
+        if args.chunked:
+            with PROFILER.stage('波动计算', doc=name):
+                volatilities, all_scores_dict, score_col_name = analyze_file_volatility_chunked(
+                    file_path, score_col=args.score_col, group_col=args.group_col, chunk_rows=args.chunk_rows,
+                    keep_scores=args.keep_scores, sample_size=args.sample_size)
+        else:
+            with PROFILER.stage('读取表格', doc=name) as stage:
+                # 只读取得分列和分组列 (旁路缓存 / Parquet / Feather 中其余的列不会被读入)
+                try:
+                    usecols = analysis_columns(read_columns(file_path), args.score_col, args.group_col)
+                except Exception:
+                    usecols = None  # 表头都读不出来时交给 load_data 报错
+                df = load_data(file_path, usecols)
+                stage.items = None if df is None else len(df)
+            if df is None:
+                failed += 1
+                continue
+
+            with PROFILER.stage('波动计算', doc=name, items=len(df)):
+                volatilities, all_scores_dict, score_col_name = analyze_file_volatility(
+                    df, score_col=args.score_col, group_col=args.group_col)
+        if not volatilities:
+            print("分析失败，没有有效数据。")
+            failed += 1
+            continue
+
+        print_results(volatilities, score_col_name)
+        intervals = {}
+        if args.significance and all_scores_dict:
+            with PROFILER.stage('显著性检验', doc=name, items=args.significance):
+                intervals, comparisons = test_volatility(all_scores_dict, args.significance, args.workers)
+            print_significance(intervals, comparisons)
+        for label, vol in volatilities.items():
+            row = (file_path, label, vol, describe_volatility(vol))
+            if args.significance:
+                ci = intervals.get(label)
+                row += (ci['low'], ci['high']) if ci else ('', '')
+            summary.append(row)
+
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        with PROFILER.stage('绘图', doc=name):
+            fig = plot_volatility(volatilities, all_scores_dict, score_col_name)
+            paths = save_figure(fig, os.path.join(args.figure_dir, f"{stem}_volatility.png"), args.figure_format)
+        print(f"[可视化完成] 图表已保存为: {', '.join(paths)}")
+
+        if args.rolling:
+            with PROFILER.stage('滚动波动', doc=name):
+                rolling = rolling_for_file(file_path, score_col_name, args)
+            if rolling is None:
+                continue
+            if rolling_writer is not None:
+                with PROFILER.stage('结果写出', doc=name, items=len(rolling)):
+                    rolling_writer.write(rolling.assign(File=name))
+            with PROFILER.stage('绘图', doc=name):
+                fig = plot_rolling_volatility(rolling, score_col_name)
+                paths = save_figure(fig, os.path.join(args.figure_dir, f"{stem}_rolling.png"), args.figure_format)
+            print(f"[滚动波动性] {rolling['Source'].nunique()} 个来源，{len(rolling)} 个窗口，图表: {', '.join(paths)}")
+
+    if rolling_writer is not None:
+        with PROFILER.stage('结果写出', items=0):
+            rolling_writer.close()
+        print(f"\n滚动结果已保存为: {args.rolling_output}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['File', 'Group', 'Std', 'Status'] + (['CI_Low', 'CI_High'] if args.significance else []))
+            writer.writerows(summary)
+        print(f"\n汇总结果已保存为: {args.output}")
+
+    finish_profiling(args)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    """带命令行参数时进入批处理模式，否则弹出文件选择窗口"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv:
+        return batch_main(argv)
+    return gui_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,190 +1,582 @@
-import pandas as pd
-from snownlp import SnowNLP
-from docx import Document
-import re
-import os
-import tkinter as tk
-from tkinter import filedialog
-import matplotlib.pyplot as plt
-import platform
-
-# ==========================================
-# 1. 配置与字体设置 (解决中文乱码)
-# ==========================================
-system_name = platform.system()
-if system_name == "Windows":
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
-elif system_name == "Darwin":  # MacOS
-    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
-else:
-    plt.rcParams['font.sans-serif'] = ['sans-serif']
-
-plt.rcParams['axes.unicode_minus'] = False
-
-
-def extract_text_from_docx(file_path):
-    """从 Word 文档中提取所有文本"""
-    if not os.path.exists(file_path):
-        return ""
-    try:
-        doc = Document(file_path)
-        full_text = []
-        for para in doc.paragraphs:
-            if para.text.strip():
-                full_text.append(para.text.strip())
-        return "\n".join(full_text)
-    except Exception as e:
-        print(f"读取错误: {e}")
-        return ""
-
-
-def analyze_sentiment(text, period_label, source_label):
-    """
-    对文本进行分句清洗和情感打分
-    period_label: '前期' 或 '后期'
-    source_label: '采访' 或 '纪录片' (文件名)
-    """
-    # 1. 简单清洗：去除多余空白和常见的时间戳格式 (如 [12:30])
-    text = re.sub(r'\[\d{2}:\d{2}.*?\]', '', text)
-    text = text.replace('\n', ' ').replace('\r', ' ')
-
-    # 2. 分句：按中文标点切分
-    sentences = re.split(r'[。！？!?]', text)
-
-    data = []
-    for sent in sentences:
-        sent = sent.strip()
-        # 过滤掉太短的句子
-        if len(sent) < 4:
-            continue
-
-        # 3. 情感打分 (SnowNLP)
-        try:
-            s = SnowNLP(sent)
-            # 映射到 -1 到 1
-            score = (s.sentiments - 0.5) * 2
-        except:
-            score = 0.0
-
-        data.append({
-            'Period': period_label,
-            'Source': source_label,
-            'Sentence': sent,
-            'Sentiment_Score': round(score, 4)
-        })
-
-    return data
-
-
-def select_files(title):
-    """弹出文件选择框"""
-    print(f"\n请选择【{title}】的 Word 文档 (支持多选)...")
-    file_paths = filedialog.askopenfilenames(title=f"选择{title}文档", filetypes=[("Word", "*.docx")])
-    return file_paths
-
-
-def plot_variance_comparison(stats_df):
-    """
-    绘制情感方差对比图
-    stats_df: 包含 'Period' 和 'var' 列的 DataFrame
-    """
-    if stats_df.empty or 'var' not in stats_df.columns:
-        print("无有效统计数据，无法绘图。")
-        return
-
-    # 准备数据
-    periods = stats_df.index.tolist()
-    variances = stats_df['var'].fillna(0).tolist()
-
-    # 设置颜色：前期红色(波动大)，后期绿色(平稳)
-    colors = ['#d62728' if '前期' in str(p) else '#2ca02c' for p in periods]
-
-    # 创建画布
-    plt.figure(figsize=(10, 6), dpi=120)
-
-    # 绘制柱状图
-    bars = plt.bar(periods, variances, color=colors, alpha=0.8, width=0.5)
-
-    # 添加数值标签
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width() / 2., height,
-                 f'{height:.4f}',
-                 ha='center', va='bottom', fontsize=12, fontweight='bold')
-
-    # 装饰图表
-    plt.title('Faker 职业生涯情感稳定性对比 (方差越小越稳定)', fontsize=16, pad=20)
-    plt.ylabel('情感得分方差 (Variance)', fontsize=12)
-    plt.xlabel('职业阶段', fontsize=12)
-    plt.grid(axis='y', linestyle='--', alpha=0.3)
-
-    # 添加解读文本
-    if len(variances) >= 2:
-        diff = variances[0] - variances[-1]
-        if diff > 0:
-            note = f"📉 方差下降 {diff:.3f}\n(情绪控制力显著提升)"
-            plt.annotate(note,
-                         xy=(1, variances[-1]),
-                         xytext=(0.5, max(variances) * 0.8),
-                         arrowprops=dict(facecolor='gray', shrink=0.05, linestyle='--'),
-                         fontsize=11, bbox=dict(boxstyle="round", fc="white", ec="gray", alpha=0.9))
-
-    plt.tight_layout()
-
-    # 保存并显示
-    save_path = 'faker_variance_comparison.png'
-    plt.savefig(save_path)
-    print(f"\n[可视化完成] 图表已保存为: {save_path}")
-    plt.show()
-
-
-def main():
-    print("=== Faker 文本情感量化工具 (通用版 + 可视化) ===")
-
-    root = tk.Tk()
-    root.withdraw()
-
-    all_data = []
-
-    # 1. 选择前期文件
-    early_files = select_files("前期 (Early Career)")
-    for f in early_files:
-        print(f"正在处理前期文档: {os.path.basename(f)}...")
-        text = extract_text_from_docx(f)
-        if text:
-            all_data.extend(analyze_sentiment(text, "前期", os.path.basename(f)))
-
-    # 2. 选择后期文件
-    late_files = select_files("后期 (Late Career)")
-    for f in late_files:
-        print(f"正在处理后期文档: {os.path.basename(f)}...")
-        text = extract_text_from_docx(f)
-        if text:
-            all_data.extend(analyze_sentiment(text, "后期", os.path.basename(f)))
-
-    # 3. 导出与分析
-    if all_data:
-        df = pd.DataFrame(all_data)
-        output_file = "faker_sentiment_analysis_final.xlsx"
-        df.to_excel(output_file, index=False)
-
-        print("\n" + "=" * 30)
-        print(f"处理完成！数据已保存为: {output_file}")
-        print(f"共提取句子: {len(df)} 条")
-        print("=" * 30)
-
-        # 自动计算方差
-        print("\n[关键指标预览: 情绪稳定性分析]")
-        # 聚合计算均值和方差
-        stats = df.groupby('Period')['Sentiment_Score'].agg(['count', 'mean', 'var'])
-        print(stats)
-
-        # === 新增：调用可视化函数 ===
-        plot_variance_comparison(stats)
-
-    else:
-        print("未选择任何文件或提取失败。")
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import pandas as pd
+from snownlp import SnowNLP
+import re
+import os
+import sys
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import matplotlib.pyplot as plt
+import platform
+
+try:
+    import tkinter as tk
+    from tkinter import filedialog
+except ImportError:  # 无界面服务器可能没有 Tk，批处理模式不依赖它
+    tk = None
+
+from 命令行工具 import add_input_arguments, collect_period_files, source_labels
+from 情感缓存 import DEFAULT_CACHE_PATH, SentimentCache, snownlp_model_version
+from 文本提取 import PREFETCH_DEPTH, prefetch as prefetch_documents, read_paragraphs, read_sentences, read_text
+from 结果输出 import WRITERS, open_writer
+from 句子缓冲 import SentenceBuffer
+from 句子切分 import Segmenter, add_segmenter_arguments, segmenter_from_args
+from 文本存储 import add_store_arguments, use_store
+from 稳定性统计库 import DEFAULT_STORE_PATH, StabilityStore
+from 分词缓存 import file_hash
+from 显著性检验 import compare, describe_comparison
+from 图表渲染 import ReusableFigure, add_format_argument, finish_figure, renderer, save_figure, use_headless
+from 性能剖析 import PROFILER, add_profile_arguments, finish_profiling, start_profiling
+
+# ==========================================
+# 1. 配置与字体设置 (解决中文乱码)
+# ==========================================
+system_name = platform.system()
+if system_name == "Windows":
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
+elif system_name == "Darwin":  # MacOS
+    plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
+else:
+    plt.rcParams['font.sans-serif'] = ['sans-serif']
+
+plt.rcParams['axes.unicode_minus'] = False
+
+
+def extract_text_from_docx(file_path):
+    """从 Word 文档中提取所有文本 (需要逐段处理时直接用 文本提取.read_paragraphs)"""
+    return read_text(file_path)
+
+
+# 并行打分时每个任务包含的句子数 (过小则进程通信开销占比高)
+CHUNK_SIZE = 64
+
+# 打分引擎：'snownlp' 逐句调用 SnowNLP；'batch' 使用 情感批量打分 的向量化实现 (结果等价)
+ENGINE = 'snownlp'
+BATCH_CHUNK_SIZE = 4096
+
+# 分句引擎 (见 句子切分)；为 None 时使用旧的正则切分
+SEGMENTER = Segmenter()
+
+# 使用进程池时最多同时提交打分任务的文档数 (其句子和得分都驻留内存)
+MAX_PENDING_DOCS = 8
+
+
+def iter_sentences(paragraphs):
+    """
+    逐段清洗并分句，过滤掉太短的句子 (规则见 句子切分.Segmenter)
+    没有以句末标点结尾的段落会与下一段以空格相连
+    SEGMENTER 为 None 时使用旧规则 (clean_paragraphs + 按 [。！？!?] 切分)
+    """
+    if SEGMENTER is not None:
+        return PROFILER.iterate('分句', SEGMENTER.sentences(paragraphs))
+    cleaned = PROFILER.iterate('时间戳清洗', clean_paragraphs(paragraphs))
+    return PROFILER.iterate('分句', _split_cleaned(cleaned))
+
+
+def clean_paragraphs(paragraphs):
+    """1. 简单清洗：去除多余空白和常见的时间戳格式 (如 [12:30])"""
+    for para in paragraphs:
+        para = re.sub(r'\[\d{2}:\d{2}.*?\]', '', para)
+        yield para.replace('\n', ' ').replace('\r', ' ')
+
+
+def _split_cleaned(paragraphs):
+    pending = None
+    for para in paragraphs:
+        # 2. 分句：按中文标点切分
+        parts = re.split(r'[。！？!?]', para if pending is None else pending + ' ' + para)
+        pending = parts.pop()
+        for sent in parts:
+            sent = sent.strip()
+            # 过滤掉太短的句子
+            if len(sent) >= 4:
+                yield sent
+
+    if pending is not None and len(pending.strip()) >= 4:
+        yield pending.strip()
+
+
+def split_sentences(text):
+    """对整段文本分句，返回句子列表"""
+    return list(iter_sentences([text]))
+
+
+def score_sentence(sent):
+    """3. 情感打分 (SnowNLP)，映射到 -1 到 1"""
+    try:
+        s = SnowNLP(sent)
+        return (s.sentiments - 0.5) * 2
+    except:
+        return 0.0
+
+
+_batch_scorer = None
+
+
+def get_batch_scorer():
+    """批量打分引擎只在首次使用时加载 (依赖 scipy)"""
+    global _batch_scorer
+    if _batch_scorer is None:
+        from 情感批量打分 import BatchSentimentScorer
+        _batch_scorer = BatchSentimentScorer()
+    return _batch_scorer
+
+
+def _init_worker(engine):
+    """进程池初始化：同步打分引擎，并提前加载一次模型 (分句在主进程完成，子进程不需要分句器)"""
+    global ENGINE
+    ENGINE = engine
+    _score_chunk(["预热情感模型"])
+
+
+def _score_chunk(sentences):
+    if ENGINE == 'batch':
+        return get_batch_scorer().score(sentences).tolist()
+    return [score_sentence(sent) for sent in sentences]
+
+
+def create_pool(workers):
+    """
+    创建打分进程池
+    workers: 进程数，1 表示不并行 (返回 None)，0 表示使用全部 CPU 核心
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(ENGINE,))
+
+
+def score_sentences(sentences, pool=None, chunk_size=None, cache=None):
+    """
+    批量打分，返回与 sentences 顺序一致的得分迭代器
+    提供 pool 时所有分块会立即提交，因此可以先为多个文档提交任务再依次取结果
+    提供 cache (情感缓存.SentimentCache) 时只对未命中的句子调用模型
+    """
+    if cache is not None:
+        cached = cache.get_many(sentences)
+        missing = list(dict.fromkeys(sent for sent in sentences if sent not in cached))
+        return _merge_cached(sentences, cached, missing, score_sentences(missing, pool, chunk_size), cache)
+
+    if pool is None:
+        if ENGINE == 'batch':
+            return iter(_score_chunk(sentences))
+        return (score_sentence(sent) for sent in sentences)
+    if chunk_size is None:
+        chunk_size = BATCH_CHUNK_SIZE if ENGINE == 'batch' else CHUNK_SIZE
+    chunks = [sentences[i:i + chunk_size] for i in range(0, len(sentences), chunk_size)]
+    return chain.from_iterable(pool.map(_score_chunk, chunks))
+
+
+def _merge_cached(sentences, cached, missing, new_scores, cache):
+    """取回新得分并写入缓存，再按原顺序输出"""
+    fresh = dict(zip(missing, new_scores))
+    cache.put_many(fresh)
+    cached.update(fresh)
+    for sent in sentences:
+        yield cached[sent]
+
+
+def round_scores(scores):
+    """得分保留 4 位小数"""
+    return [round(score, 4) for score in scores]
+
+
+def build_buffer(sentences, scores, period_label, source_label, buffer=None):
+    """把一个文档的句子级结果追加到紧凑的按列缓冲 (见 句子缓冲.SentenceBuffer)，返回该缓冲"""
+    if buffer is None:
+        buffer = SentenceBuffer()
+    buffer.append(sentences, round_scores(scores), period_label, source_label)
+    return buffer
+
+
+def build_frame(sentences, scores, period_label, source_label):
+    """一个文档的句子级结果组装为 DataFrame (流式输出时每个文档一块)"""
+    return pd.DataFrame({
+        'Period': [period_label] * len(sentences),
+        'Source': [source_label] * len(sentences),
+        'Sentence': sentences,
+        'Sentiment_Score': round_scores(scores),
+    })
+
+
+def analyze_sentiment(text, period_label, source_label, pool=None, cache=None):
+    """
+    对文本进行分句清洗和情感打分
+    period_label: '前期' 或 '后期'
+    source_label: '采访' 或 '纪录片' (文件名)
+    pool: 可选的打分进程池 (见 create_pool)
+    cache: 可选的得分缓存 (见 情感缓存.SentimentCache)
+    返回 句子缓冲.SentenceBuffer (len() 为句数，to_frame() 转为 DataFrame)
+    """
+    sentences = split_sentences(text)
+    return build_buffer(sentences, score_sentences(sentences, pool, cache=cache), period_label, source_label)
+
+
+def select_files(title):
+    """弹出文件选择框"""
+    print(f"\n请选择【{title}】的 Word 文档 (支持多选)...")
+    file_paths = filedialog.askopenfilenames(title=f"选择{title}文档", filetypes=[("Word", "*.docx")])
+    return file_paths
+
+
+class VarianceFigure(ReusableFigure):
+    """情感方差对比柱状图 (前期红色、后期绿色，附数值标签与方差下降的解读标注)"""
+
+    def layout_key(self, stats_df, test=None):
+        return tuple(stats_df.index)
+
+    def build(self, stats_df, test=None):
+        periods = [str(p) for p in stats_df.index]
+
+        # 设置颜色：前期红色(波动大)，后期绿色(平稳)
+        colors = ['#d62728' if '前期' in p else '#2ca02c' for p in periods]
+
+        # 创建画布，绘制柱状图
+        self.fig = plt.figure(figsize=(10, 6), dpi=120)
+        ax = self.ax = self.fig.gca()
+        self.bars = ax.bar(periods, [0] * len(periods), color=colors, alpha=0.8, width=0.5)
+
+        # 数值标签
+        self.labels = [ax.text(bar.get_x() + bar.get_width() / 2., 0, '',
+                               ha='center', va='bottom', fontsize=12, fontweight='bold')
+                       for bar in self.bars]
+
+        # 装饰图表
+        ax.set_title('Faker 职业生涯情感稳定性对比 (方差越小越稳定)', fontsize=16, pad=20)
+        ax.set_ylabel('情感得分方差 (Variance)', fontsize=12)
+        ax.set_xlabel('职业阶段', fontsize=12)
+        ax.grid(axis='y', linestyle='--', alpha=0.3)
+
+        # 解读文本 (方差下降时才显示)
+        self.note = ax.annotate('', xy=(1, 0), xytext=(0.5, 0),
+                                arrowprops=dict(facecolor='gray', shrink=0.05, linestyle='--'),
+                                fontsize=11, bbox=dict(boxstyle="round", fc="white", ec="gray", alpha=0.9))
+        self.note.set_visible(False)
+
+    def update(self, stats_df, test=None):
+        variances = stats_df['var'].fillna(0).tolist()
+        for bar, label, height in zip(self.bars, self.labels, variances):
+            bar.set_height(height)
+            label.set_y(height)
+            label.set_text(f'{height:.4f}')
+        self.rescale(self.ax)
+
+        diff = variances[0] - variances[-1] if len(variances) >= 2 else 0
+        self.note.set_visible(diff > 0)
+        if diff > 0:
+            note = f"📉 方差下降 {diff:.3f}\n(情绪控制力显著提升)"
+            if test is not None:
+                verdict = "情绪控制力显著提升" if test['p_value'] < 0.05 else "差异不显著"
+                note = (f"📉 方差下降 {diff:.3f}\n95% CI [{test['low']:.3f}, {test['high']:.3f}]，"
+                        f"p = {test['p_value']:.4f}\n({verdict})")
+            self.note.set_text(note)
+            self.note.xy = (1, variances[-1])
+            self.note.xyann = (0.5, max(variances) * 0.8)
+
+
+def plot_variance_comparison(stats_df, save_path='faker_variance_comparison.png', show=True, test=None,
+                             formats=None):
+    """
+    绘制情感方差对比图
+    stats_df: 包含 'Period' 和 'var' 列的 DataFrame
+    show: 是否弹出窗口 (批处理模式下为 False，只保存文件)
+    test: 首末两个时期方差差异的检验结果 (见 显著性检验.compare)，有则在标注中给出置信区间和 p 值
+    formats: 图表格式 (见 图表渲染.save_figure)，为空时按 save_path 的扩展名
+    """
+    if stats_df.empty or 'var' not in stats_df.columns:
+        print("无有效统计数据，无法绘图。")
+        return
+
+    fig = renderer(VarianceFigure).render(stats_df, test)
+
+    # 保存并显示
+    for path in save_figure(fig, save_path, formats):
+        print(f"\n[可视化完成] 图表已保存为: {path}")
+    finish_figure(fig, show)
+
+
+def _load_sentences(path):
+    """读取并分句 (在 prefetch 的后台线程中执行)"""
+    source_label = os.path.basename(path)
+    with PROFILER.stage('读取分句', doc=source_label) as stage:
+        # 文本存储中已有按当前规则分好的句子时直接读取 (见 文本存储)
+        sentences = read_sentences(path, SEGMENTER.version) if SEGMENTER is not None else None
+        if sentences is None:
+            sentences = list(iter_sentences(read_paragraphs(path)))
+        stage.items = len(sentences)
+    return sentences
+
+
+def _score_files(files, period_label, pool=None, cache=None, prefetch=PREFETCH_DEPTH, labels=None):
+    """
+    逐个文档产出 (来源标签, 句子, 得分)，按文件顺序
+    labels: {文件: 来源标签}，为空时按 files 计算 (见 命令行工具.source_labels)；
+            只处理某个时期的部分文档时应传入按整个时期计算的标签
+    读取与分句在后台线程中提前进行 (最多提前 prefetch 个文档，见 文本提取.prefetch)，与打分重叠；
+    使用进程池时先提交多个文档的打分任务 (最多 MAX_PENDING_DOCS 个)，多个文档同时占满各个核心
+    """
+    pending = deque()
+    labels = labels or source_labels(files)
+    for f, sentences in prefetch_documents(files, _load_sentences, prefetch):
+        source_label = labels[f]
+        print(f"正在处理{period_label}文档: {source_label}...")
+        if not sentences:
+            continue
+        with PROFILER.stage('情感打分', doc=source_label, items=len(sentences)):
+            scores = score_sentences(sentences, pool, cache=cache)
+            if pool is None:
+                scores = list(scores)
+        if pool is not None:
+            # 任务已全部提交，取结果时的等待时间单独记录
+            scores = PROFILER.iterate('等待打分进程', scores, doc=source_label)
+        pending.append((source_label, sentences, scores))
+        if pool is None or len(pending) > MAX_PENDING_DOCS:
+            yield pending.popleft()
+
+    while pending:
+        yield pending.popleft()
+
+
+def process_files(files, period_label, pool=None, cache=None, prefetch=PREFETCH_DEPTH):
+    """读取并打分，返回全部句子级结果 (SentenceBuffer，按文件顺序)"""
+    buffer = SentenceBuffer()
+    for source_label, sentences, scores in _score_files(files, period_label, pool, cache, prefetch):
+        build_buffer(sentences, scores, period_label, source_label, buffer)
+    return buffer
+
+
+def iter_frames(files, period_label, pool=None, cache=None, prefetch=PREFETCH_DEPTH, labels=None):
+    """读取并打分，每个文档产出一个 DataFrame，供流式输出使用 (labels 见 _score_files)"""
+    for source_label, sentences, scores in _score_files(files, period_label, pool, cache, prefetch, labels):
+        yield build_frame(sentences, scores, period_label, source_label)
+
+
+def plan_updates(periods, store):
+    """
+    增量模式：找出统计库中不存在或内容已变化的文档
+    返回 (需要重新打分的 {时期: [文件]}, 本次全部文档的 {(时期, 文件名): 内容哈希})
+    """
+    todo = {}
+    digests = {}
+    for period, files in periods.items():
+        labels = source_labels(files)
+        for f in files:
+            key = (period, labels[f])
+            with PROFILER.stage('内容哈希', doc=key[1]):
+                digests[key] = file_hash(f)
+            if not store.is_current(*key, digests[key]):
+                todo.setdefault(period, []).append(f)
+    return todo, digests
+
+
+def update_store(frames, store, digests):
+    """
+    原样转发 frames，同时把每个文档的得分记入统计库
+    全部转发完后补记没有有效句子的文档，并删除本次未选择的文档
+    """
+    for frame in frames:
+        key = (frame['Period'].iat[0], frame['Source'].iat[0])
+        store.put(*key, digests[key], frame['Sentiment_Score'])
+        yield frame
+
+    for key, digest in digests.items():
+        if not store.is_current(*key, digest):
+            store.put(*key, digest, [])
+    store.sync(digests)
+    store.save()
+
+
+def export_and_summarize(frames, output_file="faker_sentiment_analysis_final.xlsx",
+                         figure_path='faker_variance_comparison.png', show=True, fmt=None,
+                         store=None, periods=None, significance=0, workers=1, figure_format=None,
+                         buffer=None):
+    """
+    导出句子级结果，打印并绘制各时期方差
+    frames: DataFrame 的迭代器 (见 iter_frames)，边打分边写出，整表不会同时驻留内存
+    fmt: 输出格式 (见 结果输出)，为空时按 output_file 的扩展名判断
+    store: 增量模式下的统计库 (见 update_store)；此时方差直接由统计库合并得到，
+           frames 只包含本次重新打分的文档，periods 为时期的输出顺序
+    significance: 首末时期方差差异的重抽样次数 (bootstrap 置信区间 + 置换检验)，0 为不检验；
+                  workers 为检验使用的进程数
+    figure_format: 图表格式 (如 ('png', 'pdf'))，为空时按 figure_path 的扩展名
+    buffer: 收集各句时期与得分的 SentenceBuffer(keep_text=False)，调用方可在之后复用；为空时内部新建
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None and store is None:
+        print("未选择任何文件或提取失败。")
+        return None
+
+    # 统计只需要时期和得分两列 (按列紧凑存放)，句子文本写出后即可释放
+    if buffer is None:
+        buffer = SentenceBuffer(keep_text=False)
+    if first is not None:
+        with open_writer(output_file, fmt) as writer:
+            for frame in chain([first], frames):
+                with PROFILER.stage('结果写出', doc=frame['Source'].iat[0], items=len(frame)):
+                    writer.write(frame)
+                if store is None:
+                    buffer.append_frame(frame)
+            # xlsx 等格式在关闭时才真正写出
+            with PROFILER.stage('结果写出', items=0):
+                writer.close()
+
+        print("\n" + "=" * 30)
+        print(f"处理完成！数据已保存为: {output_file}")
+        print(f"共提取句子: {writer.rows} 条" + (" (仅本次重新打分的文档)" if store is not None else ""))
+        print("=" * 30)
+    else:
+        print("\n没有新增或修改的文档，跳过句子级输出。")
+
+    # 自动计算方差
+    print("\n[关键指标预览: 情绪稳定性分析]")
+    if store is not None:
+        print(f"[统计库] {store.summary()}")
+        stats = store.period_stats(periods)
+    else:
+        # 聚合计算均值和方差 (sort=False 保持时期的输入顺序)
+        with PROFILER.stage('方差统计'):
+            df = buffer.to_frame()
+            stats = df.groupby('Period', sort=False, observed=True)['Sentiment_Score'].agg(['count', 'mean', 'var'])
+            stats.index = stats.index.astype(object)
+    print(stats)
+    if stats.empty:
+        return None
+
+    test = None
+    if significance and len(stats) >= 2:
+        if store is not None:
+            print("\n[显著性检验] 增量模式下没有保留逐句得分，跳过检验。")
+        else:
+            first, last = stats.index[0], stats.index[-1]
+            with PROFILER.stage('显著性检验', items=significance):
+                test = compare(df.loc[df['Period'] == first, 'Sentiment_Score'],
+                               df.loc[df['Period'] == last, 'Sentiment_Score'],
+                               stat='var', ddof=1, n_resamples=significance, workers=workers)
+            print(f"\n[显著性检验] {describe_comparison(test, first, last)}")
+
+    # === 新增：调用可视化函数 ===
+    with PROFILER.stage('绘图'):
+        plot_variance_comparison(stats, save_path=figure_path, show=show, test=test, formats=figure_format)
+    return stats
+
+
+def gui_main():
+    """交互模式：通过文件对话框选择前期 / 后期文档"""
+    print("=== Faker 文本情感量化工具 (通用版 + 可视化) ===")
+
+    root = tk.Tk()
+    root.withdraw()
+
+    def frames():
+        # 1. 选择前期文件
+        yield from iter_frames(select_files("前期 (Early Career)"), "前期")
+
+        # 2. 选择后期文件
+        yield from iter_frames(select_files("后期 (Late Career)"), "后期")
+
+    # 3. 导出与分析 (边处理边写出)
+    export_and_summarize(frames())
+
+
+def batch_main(argv):
+    """
+    批处理模式：不弹任何对话框，适合服务器 / 定时任务
+    示例:
+      python 情绪稳定性.py --period 前期=2013-2015_Genius/ --period 后期=2020-2025/
+      python 情绪稳定性.py --tree 原始数据及数据处理结果/ -o result.xlsx
+    """
+    global ENGINE, SEGMENTER
+
+    parser = argparse.ArgumentParser(description="Faker 文本情感量化工具 (批处理模式)")
+    add_input_arguments(parser)
+    parser.add_argument('-o', '--output', default="faker_sentiment_analysis_final.xlsx",
+                        help='句子级结果输出路径，按扩展名选择格式 (.parquet/.feather/.csv/.xlsx)；'
+                             '大规模语料建议用 .parquet，xlsx 最多约 104 万行且写入很慢')
+    parser.add_argument('--format', choices=list(WRITERS), dest='fmt',
+                        help='显式指定输出格式 (默认按 --output 的扩展名判断)')
+    parser.add_argument('--figure', default='faker_variance_comparison.png',
+                        help='方差对比图输出路径')
+    add_format_argument(parser)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='情感打分进程数 (默认 1 不并行，0 表示使用全部 CPU 核心)')
+    parser.add_argument('--engine', choices=['snownlp', 'batch'], default=ENGINE,
+                        help='打分引擎：snownlp 逐句打分；batch 向量化批量打分 (结果等价，快一个数量级)')
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_DEPTH, metavar='文档数',
+                        help=f'后台线程提前读取、分句的文档数，与打分重叠执行 (默认 {PREFETCH_DEPTH}，0 为不预读)')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='路径',
+                        help=f'启用得分缓存 (SQLite)，不给路径时使用 {DEFAULT_CACHE_PATH}')
+    parser.add_argument('--cache-size', type=int, default=2_000_000,
+                        help='缓存最多保存的句子数，超出后按最近使用时间淘汰')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, metavar='路径',
+                        help='增量模式：按 (时期, 文档) 保存统计量，只对新增或修改的文档重新打分，'
+                             '未选择的文档从统计中删除；本次重新打分的句子写入 <输出>_本次更新.<扩展名>，'
+                             f'不覆盖之前的完整结果；不给路径时使用 {DEFAULT_STORE_PATH}')
+    parser.add_argument('--significance', type=int, nargs='?', const=10_000, default=0, metavar='次数',
+                        help='对首末时期的方差差异做 bootstrap 置信区间和置换检验 (默认 10000 次重抽样)，'
+                             '使用 --workers 个进程')
+    add_segmenter_arguments(parser)
+    add_store_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    start_profiling(args)
+
+    use_headless()
+    periods = collect_period_files(args, ('.docx',))
+    if not periods:
+        parser.error("没有找到任何 .docx 文件")
+
+    print("=== Faker 文本情感量化工具 (批处理模式) ===")
+    ENGINE = args.engine
+    SEGMENTER = segmenter_from_args(args)
+    use_store(args, periods, SEGMENTER)
+
+    pool = create_pool(args.workers)
+    cache = None
+    if args.cache:
+        cache = SentimentCache(args.cache, version=snownlp_model_version(), max_entries=args.cache_size)
+    store = None
+    todo = periods
+    output = args.output
+    if args.store:
+        split_tag = 'legacy-split' if SEGMENTER is None else SEGMENTER.version
+        store = StabilityStore(args.store, version=f"{snownlp_model_version()}-{split_tag}")
+        todo, digests = plan_updates(periods, store)
+        print(f"[统计库] {sum(map(len, todo.values()))} / {len(digests)} 个文档需要重新打分")
+        # 统计库只保存统计量，不保存句子：本次重新打分的句子写入单独的文件，不覆盖之前的完整结果
+        base, ext = os.path.splitext(output)
+        output = f"{base}_本次更新{ext}"
+    try:
+        frames = (frame for period, files in todo.items()
+                  for frame in iter_frames(files, period, pool, cache, args.prefetch,
+                                           source_labels(periods[period])))
+        if store is not None:
+            frames = update_store(frames, store, digests)
+        stats = export_and_summarize(frames, output, args.figure, show=False, fmt=args.fmt,
+                                     store=store, periods=list(periods),
+                                     significance=args.significance, workers=args.workers,
+                                     figure_format=args.figure_format)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if cache is not None:
+            print(f"\n[情感缓存] {cache.summary()}")
+            cache.close()
+        finish_profiling(args)
+
+    return 0 if stats is not None else 1
+
+
+def main(argv=None):
+    """带命令行参数时进入批处理模式，否则弹出文件选择窗口"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv:
+        return batch_main(argv)
+    return gui_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
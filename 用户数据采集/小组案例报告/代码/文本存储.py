@@ -0,0 +1,305 @@
+"""
+已抽取文本的存储 (内存映射)
+每个文档只解压、解析一次，段落 (和分好的句子) 以 UTF-8 依次写入同一个文件；之后的运行直接 mmap，
+按索引中的字节偏移切片读取，不再解析 .docx —— 冷启动只是打开三个文件。
+  text-<代>.bin     每个文档依次存放：段落区 (每段以 \\n 结尾)、句子区 (可选，每句以 \\n 结尾)
+  offsets-<代>.npy  int64 字节偏移，一个区占 n + 1 项：第 i 段 = blob[o[i]:o[i + 1] - 1]
+  index.json        每个文档的路径、大小、修改时间 (ns)、内容哈希、各区在 offsets 中的位置、分句规则版本
+读取时文档的大小或修改时间变了即视为未命中 (调用方回到 docx 解析)；sync() 时再按内容哈希判断是否真的修改，
+只重新解析修改过的文档，其余文档的字节从旧文件直接复制；解析失败的文档不写入存储，下次 sync() 时重试。数据文件按“代”命名，index.json 最后原子替换，
+其它进程不会读到写了一半的存储。
+
+    store = TextStore()
+    store.sync(files, segmenter)     # 首次解析全部文档，之后没有变化时不写任何文件
+    文本提取.TEXT_STORE = store      # read_paragraphs / read_text 自动从存储读取
+"""
+import glob
+import json
+import mmap
+import os
+from itertools import chain
+
+import numpy as np
+
+import 文本提取
+from 文本提取 import iter_docx_paragraphs
+from 分词缓存 import file_hash
+from 性能剖析 import PROFILER
+
+DEFAULT_TEXT_DIR = os.path.join('.faker_cache', 'text')
+
+# 文本提取规则变化时递增，使旧存储整体失效
+STORE_TAG = 'docx-stream-v1'
+
+
+class TextStore:
+    """
+    用法:
+        store = TextStore('.faker_cache/text')
+        store.sync(files)
+        store.paragraphs(path)                 # 段落列表；不在存储中或文档已修改时返回 None
+        store.sentences(path, version)         # 按该分句规则版本存好的句子，没有时返回 None
+        store.view(path)                       # 段落区的 memoryview (零复制)
+    """
+
+    def __init__(self, folder=DEFAULT_TEXT_DIR):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.index_path = os.path.join(folder, 'index.json')
+        self.generation = 0
+        self.docs = {}
+        self._mmap = None
+        self._view = memoryview(b'')
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _file(self, kind, generation):
+        ext = 'bin' if kind == 'text' else 'npy'
+        return os.path.join(self.folder, f"{kind}-{generation}.{ext}")
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('tag') != STORE_TAG:
+                return
+            generation = index['generation']
+            offsets = np.load(self._file('offsets', generation), mmap_mode='r')
+            with open(self._file('text', generation), 'rb') as f:
+                # 空文件不能 mmap
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+        except (OSError, ValueError, KeyError):
+            return  # 没有存储或存储损坏：视为空，下次 sync 时重建
+        self.close()
+        self.generation = generation
+        self.docs = {doc['path']: doc for doc in index['documents']}
+        self.offsets = offsets
+        self._mmap = blob
+        self._view = memoryview(blob) if blob is not None else memoryview(b'')
+
+    def close(self):
+        view, blob = self._view, self._mmap
+        self._view = memoryview(b'')
+        self._mmap = None
+        self.offsets = np.zeros(0, dtype=np.int64)
+        try:
+            view.release()
+            if blob is not None:
+                blob.close()
+        except BufferError:
+            pass  # 调用方仍持有 view() 返回的切片：映射留给垃圾回收关闭
+
+    def __len__(self):
+        return len(self.docs)
+
+    # ------------------------------------------
+    # 读取
+    # ------------------------------------------
+
+    def _entry(self, file_path):
+        """文档的索引项；不在存储中或大小 / 修改时间已变化时返回 None"""
+        entry = self.docs.get(os.path.abspath(file_path))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if (st.st_size, st.st_mtime_ns) != (entry['size'], entry['mtime_ns']):
+            return None
+        return entry
+
+    def _region(self, region):
+        first, count = region
+        return self.offsets[first:first + count + 1].tolist()
+
+    def _strings(self, region):
+        bounds = self._region(region)
+        view = self._view
+        return [str(view[a:b - 1], 'utf-8') for a, b in zip(bounds, bounds[1:])]
+
+    def paragraphs(self, file_path):
+        entry = self._entry(file_path)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._strings(entry['paragraphs'])
+
+    def sentences(self, file_path, version):
+        """按分句规则 version (见 句子切分.Segmenter.version) 存好的句子"""
+        entry = self._entry(file_path)
+        if entry is None or entry.get('segmenter') != version:
+            return None
+        self.hits += 1
+        return self._strings(entry['sentences'])
+
+    def view(self, file_path):
+        """段落区 (各段以 \\n 结尾) 的 memoryview，不复制"""
+        entry = self._entry(file_path)
+        if entry is None:
+            return None
+        bounds = self._region(entry['paragraphs'])
+        return self._view[bounds[0]:bounds[-1]]
+
+    def text(self, file_path):
+        """整篇文本 (段落以换行连接)，与 文本提取.read_text 相同"""
+        view = self.view(file_path)
+        if view is None:
+            return None
+        self.hits += 1
+        return str(view[:-1], 'utf-8') if len(view) else ''
+
+    def file_hash(self, file_path):
+        """存储中记录的内容哈希 (大小和修改时间未变时)，与 分词缓存.file_hash 相同"""
+        entry = self._entry(file_path)
+        return entry['sha1'] if entry is not None else None
+
+    # ------------------------------------------
+    # 写入
+    # ------------------------------------------
+
+    def sync(self, files, segmenter=None):
+        """
+        使存储覆盖 files 中的全部文档，返回重新解析的文档数
+        新增或内容变化的文档重新解析；只是修改时间变了 (或文件移动过) 的文档按内容哈希复用原有文本；
+        segmenter 给出时补齐该规则的句子区 (从已存的段落切分，不解析 docx)；已不存在的文档从存储中删除。
+        解析失败的文档打印错误后跳过，不存成空文档 (否则之后按大小 / 修改时间命中，再也不会重试)。
+        没有任何变化时不写文件
+        """
+        version = segmenter.version if segmenter is not None else None
+        by_hash = {doc['sha1']: doc for doc in self.docs.values()}
+        wanted = {os.path.abspath(f): None for f in files}
+        plan = []
+        changed = False
+        for path in chain(self.docs, (p for p in wanted if p not in self.docs)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                changed = True
+                continue
+            entry = self.docs.get(path)
+            if entry is not None and (st.st_size, st.st_mtime_ns) == (entry['size'], entry['mtime_ns']):
+                digest, source = entry['sha1'], entry
+            else:
+                digest = file_hash(path)
+                source = by_hash.get(digest)
+                changed = True
+            if path in wanted and version is not None and (source is None or source.get('segmenter') != version):
+                changed = True
+                split = segmenter
+            else:
+                split = None
+            plan.append((path, st, digest, source, split))
+
+        if not changed:
+            return 0
+        return self._write(plan)
+
+    def _write(self, plan):
+        generation = self.generation + 1
+        text_path, offsets_path = self._file('text', generation), self._file('offsets', generation)
+        offsets, documents = [], []
+        parsed = 0
+        pos = 0
+        with open(text_path + '.tmp', 'wb') as f:
+            def put(strings):
+                nonlocal pos
+                first = len(offsets)
+                offsets.append(pos)
+                for s in strings:
+                    data = s.encode('utf-8') + b'\n'
+                    f.write(data)
+                    pos += len(data)
+                    offsets.append(pos)
+                return [first, len(offsets) - first - 1]
+
+            def copy(region):
+                nonlocal pos
+                bounds = np.array(self._region(region), dtype=np.int64)
+                f.write(self._view[bounds[0]:bounds[-1]])
+                first = len(offsets)
+                offsets.extend((bounds - bounds[0] + pos).tolist())
+                pos += int(bounds[-1] - bounds[0])
+                return [first, len(bounds) - 1]
+
+            for path, st, digest, source, split in plan:
+                if source is None:
+                    # 先完整解析再写入：出错时不留下半个文档
+                    try:
+                        paragraphs = list(PROFILER.iterate('docx解析', iter_docx_paragraphs(path),
+                                                           os.path.basename(path)))
+                    except Exception as e:
+                        print(f"❌ 读取文件失败: {path}\n错误: {e}")
+                        continue
+                doc = {'path': path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha1': digest}
+                if source is not None:
+                    doc['paragraphs'] = copy(source['paragraphs'])
+                    paragraphs = self._strings(source['paragraphs']) if split is not None else None
+                else:
+                    doc['paragraphs'] = put(paragraphs)
+                    parsed += 1
+                if split is not None:
+                    with PROFILER.stage('分句', doc=os.path.basename(path)):
+                        doc['sentences'] = put(split.sentences(paragraphs))
+                    doc['segmenter'] = split.version
+                elif source is not None and source.get('segmenter'):
+                    doc['sentences'] = copy(source['sentences'])
+                    doc['segmenter'] = source['segmenter']
+                documents.append(doc)
+
+        with open(offsets_path + '.tmp', 'wb') as f:
+            np.save(f, np.array(offsets, dtype=np.int64))
+        os.replace(text_path + '.tmp', text_path)
+        os.replace(offsets_path + '.tmp', offsets_path)
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'tag': STORE_TAG, 'generation': generation, 'documents': documents}, f, ensure_ascii=False)
+        os.replace(tmp, self.index_path)
+
+        self._load()
+        self._remove_stale()
+        return parsed
+
+    def _remove_stale(self):
+        """删掉旧代的数据文件 (Windows 上仍被其它进程映射的文件删不掉，下次再删)"""
+        keep = {self._file('text', self.generation), self._file('offsets', self.generation)}
+        for path in glob.glob(os.path.join(self.folder, 'text-*.bin')) + \
+                glob.glob(os.path.join(self.folder, 'offsets-*.npy')):
+            if path not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def summary(self):
+        size = len(self._view) / 1e6
+        return f"{len(self.docs)} 个文档 / {size:.1f} MB，命中 {self.hits} / 未命中 {self.misses} 次"
+
+
+# ==========================================
+# 命令行参数
+# ==========================================
+
+def add_store_arguments(parser):
+    """为解析器添加统一的文本存储参数"""
+    parser.add_argument('--text-store', nargs='?', const=DEFAULT_TEXT_DIR, metavar='目录',
+                        help='把抽取出的文本存入内存映射文件，之后的运行不再解析 .docx '
+                             f'(按大小 / 修改时间 / 内容哈希自动更新)；不给目录时使用 {DEFAULT_TEXT_DIR}')
+
+
+def use_store(args, periods, segmenter=None):
+    """
+    按 --text-store 打开并同步存储，设为 文本提取 的全局存储；未指定时返回 None
+    segmenter: 同时存好该规则的句子 (情绪稳定性 / 综合分析)
+    """
+    if not args.text_store:
+        return None
+    store = TextStore(args.text_store)
+    with PROFILER.stage('文本存储同步'):
+        parsed = store.sync(chain.from_iterable(periods.values()), segmenter)
+    文本提取.TEXT_STORE = store
+    print(f"[文本存储] {len(store)} 个文档，本次解析 {parsed} 个")
+    return store
@@ -0,0 +1,151 @@
+"""
+流式 .docx 文本提取
+直接增量解析压缩包里的 word/document.xml，逐段产出文本，
+不构建 python-docx 的完整对象树，也不拼接整篇长字符串，内存占用与文档长度无关。
+与 doc.paragraphs 相比，额外包含表格单元格和文本框中的段落。
+"""
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from 性能剖析 import PROFILER
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+P = W + 'p'
+T = W + 't'
+TAB = W + 'tab'
+PTAB = W + 'ptab'
+BR = W + 'br'
+CR = W + 'cr'
+BODY = W + 'body'
+BR_TYPE = W + 'type'
+# 文本框在 mc:AlternateContent 中会以 Choice/Fallback 各存一份，只取 Choice
+FALLBACK = MC + 'Fallback'
+
+# prefetch 默认最多提前读好的文档数
+PREFETCH_DEPTH = 2
+
+# 已抽取文本的存储 (见 文本存储.TextStore)，由 --text-store 设置；命中时不再解压、解析 .docx
+TEXT_STORE = None
+
+
+def iter_docx_paragraphs(file_path):
+    """
+    逐段产出 .docx 中去除首尾空白后的非空段落
+    文本规则与 python-docx 的 paragraph.text 一致 (制表符 -> \\t，换行 -> \\n)
+    """
+    with zipfile.ZipFile(file_path) as zf, zf.open('word/document.xml') as f:
+        stack = []  # 每层一个段落的文本片段 (文本框中的段落嵌套在外层段落里)
+        fallback = 0
+        body = None
+        body_depth = depth = 0
+
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                depth += 1
+                if tag == FALLBACK:
+                    fallback += 1
+                elif fallback:
+                    continue
+                elif tag == P:
+                    stack.append([])
+                elif tag == BODY:
+                    body, body_depth = elem, depth
+                continue
+
+            depth -= 1
+            if tag == FALLBACK:
+                fallback -= 1
+            elif fallback or not stack:
+                pass
+            elif tag == T:
+                stack[-1].append(elem.text or '')
+            elif tag in (TAB, PTAB):
+                stack[-1].append('\t')
+            elif tag == CR or (tag == BR and elem.get(BR_TYPE, 'textWrapping') == 'textWrapping'):
+                stack[-1].append('\n')
+            elif tag == P:
+                text = ''.join(stack.pop()).strip()
+                if text:
+                    yield text
+
+            # body 的一个直接子元素 (段落/表格) 处理完毕，释放已解析的节点
+            if body is not None and depth == body_depth:
+                body.clear()
+
+
+def read_paragraphs(file_path):
+    """容错版本：文件不存在或读取失败时打印错误并结束，不抛异常"""
+    doc = os.path.basename(file_path) if file_path else None
+    if TEXT_STORE is not None and file_path:
+        paragraphs = TEXT_STORE.paragraphs(file_path)
+        if paragraphs is not None:
+            return PROFILER.iterate('文本存储读取', iter(paragraphs), doc)
+    return PROFILER.iterate('docx解析', _read_paragraphs(file_path), doc)
+
+
+def _read_paragraphs(file_path):
+    if not file_path or not os.path.exists(file_path):
+        return
+    try:
+        yield from iter_docx_paragraphs(file_path)
+    except Exception as e:
+        print(f"❌ 读取文件失败: {file_path}\n错误: {e}")
+
+
+def read_text(file_path):
+    """整篇文本 (段落以换行连接)，供仍需完整字符串的旧代码使用"""
+    if TEXT_STORE is not None and file_path:
+        text = TEXT_STORE.text(file_path)
+        if text is not None:
+            return text
+    return "\n".join(read_paragraphs(file_path))
+
+
+def read_sentences(file_path, version):
+    """文本存储中按分句规则 version 存好的句子；没有存储或未命中时返回 None"""
+    if TEXT_STORE is None or not file_path:
+        return None
+    return TEXT_STORE.sentences(file_path, version)
+
+
+def stored_hash(file_path):
+    """文本存储中记录的内容哈希 (文档未修改时)；没有时返回 None"""
+    if TEXT_STORE is None or not file_path:
+        return None
+    return TEXT_STORE.file_hash(file_path)
+
+
+def prefetch(items, load, depth=PREFETCH_DEPTH, threads=1):
+    """
+    在后台线程中提前加载后面的文档 (解压、XML 解析、分句等)，与调用方的打分重叠执行
+    按 items 的顺序产出 (item, load(item))，load 抛出的异常在取到该文档时重新抛出
+    depth: 已提交但调用方尚未取走的文档最多 depth 个 (有界队列)，调用方处理得慢时读取自动暂停，
+           目录再大也不会一次全部读入内存；depth 为 0 时不开线程，逐个在当前线程加载
+    """
+    if depth <= 0:
+        for item in items:
+            yield item, load(item)
+        return
+
+    items = iter(items)
+    window = deque()
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='docx-prefetch') as executor:
+        try:
+            for item in items:
+                window.append((item, executor.submit(load, item)))
+                if len(window) > depth:
+                    item, future = window.popleft()
+                    yield item, future.result()
+            while window:
+                item, future = window.popleft()
+                yield item, future.result()
+        finally:
+            # 调用方提前结束时丢弃尚未开始的任务
+            for _, future in window:
+                future.cancel()
@@ -0,0 +1,183 @@
+"""
+方差 / 标准差差异的显著性检验 (bootstrap 置信区间 + 置换检验)
+所有重抽样一次生成一个下标矩阵 (每行一次重抽样)，一次取值、按行求和得到每次重抽样的统计量；
+矩阵按 MAX_CELLS 分块，内存占用固定；workers > 1 时各块分给多个进程计算。
+
+方差只需要 Σx 与 Σx²，因此每行只做一次取值和两次求和；数据先减去均值，避免大数相消。
+某组的有效值不超过 ddof 个 (如没有可打分句子的时期) 时统计量无定义，结果为 NaN。
+
+用法:
+    result = compare(early_scores, late_scores, stat='var', ddof=1)
+    result['diff'], result['low'], result['high'], result['p_value']
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 每块下标矩阵的元素个数上限 (约 48MB：int32 下标 + float64 取值)
+MAX_CELLS = 1 << 22
+
+N_RESAMPLES = 10_000
+
+
+def _statistic(s1, s2, n, stat, ddof):
+    """由 Σx、Σx² 计算方差 (stat='var') 或标准差 (stat='std')"""
+    var = np.maximum(s2 - s1 * s1 / n, 0.0) / (n - ddof)
+    return np.sqrt(var) if stat == 'std' else var
+
+
+def statistic(values, stat='var', ddof=1):
+    values = np.asarray(values, dtype=float)
+    if len(values) <= ddof:
+        return float('nan')
+    centered = values - values.mean()
+    return float(_statistic(centered.sum(), (centered * centered).sum(), len(values), stat, ddof))
+
+
+def _bootstrap_worker(task):
+    """有放回重抽样 n_resamples 次，返回每次的统计量"""
+    x, n_resamples, seed, stat, ddof = task
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    out = np.empty(n_resamples)
+    if n <= ddof:
+        out.fill(np.nan)
+        return out
+    rows = max(1, MAX_CELLS // n)
+    for begin in range(0, n_resamples, rows):
+        end = min(begin + rows, n_resamples)
+        idx = rng.integers(0, n, size=(end - begin, n), dtype=np.int32)
+        xs = x[idx]
+        out[begin:end] = _statistic(xs.sum(axis=1), np.einsum('ij,ij->i', xs, xs), n, stat, ddof)
+    return out
+
+
+def _permutation_worker(task):
+    """
+    随机重新分组 n_resamples 次，返回每次 stat(组 a) - stat(组 b)
+    每行只抽取较小一组的成员 (不放回的部分洗牌)，另一组的 Σx、Σx² 由总和相减得到
+    抽取逐行调用 rng.choice：它在 C 中做部分洗牌，每行只需一遍 O(total)。整块生成下标矩阵的写法
+    (随机键 + argpartition、rng.permuted、按字节分桶) 每行同样是 O(total)，实测并不更快：
+    几百到几千句时持平，10 万句时慢 1.7-3 倍
+    """
+    pooled, n_a, n_resamples, seed, stat, ddof = task
+    rng = np.random.default_rng(seed)
+    total = len(pooled)
+    n_b = total - n_a
+    m = min(n_a, n_b)
+    out = np.empty(n_resamples)
+    if min(n_a, n_b) <= ddof:
+        out.fill(np.nan)
+        return out
+    t1, t2 = pooled.sum(), (pooled * pooled).sum()
+    rows = max(1, MAX_CELLS // m)
+    for begin in range(0, n_resamples, rows):
+        end = min(begin + rows, n_resamples)
+        idx = np.empty((end - begin, m), dtype=np.int64)
+        for r in range(end - begin):
+            idx[r] = rng.choice(total, m, replace=False, shuffle=False)
+        xs = pooled[idx]
+        s1, s2 = xs.sum(axis=1), np.einsum('ij,ij->i', xs, xs)
+        if m == n_a:
+            a1, a2, b1, b2 = s1, s2, t1 - s1, t2 - s2
+        else:
+            a1, a2, b1, b2 = t1 - s1, t2 - s2, s1, s2
+        out[begin:end] = _statistic(a1, a2, n_a, stat, ddof) - _statistic(b1, b2, n_b, stat, ddof)
+    return out
+
+
+def _run(worker, make_task, n_resamples, seed, workers):
+    """把 n_resamples 次重抽样拆成若干任务 (各自独立的随机种子)，可选多进程执行"""
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    parts = min(workers, n_resamples)
+    sizes = [n_resamples // parts + (i < n_resamples % parts) for i in range(parts)]
+    seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = seed.spawn(parts)
+    tasks = [make_task(size, s) for size, s in zip(sizes, seeds)]
+    if parts == 1:
+        return worker(tasks[0])
+    with ProcessPoolExecutor(max_workers=parts) as executor:
+        return np.concatenate(list(executor.map(worker, tasks)))
+
+
+def _centered(values):
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    return values - values.mean() if len(values) else values
+
+
+def bootstrap(values, stat='std', ddof=0, n_resamples=N_RESAMPLES, seed=None, workers=1):
+    """单组统计量的 bootstrap 分布 (长度为 n_resamples 的数组)"""
+    x = _centered(values)
+    return _run(_bootstrap_worker, lambda size, s: (x, size, s, stat, ddof), n_resamples, seed, workers)
+
+
+def bootstrap_ci(values, stat='std', ddof=0, n_resamples=N_RESAMPLES, confidence=0.95, seed=None, workers=1):
+    """单组统计量的百分位 bootstrap 置信区间，返回 {'estimate', 'low', 'high'}"""
+    dist = bootstrap(values, stat, ddof, n_resamples, seed, workers)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(dist, [alpha, 1 - alpha])
+    return {'estimate': statistic(values, stat, ddof), 'low': float(low), 'high': float(high)}
+
+
+def permutation_test(a, b, stat='var', ddof=1, n_resamples=N_RESAMPLES, alternative='two-sided',
+                     seed=None, workers=1):
+    """
+    置换检验：H0 为两组来自同一分布，检验统计量为 stat(a) - stat(b)
+    alternative: 'two-sided' / 'greater' (a 更大) / 'less'
+    返回 {'observed', 'p_value'}，p 值含 +1 校正；某组有效值不超过 ddof 个时两者均为 NaN
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    a, b = a[~np.isnan(a)], b[~np.isnan(b)]
+    if min(len(a), len(b)) <= ddof:
+        return {'observed': float('nan'), 'p_value': float('nan')}
+    pooled = np.concatenate([a, b])
+    pooled -= pooled.mean()
+    observed = statistic(a, stat, ddof) - statistic(b, stat, ddof)
+
+    dist = _run(_permutation_worker, lambda size, s: (pooled, len(a), size, s, stat, ddof),
+                n_resamples, seed, workers)
+    # 浮点误差内相等的也算作“至少一样极端”
+    eps = 1e-12 * max(1.0, abs(observed))
+    if alternative == 'greater':
+        extreme = dist >= observed - eps
+    elif alternative == 'less':
+        extreme = dist <= observed + eps
+    else:
+        extreme = np.abs(dist) >= abs(observed) - eps
+    return {'observed': observed, 'p_value': float((extreme.sum() + 1) / (n_resamples + 1))}
+
+
+def compare(a, b, stat='var', ddof=1, n_resamples=N_RESAMPLES, confidence=0.95, seed=None, workers=1):
+    """
+    比较两组的方差 / 标准差：差值 stat(a) - stat(b) 的 bootstrap 置信区间 + 双侧置换检验 p 值
+    返回 {'diff', 'low', 'high', 'p_value', 'n_a', 'n_b'}
+    """
+    seeds = np.random.SeedSequence(seed).spawn(3)
+    dist_a = bootstrap(a, stat, ddof, n_resamples, seeds[0], workers)
+    dist_b = bootstrap(b, stat, ddof, n_resamples, seeds[1], workers)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(dist_a - dist_b, [alpha, 1 - alpha])
+    test = permutation_test(a, b, stat, ddof, n_resamples, seed=seeds[2], workers=workers)
+    return {
+        'diff': test['observed'],
+        'low': float(low),
+        'high': float(high),
+        'p_value': test['p_value'],
+        'n_a': int(np.count_nonzero(~np.isnan(np.asarray(a, dtype=float)))),
+        'n_b': int(np.count_nonzero(~np.isnan(np.asarray(b, dtype=float)))),
+    }
+
+
+def describe_comparison(result, label_a, label_b, stat='var', alpha=0.05):
+    """一行文字说明，如：前期 → 后期 方差下降 0.052 (95% CI [0.021, 0.083]，p = 0.0012，显著)"""
+    name = '方差' if stat == 'var' else '标准差'
+    if np.isnan(result['p_value']):
+        return f"{label_a} → {label_b} {name}: 样本不足，无法检验 (n = {result['n_a']} / {result['n_b']})"
+    trend = '下降' if result['diff'] > 0 else '上升'
+    verdict = '显著' if result['p_value'] < alpha else '不显著'
+    return (f"{label_a} → {label_b} {name}{trend} {abs(result['diff']):.3f} "
+            f"(95% CI [{result['low']:.3f}, {result['high']:.3f}]，p = {result['p_value']:.4f}，{verdict})")
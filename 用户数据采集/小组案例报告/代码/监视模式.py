@@ -0,0 +1,358 @@
+"""
+监视模式：原始数据目录中有新增或修改的文件时，自动增量更新分析结果
+采用轮询 (不依赖 inotify，Windows / 网络盘同样可用)：每 interval 秒比较一次各文件的 (大小, 修改时间)，
+变化的文件再按内容哈希确认 (只改了修改时间的文件不处理)；最后一次变化之后安静 debounce 秒才开始处理，
+正在复制的文件不会被读到一半。
+  .docx            只对变化的文档打分：写出 <时期>/<文档名>_分析结果.xlsx，更新统计库 (见 稳定性统计库)
+                   中该文档的条目，再由统计库重画各时期方差对比图、重写 稳定性汇总.csv
+  .csv / .xlsx 等  只分析变化的得分表：<表名>_volatility.png，重写 波动汇总.csv (见 情绪波动)
+所有输出先写到 *.partial.* 再 os.replace，其它程序不会读到写了一半的结果；
+每轮处理向 watch_log.jsonl 追加一行 JSON (时间、处理的文件、耗时、错误)。
+处理失败的文件 (如结果表被 Excel 占用、得分表还没复制完) 记入重试集合，RETRY_DELAY 秒后即使没有再变化也重新处理；
+文档和得分表分开处理，一边出错不影响另一边。
+
+    python 监视模式.py --tree 原始数据及数据处理结果/ --out-dir 监视结果/
+    python 监视模式.py --tree 原始数据及数据处理结果/ --once      # 只处理一轮 (如定时任务)
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from 命令行工具 import add_input_arguments, collect_period_files, expand_paths, source_labels
+from 分词缓存 import file_hash
+from 情感缓存 import DEFAULT_CACHE_PATH, SentimentCache, snownlp_model_version
+from 稳定性统计库 import StabilityStore
+from 结果输出 import open_writer
+from 表格缓存 import TableCache
+from 句子切分 import add_segmenter_arguments, segmenter_from_args
+from 图表渲染 import add_format_argument, renderer, save_figure, use_headless
+import 情绪稳定性 as stability
+import 情绪波动 as volatility
+
+TABLE_EXTS = ('.csv', '.xlsx', '.xls', '.parquet', '.feather', '.arrow')
+
+# 原子写出时的临时文件标记：<名称>.partial.<扩展名>
+PARTIAL = '.partial'
+
+# 默认的轮询间隔与安静时间 (秒)
+POLL_INTERVAL = 1.0
+DEBOUNCE = 2.0
+
+# 处理失败的文件在这之后重试 (秒)
+RETRY_DELAY = 30.0
+
+
+# ==========================================
+# 1. 原子写出
+# ==========================================
+
+def partial_path(path):
+    base, ext = os.path.splitext(path)
+    return f"{base}{PARTIAL}{ext}"
+
+
+def write_frame_atomic(frame, path):
+    """整表写到临时文件后替换 (格式按扩展名，见 结果输出)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = partial_path(path)
+    with open_writer(tmp) as writer:
+        writer.write(frame)
+    os.replace(tmp, path)
+
+
+def write_csv_atomic(path, header, rows):
+    tmp = partial_path(path)
+    with open(tmp, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+
+def save_figure_atomic(fig, path, formats=None):
+    """同 图表渲染.save_figure，每种格式先写临时文件再替换，返回正式路径"""
+    base = os.path.splitext(path)[0]
+    paths = []
+    for tmp in save_figure(fig, partial_path(path), formats):
+        out = base + tmp[len(base) + len(PARTIAL):]
+        os.replace(tmp, out)
+        paths.append(out)
+    return paths
+
+
+def remove_quietly(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# ==========================================
+# 2. 监视与增量处理
+# ==========================================
+
+class Watcher:
+    """
+    用法:
+        watcher = Watcher(args)
+        watcher.run()            # 一直运行，Ctrl+C 结束
+        watcher.run(once=True)   # 处理一轮后返回
+    """
+
+    def __init__(self, args, pool=None, cache=None):
+        self.args = args
+        self.out_dir = args.out_dir
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.pool = pool
+        self.cache = cache
+        split_tag = 'legacy-split' if stability.SEGMENTER is None else stability.SEGMENTER.version
+        self.store_version = f"{snownlp_model_version()}-{split_tag}"
+        self.store = self._open_store()
+        self.state_path = os.path.join(self.out_dir, 'watch_state.json')
+        self.log_path = os.path.join(self.out_dir, 'watch_log.jsonl')
+        self.tables = self._load_state()
+        self.seen = {}  # 上一轮处理时各文件的 (大小, 修改时间)
+        self.retry = set()  # 上一轮处理失败、需要重新处理的文件
+        self.retry_at = 0.0
+
+    def _open_store(self):
+        return StabilityStore(os.path.join(self.out_dir, 'stability.json'), version=self.store_version)
+
+    def _load_state(self):
+        """各得分表上次分析时的内容哈希、汇总行和图表路径"""
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f).get('tables', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        tmp = partial_path(self.state_path)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'tables': self.tables}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.state_path)
+
+    def _outside_output(self, path):
+        out = os.path.abspath(self.out_dir) + os.sep
+        return not os.path.abspath(path).startswith(out) and PARTIAL + '.' not in os.path.basename(path)
+
+    def poll(self):
+        """返回 (时期 -> 文档, 得分表, {路径: (大小, 修改时间)})"""
+        periods = {}
+        for period, files in collect_period_files(self.args, ('.docx',)).items():
+            files = [f for f in files if self._outside_output(f)]
+            if files:
+                periods[period] = files
+        roots = list(self.args.tables) or ([self.args.tree] if self.args.tree else [])
+        tables = [f for f in expand_paths(roots, TABLE_EXTS) if self._outside_output(f)]
+
+        snapshot = {}
+        for path in [f for files in periods.values() for f in files] + tables:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # 轮询期间被删除
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return periods, tables, snapshot
+
+    def run(self, interval=POLL_INTERVAL, debounce=DEBOUNCE, once=False):
+        previous, changed_at = None, time.monotonic()
+        while True:
+            periods, tables, snapshot = self.poll()
+            now = time.monotonic()
+            if snapshot != previous:
+                previous, changed_at = snapshot, now
+            retry_due = self.retry and now >= self.retry_at
+            if (snapshot != self.seen or retry_due) and (once or now - changed_at >= debounce):
+                self.process(periods, tables, snapshot)
+            if once:
+                return
+            time.sleep(interval)
+
+    def process(self, periods, tables, snapshot):
+        """处理一轮：只对变化的文档 / 得分表重新分析，结果追加到运行日志"""
+        start = time.perf_counter()
+        changed = {path for path, signature in snapshot.items() if self.seen.get(path) != signature}
+        changed |= self.retry & set(snapshot)
+        self.retry = set()
+        record = {'time': datetime.now().isoformat(timespec='seconds'),
+                  'documents': [], 'removed': [], 'tables': [], 'sentences': 0, 'errors': []}
+        # 守护进程不因一轮失败而退出：文档和得分表各自捕获异常，失败的文件记入 self.retry
+        try:
+            self.update_documents(periods, changed, record)
+        except Exception as e:
+            # 出错时只看 (大小, 修改时间) 会以为已经处理过：这一轮变化的文档全部重试；
+            # 内存中未保存的统计一并丢弃，重试时才会重新打分并写出汇总
+            self.store = self._open_store()
+            self.fail([f for files in periods.values() for f in files if f in changed], e, record)
+        self.update_tables(tables, changed, record)
+        record['status'] = 'error' if record['errors'] else 'ok'
+        self.seen = snapshot
+        if self.retry:
+            self.retry_at = time.monotonic() + RETRY_DELAY
+        record['seconds'] = round(time.perf_counter() - start, 3)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if record['documents'] or record['removed'] or record['tables'] or record['status'] != 'ok':
+            print(f"[{record['time']}] 文档 {len(record['documents'])} 个 / 删除 {len(record['removed'])} 个 / "
+                  f"得分表 {len(record['tables'])} 个，用时 {record['seconds']:.2f}s")
+
+    def fail(self, paths, error, record):
+        """记录失败，paths 在 RETRY_DELAY 秒后重试"""
+        message = f"{type(error).__name__}: {error}"
+        self.retry.update(paths)
+        record['errors'].append({'files': list(paths), 'error': message})
+        print(f"❌ 处理失败 ({len(paths)} 个文件，{RETRY_DELAY:.0f}s 后重试): {message}")
+
+    # ---------- .docx ----------
+
+    def document_output(self, period, source):
+        stem = os.path.splitext(source)[0]
+        return os.path.join(self.out_dir, period, f"{stem}_分析结果.{self.args.table_format}")
+
+    def update_documents(self, periods, changed, record):
+        digests = {}
+        todo = {}
+        labels = {period: source_labels(files) for period, files in periods.items()}
+        for period, files in periods.items():
+            for f in files:
+                key = (period, labels[period][f])
+                entry = self.store.entries.get(key)
+                # 大小和修改时间都没变的文档沿用统计库中的哈希，不重新读取
+                digests[key] = entry['hash'] if entry is not None and f not in changed else file_hash(f)
+                if not self.store.is_current(*key, digests[key]):
+                    todo.setdefault(period, []).append(f)
+        removed = [key for key in self.store.entries if key not in digests]
+        if not todo and not removed:
+            return
+
+        for period, files in todo.items():
+            for frame in stability.iter_frames(files, period, self.pool, self.cache, labels=labels[period]):
+                key = (period, frame['Source'].iat[0])
+                write_frame_atomic(frame, self.document_output(*key))
+                self.store.put(*key, digests[key], frame['Sentiment_Score'])
+                record['documents'].append(os.path.join(*key))
+                record['sentences'] += len(frame)
+        for key, digest in digests.items():
+            if not self.store.is_current(*key, digest):
+                # 没有有效句子的文档：统计记为空，旧的结果表删掉
+                self.store.put(*key, digest, [])
+                remove_quietly([self.document_output(*key)])
+                record['documents'].append(os.path.join(*key))
+        for key in removed:
+            remove_quietly([self.document_output(*key)])
+            record['removed'].append(os.path.join(*key))
+        self.store.sync(digests)
+        self.store.save()
+
+        stats = self.store.period_stats(list(periods))
+        write_csv_atomic(os.path.join(self.out_dir, '稳定性汇总.csv'), ['Period', 'count', 'mean', 'var'],
+                         stats.reset_index().itertuples(index=False))
+        if not stats.empty:
+            fig = renderer(stability.VarianceFigure).render(stats, None)
+            save_figure_atomic(fig, os.path.join(self.out_dir, 'faker_variance_comparison.png'),
+                               self.args.figure_format)
+
+    # ---------- 得分表 ----------
+
+    def update_tables(self, tables, changed, record):
+        dirty = False
+        for path in tables:
+            if path not in changed and path in self.tables:
+                continue
+            try:
+                digest = file_hash(path)
+                if self.tables.get(path, {}).get('hash') == digest:
+                    continue
+                state = self.analyze_table(path, digest)
+            except Exception as e:  # 一个表出错不影响其他表；状态中仍是旧哈希，重试时会重新分析
+                self.fail([path], e, record)
+                continue
+            self.tables[path] = state
+            record['tables'].append(path)
+            dirty = True
+
+        for path in [p for p in self.tables if p not in tables]:
+            remove_quietly(self.tables.pop(path)['figures'])
+            record['removed'].append(path)
+            dirty = True
+        if dirty:
+            write_csv_atomic(os.path.join(self.out_dir, '波动汇总.csv'), ['File', 'Group', 'Std', 'Status'],
+                             ([path] + row for path, state in self.tables.items() for row in state['rows']))
+            self._save_state()
+
+    def analyze_table(self, path, digest):
+        """分析一个得分表，返回新的状态 (内容哈希、汇总行、图表路径)；读取失败时抛出异常"""
+        state = {'hash': digest, 'rows': [], 'figures': self.tables.get(path, {}).get('figures', [])}
+        df = volatility.load_data(path)
+        if df is None:
+            raise OSError(f"无法读取 {path}")
+        volatilities, all_scores_dict, score_col_name = volatility.analyze_file_volatility(df)
+        if not volatilities:
+            return state
+        stem = os.path.splitext(os.path.basename(path))[0]
+        fig = volatility.plot_volatility(volatilities, all_scores_dict, score_col_name)
+        state['figures'] = save_figure_atomic(fig, os.path.join(self.out_dir, '波动性', f"{stem}_volatility.png"),
+                                              self.args.figure_format)
+        state['rows'] = [[str(label), vol, volatility.describe_volatility(vol)]
+                         for label, vol in volatilities.items()]
+        return state
+
+
+# ==========================================
+# 3. 主程序
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Faker 分析结果的监视模式 (新增或修改的文件自动增量更新)")
+    add_input_arguments(parser)
+    parser.add_argument('--tables', action='append', default=[], metavar='路径',
+                        help='要监视的得分表 (CSV/Excel/Parquet/Feather 文件、目录或通配符)，可重复；默认为 --tree 目录')
+    parser.add_argument('--out-dir', default='监视结果', help='输出目录 (结果表、图表、统计库、运行日志)')
+    parser.add_argument('--table-format', choices=['xlsx', 'csv', 'parquet', 'feather'], default='xlsx',
+                        help='每个文档的句子级结果格式')
+    add_format_argument(parser)
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='轮询间隔 (秒)')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help='最后一次变化后等待多少秒再处理 (文件仍在写入时不会被读到一半)')
+    parser.add_argument('--once', action='store_true', help='只处理一轮就退出')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='情感打分进程数 (默认 1 不并行，0 表示使用全部 CPU 核心)')
+    parser.add_argument('--engine', choices=['snownlp', 'batch'], default=stability.ENGINE,
+                        help='打分引擎：snownlp 逐句打分；batch 向量化批量打分 (结果等价，快一个数量级)')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='路径',
+                        help=f'启用得分缓存 (SQLite)，不给路径时使用 {DEFAULT_CACHE_PATH}')
+    add_segmenter_arguments(parser)
+    args = parser.parse_args(argv)
+    if not (args.tree or args.manifest or args.period or args.inputs or args.tables):
+        parser.error("请用 --tree / --manifest / --period / --tables 指定要监视的文件")
+
+    use_headless()
+    volatility.INTERACTIVE = False
+    volatility.TABLE_CACHE = TableCache()
+    stability.ENGINE = args.engine
+    stability.SEGMENTER = segmenter_from_args(args)
+    pool = stability.create_pool(args.workers)
+    cache = SentimentCache(args.cache, version=snownlp_model_version()) if args.cache else None
+
+    print(f"=== Faker 监视模式: 每 {args.interval:g}s 检查一次，结果写入 {args.out_dir} (Ctrl+C 结束) ===")
+    watcher = Watcher(args, pool, cache)
+    try:
+        watcher.run(args.interval, args.debounce, args.once)
+    except KeyboardInterrupt:
+        print("\n监视已停止。")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if cache is not None:
+            cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+情绪稳定性的增量统计库
+按 (Period, Source) 保存每个文档的 count / mean / M2 (以及文档内容哈希)；Source 为文档相对于该时期
+各文档共同所在目录的路径 (见 命令行工具.source_labels)，不同子目录中的同名文档各自一条，
+各时期的 count / mean / var 由这些条目直接合并得到 (见 在线统计.RunningStats)。
+新增或修改一个文档只需对这个文档重新打分；删除文档只需删掉对应条目。
+
+文件格式为 JSON，写入时先写临时文件再替换：
+    {"version": ..., "entries": [{"period", "source", "hash", "count", "mean", "m2"}, ...]}
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from 在线统计 import RunningStats
+
+DEFAULT_STORE_PATH = os.path.join('.faker_cache', 'stability.json')
+
+# 分句 / 打分 / 四舍五入规则变化时递增，使旧的统计失效
+STORE_TAG = 'stability-v1'
+
+
+class StabilityStore:
+    """
+    用法:
+        store = StabilityStore(version=snownlp_model_version())
+        if not store.is_current('前期', '前期采访.docx', digest):
+            store.put('前期', '前期采访.docx', digest, scores)
+        store.sync(current_keys)     # 删除本次未选择的文档
+        stats = store.period_stats()  # 与 df.groupby('Period')['Sentiment_Score'].agg(['count','mean','var']) 相同
+        store.save()
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, version=''):
+        self.path = path
+        self.version = f"{STORE_TAG}-{version}"
+        self.entries = {}  # (period, source) -> {'hash', 'count', 'mean', 'm2'}，保持插入顺序
+        self.updated = 0
+        self.removed = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.version:
+            print(f"[统计库] 打分规则已变化，丢弃旧统计: {self.path}")
+            return
+        for item in data.get('entries', []):
+            self.entries[(item['period'], item['source'])] = {
+                'hash': item['hash'], 'count': item['count'], 'mean': item['mean'], 'm2': item['m2']}
+
+    def is_current(self, period, source, digest):
+        """该文档的统计是否已存在且内容未变"""
+        entry = self.entries.get((period, source))
+        return entry is not None and entry['hash'] == digest
+
+    def put(self, period, source, digest, scores):
+        """写入 (或替换) 一个文档的统计；只需要这个文档自己的得分"""
+        stats = RunningStats()
+        stats.update(np.asarray(scores, dtype=float))
+        self.entries.pop((period, source), None)
+        self.entries[(period, source)] = {
+            'hash': digest, 'count': stats.count, 'mean': stats.mean, 'm2': stats.m2}
+        self.updated += 1
+
+    def remove(self, period, source):
+        if self.entries.pop((period, source), None) is not None:
+            self.removed += 1
+
+    def sync(self, keys):
+        """只保留 keys 中的 (period, source)，其余视为已删除的文档"""
+        keys = set(keys)
+        for key in [k for k in self.entries if k not in keys]:
+            self.remove(*key)
+
+    def period_stats(self, periods=None):
+        """
+        按时期合并各文档的统计，返回以 Period 为索引、含 count/mean/var (ddof=1) 的 DataFrame
+        periods: 时期的输出顺序，为空时按条目的插入顺序
+        """
+        merged = {}
+        for (period, _), entry in self.entries.items():
+            stats = merged.setdefault(period, RunningStats())
+            stats._merge_moments(entry['count'], entry['mean'], entry['m2'])
+
+        order = [p for p in periods if p in merged] if periods is not None else list(merged)
+        rows = [(merged[p].count, merged[p].mean if merged[p].count else np.nan, merged[p].variance(ddof=1))
+                for p in order]
+        stats = pd.DataFrame(rows, index=pd.Index(order, name='Period'), columns=['count', 'mean', 'var'])
+        return stats[stats['count'] > 0]
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        data = {
+            'version': self.version,
+            'entries': [{'period': p, 'source': s, **entry} for (p, s), entry in self.entries.items()],
+        }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        return f"共 {len(self.entries)} 个文档，本次更新 {self.updated} 个，删除 {self.removed} 个"
@@ -0,0 +1,253 @@
+"""
+句子级结果的流式输出
+打分过程中每处理完一批就写出一批，不在内存里攒下整张表，也不受 xlsx 行数上限限制。
+支持的格式 (按扩展名自动选择，也可以用 fmt 指定):
+  .parquet          Parquet，按行组 (row group) 增量写入
+  .feather / .arrow Feather v2 (Arrow IPC 文件)，按记录批增量写入
+  .csv              分块追加写入 (UTF-8)
+  .xlsx             Excel，仅用于小规模报告 (openpyxl 写入很慢，最多 1048575 行)
+Parquet / Feather 中 Period、Source 按字典 (categorical) 编码，读回 pandas 时为 category 类型。
+
+用法:
+    with open_writer('result.parquet') as writer:
+        for frame in frames:
+            writer.write(frame)
+"""
+import abc
+import os
+
+import numpy as np
+import pandas as pd
+
+# 按字典编码的列 (取值很少、重复极多)
+CATEGORICAL_COLUMNS = ('Period', 'Source')
+
+# Parquet 行组 / Arrow 记录批的行数：攒够这么多行才写一次，避免产生大量零碎的小块
+ROW_GROUP_SIZE = 65536
+
+# Excel 单个工作表最多 1048576 行，其中一行是表头
+EXCEL_MAX_ROWS = 1048575
+
+
+def _require_pyarrow(fmt):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"{fmt} 格式需要安装 pyarrow: pip install pyarrow") from None
+
+
+class ResultWriter(abc.ABC):
+    """输出格式的公共部分：计数、上下文管理；子类实现 _write / _close"""
+
+    fmt = None
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.closed = False
+
+    def write(self, frame):
+        """写出一批结果 (DataFrame 或 dict 列表)"""
+        if not isinstance(frame, pd.DataFrame):
+            frame = pd.DataFrame(frame)
+        if frame.empty:
+            return
+        self._write(frame)
+        self.rows += len(frame)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._close()
+
+    @abc.abstractmethod
+    def _write(self, frame):
+        """写出一批非空的 DataFrame"""
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ArrowWriter(ResultWriter):
+    """Parquet / Feather 共用：缓冲到 ROW_GROUP_SIZE 行后转换为 Arrow 并写出"""
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE, categorical=CATEGORICAL_COLUMNS):
+        _require_pyarrow(self.fmt)
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.categorical = tuple(categorical)
+        self._categories = {}  # 列名 -> {取值: 编码}，跨批次只增不改，编码保持稳定
+        self._buffer = []
+        self._buffered = 0
+        self._schema = None
+        self._writer = None
+
+    def _encode(self, column, values):
+        import pyarrow as pa
+
+        index = self._categories.setdefault(column, {})
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        mapping = np.array([index.setdefault(str(v), len(index)) for v in uniques], dtype=np.int32)
+        return pa.DictionaryArray.from_arrays(mapping[codes], pa.array(list(index), pa.string()))
+
+    def _to_batch(self, frame):
+        import pyarrow as pa
+
+        arrays = []
+        for column in frame.columns:
+            if column in self.categorical:
+                arrays.append(self._encode(column, frame[column].to_numpy()))
+            else:
+                array = pa.Array.from_pandas(frame[column])
+                # pandas 的 Arrow 字符串列会转换为分块数组，合并为一块
+                arrays.append(array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array)
+        batch = pa.RecordBatch.from_arrays(arrays, names=[str(c) for c in frame.columns])
+        if self._schema is None:
+            self._schema = batch.schema
+            self._open(self._schema)
+        elif batch.schema != self._schema:
+            batch = batch.cast(self._schema)
+        return batch
+
+    def _write(self, frame):
+        self._buffer.append(frame)
+        self._buffered += len(frame)
+        if self._buffered >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        frame = self._buffer[0] if len(self._buffer) == 1 else pd.concat(self._buffer, ignore_index=True)
+        self._buffer, self._buffered = [], 0
+        self._write_batch(self._to_batch(frame))
+
+    def _close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+    @abc.abstractmethod
+    def _open(self, schema):
+        """按第一批数据的 schema 创建底层写入器"""
+
+    @abc.abstractmethod
+    def _write_batch(self, batch):
+        """写出一个 pyarrow.RecordBatch"""
+
+
+class ParquetResultWriter(_ArrowWriter):
+    fmt = 'parquet'
+
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(self.path, schema, compression='zstd')
+
+    def _write_batch(self, batch):
+        import pyarrow as pa
+
+        self._writer.write_table(pa.Table.from_batches([batch]))
+
+
+class FeatherResultWriter(_ArrowWriter):
+    fmt = 'feather'
+
+    def _open(self, schema):
+        import pyarrow.ipc as ipc
+
+        # 字典只增不改，后续批次以增量 (delta) 的形式追加新取值
+        options = ipc.IpcWriteOptions(compression='lz4', emit_dictionary_deltas=True)
+        self._writer = ipc.new_file(self.path, schema, options=options)
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+
+class CsvResultWriter(ResultWriter):
+    """每批直接追加到文件末尾；不写 BOM，pd.read_csv(encoding='utf-8') 读回时列名不受影响"""
+
+    fmt = 'csv'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+
+    def _write(self, frame):
+        frame.to_csv(self._file, index=False, header=self.rows == 0)
+
+    def _close(self):
+        self._file.close()
+
+
+class ExcelResultWriter(ResultWriter):
+    """openpyxl 无法高效流式写入，这里只缓冲到关闭时一次写出；超过行数上限时立即报错"""
+
+    fmt = 'xlsx'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._buffer = []
+
+    def _write(self, frame):
+        if self.rows + len(frame) > EXCEL_MAX_ROWS:
+            raise ValueError(f"xlsx 最多容纳 {EXCEL_MAX_ROWS} 行结果，请改用 .parquet / .feather / .csv 输出")
+        self._buffer.append(frame)
+
+    def _close(self):
+        frame = pd.concat(self._buffer, ignore_index=True) if self._buffer else pd.DataFrame()
+        self._buffer = []
+        frame.to_excel(self.path, index=False)
+
+
+WRITERS = {
+    'parquet': ParquetResultWriter,
+    'feather': FeatherResultWriter,
+    'csv': CsvResultWriter,
+    'xlsx': ExcelResultWriter,
+}
+
+EXTENSIONS = {
+    '.parquet': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.csv': 'csv',
+    '.xlsx': 'xlsx',
+}
+
+
+def detect_format(path):
+    """根据扩展名判断输出格式"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError(f"无法根据扩展名判断输出格式: {path} (支持 {', '.join(EXTENSIONS)})")
+    return EXTENSIONS[ext]
+
+
+def open_writer(path, fmt=None, **options):
+    """
+    打开一个结果写出器
+    fmt: 'parquet' / 'feather' / 'csv' / 'xlsx'，为空时按扩展名判断
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"不支持的输出格式: {fmt} (可选 {', '.join(WRITERS)})")
+    return WRITERS[fmt](path, **options)
+
+
+def read_results(path):
+    """读回任意一种格式的结果表 (Parquet / Feather 中的字典列读回为 category)"""
+    fmt = detect_format(path)
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    if fmt == 'feather':
+        return pd.read_feather(path)
+    if fmt == 'csv':
+        return pd.read_csv(path, encoding='utf-8')
+    return pd.read_excel(path)
@@ -0,0 +1,307 @@
+"""
+综合分析：一次运行完成全部分析
+每个 .docx 只解析一次，段落同时送往各项分析：
+  - 分句 + 情感打分 (情绪稳定性)      -> 句子级结果、各时期方差
+  - 同一批得分                        -> 各时期波动性 (情绪波动)
+  - 一次 jieba 分词 + 一次关键词计数   -> 锋芒 / 沉稳密度 (心态演变分析)、个人 / 团队密度 (个人到团队主义演变)
+中间结果 (段落、句子、分词) 按文档保存在 Document 中，同一次运行内只计算一次；
+跨运行的缓存沿用各脚本的 --cache (情感得分) 与 --token-cache (分词结果)。
+结果统一写入 --out-dir：句子级结果、汇总表 (faker_summary.csv) 和全部图表。
+
+示例:
+  python 综合分析.py --tree ../原始数据及数据处理结果/ --out-dir 综合结果/ --engine batch
+"""
+import argparse
+import csv
+import os
+import sys
+from functools import cached_property
+from itertools import chain
+
+from 命令行工具 import add_input_arguments, collect_period_files, source_labels
+from 文本提取 import read_paragraphs, read_sentences
+from 关键词匹配 import PreTokenized, iter_words, shared_matcher
+from 分词缓存 import DEFAULT_TOKEN_DIR, TokenCache
+from 情感缓存 import DEFAULT_CACHE_PATH, SentimentCache, snownlp_model_version
+from 结果输出 import WRITERS
+from 句子缓冲 import SentenceBuffer
+from 句子切分 import add_segmenter_arguments, segmenter_from_args
+from 文本存储 import add_store_arguments, use_store
+from 图表渲染 import add_format_argument, save_figure, use_headless
+from 性能剖析 import PROFILER, add_profile_arguments, finish_profiling, start_profiling
+import 分词词典
+import 情绪稳定性 as stability
+import 情绪波动 as volatility
+import 心态演变分析 as mindset
+import 个人到团队主义演变 as identity
+
+SUMMARY_NAME = 'faker_summary.csv'
+
+
+# ==========================================
+# 1. 单个文档的中间结果
+# ==========================================
+
+class Document:
+    """
+    一个文档在本次运行中的中间结果，各属性第一次访问时才计算，之后直接复用
+    用法:
+        doc = Document('前期采访.docx', '前期')
+        doc.sentences, doc.tokens      # 共用同一份段落，文档只解析一次
+        doc.release()                  # 不再需要原文时释放段落
+    name 为结果中的来源标签 (见 命令行工具.source_labels)，默认为文件名
+    """
+
+    def __init__(self, path, period, token_cache=None, name=None):
+        self.path = path
+        self.period = period
+        self.name = name or os.path.basename(path)
+        self.token_cache = token_cache
+
+    @cached_property
+    def paragraphs(self):
+        return list(read_paragraphs(self.path))
+
+    @cached_property
+    def sentences(self):
+        if stability.SEGMENTER is not None:
+            stored = read_sentences(self.path, stability.SEGMENTER.version)
+            if stored is not None:
+                return stored
+        return list(stability.iter_sentences(self.paragraphs))
+
+    @cached_property
+    def tokens(self):
+        """jieba 分词结果；有分词缓存时优先读缓存，未命中时直接对已解析的段落分词"""
+        if self.token_cache is not None:
+            return self.token_cache.tokens(self.path, self.paragraphs)
+        return list(iter_words(self.paragraphs))
+
+    def release(self):
+        self.__dict__.pop('paragraphs', None)
+
+
+def join_tokens(docs):
+    """同一时期多个文档的分词结果依次拼接，与 分词缓存.TokenCache.corpus 相同 (文档之间补一个换行符)"""
+    tokens = []
+    for doc in docs:
+        if not doc.tokens:
+            continue
+        if tokens:
+            tokens.append("\n")
+        tokens.extend(doc.tokens)
+    return tokens
+
+
+# ==========================================
+# 2. 一遍处理全部文档
+# ==========================================
+
+def analyze_periods(periods, pool=None, cache=None, token_cache=None, match_mode='jieba'):
+    """
+    逐个时期、逐个文档解析一次，同时提交情感打分并计算关键词密度
+    使用进程池时打分任务先全部提交，主进程分词的同时子进程在打分
+    四类关键词由共用匹配器一次计数 (见 关键词匹配.shared_matcher)
+    返回 (待取结果的 [(时期, 来源标签, 句子, 得分)], {时期: 各项密度})
+    """
+    pending = []
+    densities = {}
+    for period, files in periods.items():
+        print(f"正在分析: {period} ({len(files)} 个文档)...")
+        labels = source_labels(files)
+        docs = [Document(f, period, token_cache, labels[f]) for f in files]
+        for doc in docs:
+            print(f"正在处理{period}文档: {doc.name}...")
+            with PROFILER.stage('读取分句', doc=doc.name) as stage:
+                sentences = doc.sentences
+                stage.items = len(sentences)
+            if sentences:
+                with PROFILER.stage('情感打分', doc=doc.name, items=len(sentences)):
+                    scores = stability.score_sentences(sentences, pool, cache=cache)
+                    if pool is None:
+                        scores = list(scores)
+                if pool is not None:
+                    scores = PROFILER.iterate('等待打分进程', scores, doc=doc.name)
+                pending.append((period, doc.name, sentences, scores))
+            if match_mode == 'jieba':
+                doc.tokens
+                doc.release()
+
+        if match_mode == 'jieba':
+            source = PreTokenized(join_tokens(docs))
+        else:
+            source = list(chain.from_iterable(doc.paragraphs for doc in docs))
+        with PROFILER.stage('关键词密度', doc=period):
+            counts, total = shared_matcher().count(source, match_mode)
+            agg, mat = mindset.density_from_counts(counts, total)
+            personal, team = identity.identity_density_from_counts(counts, total)
+        densities[period] = {
+            'Aggression': agg * mindset.SCALE_FACTOR,
+            'Maturity': mat * mindset.SCALE_FACTOR,
+            'Personal': personal,
+            'Team': team,
+        }
+        for doc in docs:
+            doc.release()
+    return pending, densities
+
+
+def iter_frames(pending):
+    """按文件顺序取回得分并组装句子级结果"""
+    for period, name, sentences, scores in pending:
+        yield stability.build_frame(sentences, scores, period, name)
+
+
+# ==========================================
+# 3. 汇总输出
+# ==========================================
+
+def print_summary(rows):
+    print("\n📊 综合结果:")
+    print(f"{'时期':<15} | {'句数':>6} | {'均值':>7} | {'方差':>7} | {'标准差':>7} | "
+          f"{'锋芒':>6} | {'沉稳':>6} | {'个人':>6} | {'团队':>6}")
+    print("-" * 95)
+    for r in rows:
+        print(f"{r['Period']:<15} | {r['Sentences']:>6} | {r['Mean']:>7.4f} | {r['Variance']:>7.4f} | "
+              f"{r['Std']:>7.4f} | {r['Aggression']:>6.2f} | {r['Maturity']:>6.2f} | "
+              f"{r['Personal']:>6.2f} | {r['Team']:>6.2f}")
+
+
+def summarize(periods, stats, volatilities, densities):
+    """按时期合并各项指标 (没有有效句子的时期，句子相关的指标为空)"""
+    rows = []
+    for period in periods:
+        has_stats = stats is not None and period in stats.index
+        rows.append({
+            'Period': period,
+            'Sentences': int(stats.loc[period, 'count']) if has_stats else 0,
+            'Mean': stats.loc[period, 'mean'] if has_stats else float('nan'),
+            'Variance': stats.loc[period, 'var'] if has_stats else float('nan'),
+            'Std': volatilities.get(str(period), float('nan')),
+            **densities[period],
+        })
+    return rows
+
+
+def write_summary(rows, path):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"汇总结果已保存为: {path}")
+
+
+def save_figures(figures, out_dir, formats):
+    for name, plot in figures:
+        with PROFILER.stage('绘图', doc=name):
+            paths = save_figure(plot(), os.path.join(out_dir, name), formats)
+        for path in paths:
+            print(f"[可视化完成] 图表已保存为: {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Faker 综合分析 (每个文档只解析一次，全部分析一起输出)")
+    add_input_arguments(parser)
+    parser.add_argument('--out-dir', default='综合结果', help='输出目录 (句子级结果、汇总表、图表)')
+    parser.add_argument('-o', '--output', default='faker_sentiment_analysis_final.xlsx',
+                        help='句子级结果文件名 (位于 --out-dir 下)，按扩展名选择格式 (.parquet/.feather/.csv/.xlsx)')
+    parser.add_argument('--format', choices=list(WRITERS), dest='fmt',
+                        help='显式指定句子级结果格式 (默认按 --output 的扩展名判断)')
+    add_format_argument(parser)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='情感打分进程数 (默认 1 不并行，0 表示使用全部 CPU 核心)')
+    parser.add_argument('--engine', choices=['snownlp', 'batch'], default=stability.ENGINE,
+                        help='打分引擎：snownlp 逐句打分；batch 向量化批量打分 (结果等价，快一个数量级)')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='路径',
+                        help=f'启用得分缓存 (SQLite)，不给路径时使用 {DEFAULT_CACHE_PATH}')
+    parser.add_argument('--cache-size', type=int, default=2_000_000,
+                        help='缓存最多保存的句子数，超出后按最近使用时间淘汰')
+    parser.add_argument('--match-mode', choices=['jieba', 'raw'], default='jieba',
+                        help='关键词计数方式：jieba 按分词边界 (默认)；raw 不分词直接匹配原文')
+    parser.add_argument('--token-cache', nargs='?', const=DEFAULT_TOKEN_DIR, metavar='目录',
+                        help=f'复用 jieba 分词缓存 (仅 jieba 模式)，不给目录时使用 {DEFAULT_TOKEN_DIR}')
+    parser.add_argument('--plain-jieba', action='store_true',
+                        help='使用原生 jieba 词典，不并入关键词 (用于与旧结果对比)')
+    parser.add_argument('--significance', type=int, nargs='?', const=10_000, default=0, metavar='次数',
+                        help='首末时期方差差异、各时期标准差的 bootstrap / 置换检验 (默认 10000 次重抽样)')
+    add_segmenter_arguments(parser)
+    add_store_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    start_profiling(args)
+
+    分词词典.USE_LEXICON = not args.plain_jieba
+    use_headless()
+    volatility.INTERACTIVE = False
+    periods = collect_period_files(args, ('.docx',))
+    if not periods:
+        parser.error("没有找到任何 .docx 文件")
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    print("=== Faker 综合分析工具 (批处理模式) ===")
+    stability.ENGINE = args.engine
+    stability.SEGMENTER = segmenter_from_args(args)
+    use_store(args, periods, stability.SEGMENTER)
+    pool = stability.create_pool(args.workers)
+    cache = None
+    if args.cache:
+        cache = SentimentCache(args.cache, version=snownlp_model_version(), max_entries=args.cache_size)
+    token_cache = TokenCache(args.token_cache) if args.token_cache and args.match_mode == 'jieba' else None
+    try:
+        pending, densities = analyze_periods(periods, pool, cache, token_cache, args.match_mode)
+
+        # 句子级结果 + 方差 (情绪稳定性)；时期和得分同时留给波动性分析
+        collected = SentenceBuffer(keep_text=False)
+        stats = stability.export_and_summarize(
+            iter_frames(pending), os.path.join(args.out_dir, args.output),
+            os.path.join(args.out_dir, 'faker_variance_comparison.png'), show=False, fmt=args.fmt,
+            significance=args.significance, workers=args.workers, figure_format=args.figure_format,
+            buffer=collected)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if cache is not None:
+            print(f"\n[情感缓存] {cache.summary()}")
+            cache.close()
+    if token_cache:
+        print(f"[分词缓存] {token_cache.summary()}")
+
+    # 波动性 (情绪波动)，直接使用上面的得分，不再读回结果文件
+    volatilities = {}
+    if len(collected):
+        with PROFILER.stage('波动计算'):
+            scores = collected.to_frame()
+            volatilities, all_scores_dict, score_col_name = volatility.analyze_file_volatility(
+                scores, score_col='Sentiment_Score', group_col='Period')
+        volatility.print_results(volatilities, score_col_name)
+        if args.significance:
+            with PROFILER.stage('显著性检验', items=args.significance):
+                intervals, comparisons = volatility.test_volatility(all_scores_dict, args.significance,
+                                                                    args.workers)
+            volatility.print_significance(intervals, comparisons)
+        save_figures([('faker_volatility.png',
+                       lambda: volatility.plot_volatility(volatilities, all_scores_dict, score_col_name))],
+                     args.out_dir, args.figure_format)
+
+    # 关键词密度 (心态演变分析 / 个人到团队主义演变)
+    stages = list(periods)
+    agg = [densities[p]['Aggression'] for p in stages]
+    mat = [densities[p]['Maturity'] for p in stages]
+    personal = [densities[p]['Personal'] for p in stages]
+    team = [densities[p]['Team'] for p in stages]
+    mindset.print_results(stages, agg, mat)
+    identity.print_results(stages, personal, team)
+    save_figures([('faker_mindset_evolution.png', lambda: mindset.plot_evolution(stages, agg, mat)),
+                  ('faker_mindset_radar.png', lambda: mindset.plot_radar(agg, mat)),
+                  ('faker_identity_shift.png', lambda: identity.plot_identity_shift(stages, personal, team))],
+                 args.out_dir, args.figure_format)
+
+    rows = summarize(stages, stats, volatilities, densities)
+    print_summary(rows)
+    write_summary(rows, os.path.join(args.out_dir, SUMMARY_NAME))
+    finish_profiling(args)
+    return 0 if stats is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+得分表的列式旁路缓存 (情绪波动.load_data 使用)
+CSV / Excel 第一次读取时整表转换为 Feather (Arrow IPC，不压缩) 存入缓存目录，
+键 = 绝对路径 + 文件大小 + 修改时间 (ns)；之后直接内存映射读取，只取用到的列 (得分列、分组列)，
+不再每次用 pd.read_excel 解析整张表。原文件修改后键随之变化，旧的旁路文件在重新转换时删除。
+Parquet / Feather 本身就是列式格式，不经过缓存。没有安装 pyarrow 时退回为直接读取。
+
+CSV 的编码只在开头一段样本上检测一次 (UTF-8 或 GBK)，不再先按 UTF-8 整表解析、失败后再按 GBK 重读。
+
+    cache = TableCache()
+    cache.columns('前期采访_分析结果.xlsx')                          # 列名 (已转换过时只读 schema)
+    df = cache.load('前期采访_分析结果.xlsx', ['Year', 'Sentiment_Score'])
+"""
+import codecs
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+from 性能剖析 import PROFILER
+
+DEFAULT_TABLE_DIR = os.path.join('.faker_cache', 'tables')
+
+# 经由缓存的格式 (其余格式本身就是列式的，直接读取)
+CACHED_EXTS = ('.csv', '.xlsx', '.xls')
+
+# 读取规则变化时递增，使旧的旁路文件失效
+TABLE_TAG = 'table-v1'
+
+# 编码检测读取的样本字节数
+SAMPLE_BYTES = 1 << 20
+
+
+def detect_encoding(file_path, sample_bytes=SAMPLE_BYTES):
+    """按开头的样本判断 CSV 编码：能按 UTF-8 解码 (含 BOM) 即为 UTF-8，否则为 GBK"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    # 样本可能在多字节字符中间截断，未读完整个文件时不要求样本末尾完整
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        decoder.decode(sample, final=len(sample) < sample_bytes)
+    except UnicodeDecodeError:
+        return 'gbk'
+    return 'utf-8'
+
+
+def csv_encodings(file_path):
+    """依次尝试的编码：检测结果在前；检测为 UTF-8 时保留 GBK 兜底 (样本之后才出现非 UTF-8 内容)"""
+    encoding = detect_encoding(file_path)
+    return (encoding, 'gbk') if encoding == 'utf-8' else (encoding,)
+
+
+def read_table(file_path, columns=None):
+    """不经缓存直接读取 CSV / Excel；columns 给出时只读取这些列"""
+    if file_path.endswith('.csv'):
+        encodings = csv_encodings(file_path)
+        for encoding in encodings:
+            try:
+                return pd.read_csv(file_path, encoding=encoding, usecols=columns)
+            except UnicodeDecodeError:
+                if encoding == encodings[-1]:
+                    raise
+    return pd.read_excel(file_path, usecols=columns)
+
+
+class TableCache:
+    """
+    用法:
+        cache = TableCache('.faker_cache/tables')
+        df = cache.load(path, columns)     # 第一次读取时转换，之后内存映射读取
+    """
+
+    def __init__(self, folder=DEFAULT_TABLE_DIR):
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+
+    def _prefix(self, file_path):
+        path_key = hashlib.sha1(f"{TABLE_TAG}\0{os.path.abspath(file_path)}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.folder, path_key)
+
+    def _path(self, file_path):
+        st = os.stat(file_path)
+        return f"{self._prefix(file_path)}-{st.st_size}-{st.st_mtime_ns}.feather"
+
+    def existing(self, file_path):
+        """已经转换好的旁路文件路径 (与原文件的大小和修改时间一致)，没有时返回 None，不做转换"""
+        path = self._path(file_path)
+        return path if os.path.exists(path) else None
+
+    def sidecar(self, file_path):
+        """返回旁路文件路径 (不存在时先转换)；无法转换 (如缺少 pyarrow、列名不是字符串) 时返回 None"""
+        path = self._path(file_path)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        with PROFILER.stage('表格缓存转换', doc=os.path.basename(file_path)) as stage:
+            df = read_table(file_path)
+            stage.items = len(df)
+            try:
+                self._save(df, file_path, path)
+            except (ImportError, ValueError, TypeError) as e:
+                print(f"[表格缓存] 跳过 {os.path.basename(file_path)}: {e}")
+                return None
+            except Exception as e:  # pyarrow 的类型转换错误 (如同一列混有数字和文字)
+                if type(e).__module__.startswith('pyarrow'):
+                    print(f"[表格缓存] 跳过 {os.path.basename(file_path)}: {e}")
+                    return None
+                raise
+        return path
+
+    def _save(self, df, file_path, path):
+        os.makedirs(self.folder, exist_ok=True)
+        # 先写临时文件再替换，并发运行时不会读到写了一半的缓存
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            df.to_feather(tmp, compression='uncompressed')
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+        # 同一原文件的旧版本
+        for old in glob.glob(f"{self._prefix(file_path)}-*.feather"):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    def columns(self, file_path):
+        """列名 (从已有旁路文件的 schema 读取)；还没有转换过时返回 None"""
+        path = self.existing(file_path)
+        if path is None:
+            return None
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        return [name for name in ipc.open_file(pa.memory_map(path, 'r')).schema.names
+                if not name.startswith('__index_level_')]
+
+    def load(self, file_path, columns=None):
+        """读取整表或其中几列；无法缓存时直接读取原文件"""
+        path = self.sidecar(file_path)
+        if path is None:
+            return read_table(file_path, columns)
+        import pyarrow as pa
+
+        with PROFILER.stage('表格缓存读取', doc=os.path.basename(file_path)) as stage:
+            # 内存映射读取，只有用到的列会被真正读入
+            df = pd.read_feather(pa.memory_map(path, 'r'), columns=columns)
+            stage.items = len(df)
+        return df
+
+    def summary(self):
+        return f"表格缓存命中 {self.hits} / 转换 {self.misses} 个文件"
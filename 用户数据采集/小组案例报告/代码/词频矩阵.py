@@ -0,0 +1,182 @@
+"""
+语料级的 文档 × 词 稀疏计数矩阵 (两个密度脚本的 --corpus 模式共用)
+整个语料中每个文档只分词一次，得到 scipy.sparse.csr_matrix；
+所有词典的命中次数 = 计数矩阵 × (词 × 类别) 指示矩阵，一次乘法覆盖全部文档、全部词典，
+分组 (时期或年份) 的结果再左乘一个 (组 × 文档) 指示矩阵，不再逐组重新分词、重新计数。
+
+    matrix = DocumentTermMatrix.build(group_documents(periods, 'year'), token_cache)
+    labels, scores = matrix.group_densities(shared_matcher())     # 组 × 类别 的密度 (%)
+"""
+import csv
+import os
+import re
+
+import numpy as np
+from scipy import sparse
+
+from 关键词匹配 import iter_words
+from 文本提取 import read_paragraphs
+from 性能剖析 import PROFILER
+
+# 文件名中的年份；(2013-2016) 这类区间取起始年份
+YEAR_PATTERN = re.compile(r'(?<!\d)((?:19|20)\d{2})(?!\d)')
+
+
+def document_year(path, period):
+    """文档所属年份：先看文件名，再看时期名，都没有年份时沿用时期名"""
+    for text in (os.path.basename(path), period):
+        m = YEAR_PATTERN.search(text)
+        if m:
+            return m.group(1)
+    return period
+
+
+def group_documents(periods, by='period'):
+    """
+    {时期: [文件, ...]} -> {组: [文件, ...]}
+    by='period' 原样返回；by='year' 按 document_year 重新分组，组按年份排序
+    """
+    if by == 'period':
+        return periods
+    groups = {}
+    for period, files in periods.items():
+        for path in files:
+            bucket = groups.setdefault(document_year(path, period), [])
+            if path not in bucket:
+                bucket.append(path)
+    return dict(sorted(groups.items()))
+
+
+class DocumentTermMatrix:
+    """
+    counts   : 文档 × 词 的计数矩阵 (csr_matrix，int32)
+    vocab    : 词表，下标即列号
+    documents: 文档路径，下标即行号 (同一文档出现在多个组时只分词一次)
+    groups   : 组 × 文档 的 0/1 矩阵，labels 为各组名称
+    """
+
+    def __init__(self, counts, vocab, documents, groups, labels):
+        self.counts = counts
+        self.vocab = vocab
+        self.documents = documents
+        self.groups = groups
+        self.labels = labels
+
+    @classmethod
+    def build(cls, grouped, token_cache=None):
+        """grouped: {组: [文件, ...]}；token_cache 为 分词缓存.TokenCache 时优先读取缓存"""
+        vocab = {}
+        documents, rows = [], {}
+        indptr, indices, data = [0], [], []
+        memberships = []
+        for g, files in enumerate(grouped.values()):
+            for path in files:
+                if path not in rows:
+                    rows[path] = len(documents)
+                    documents.append(path)
+                    with PROFILER.stage('文档-词矩阵', doc=os.path.basename(path)) as stage:
+                        tokens = token_cache.tokens(path) if token_cache else iter_words(read_paragraphs(path))
+                        ids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in tokens), dtype=np.int64)
+                        terms, freq = np.unique(ids, return_counts=True)
+                        stage.items = len(ids)
+                    indices.append(terms)
+                    data.append(freq)
+                    indptr.append(indptr[-1] + len(terms))
+                memberships.append((g, rows[path]))
+
+        shape = (len(documents), len(vocab))
+        counts = sparse.csr_matrix(
+            (np.concatenate(data).astype(np.int32) if data else np.zeros(0, np.int32),
+             np.concatenate(indices) if indices else np.zeros(0, np.int64),
+             np.array(indptr, dtype=np.int64)), shape=shape)
+        g_idx, d_idx = zip(*memberships) if memberships else ((), ())
+        groups = sparse.csr_matrix((np.ones(len(memberships), dtype=np.int32), (g_idx, d_idx)),
+                                   shape=(len(grouped), len(documents)))
+        return cls(counts, list(vocab), documents, groups, list(grouped))
+
+    def indicator(self, matcher):
+        """
+        词 × 类别 的计数矩阵 (按 KeywordMatcher.token_lookup；一个词可以属于多个类别，
+        整体成词的领域词可以在一个类别中记多次，重复的 (行, 列) 由 csr_matrix 相加)
+        """
+        rows, cols = [], []
+        lookup = matcher.token_lookup()
+        for term_id, term in enumerate(self.vocab):
+            for cat in lookup.get(term, ()):
+                rows.append(term_id)
+                cols.append(cat)
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                 shape=(len(self.vocab), len(matcher.categories)))
+
+    def document_hits(self, matcher):
+        """各文档的 (命中次数 文档 × 类别, 词数)"""
+        with PROFILER.stage('矩阵乘法', items=self.counts.nnz):
+            hits = np.asarray((self.counts @ self.indicator(matcher)).todense())
+        totals = np.asarray(self.counts.sum(axis=1)).ravel()
+        return hits, totals
+
+    def group_hits(self, matcher, document_hits=None):
+        """
+        各组的 (命中次数 组 × 类别, 词数)
+        与逐组拼接后计数一致：组内相邻的非空文档之间有一个换行符，也计入词数
+        """
+        hits, totals = document_hits if document_hits is not None else self.document_hits(matcher)
+        group_hits = self.groups @ hits
+        nonempty = self.groups @ (totals > 0).astype(np.int64)
+        group_totals = self.groups @ totals + np.maximum(nonempty - 1, 0)
+        return group_hits, group_totals
+
+    @staticmethod
+    def densities(hits, totals):
+        """命中次数 / 词数 × 100；词数为 0 的行记为 0"""
+        safe = np.where(totals > 0, totals, 1)
+        return np.where(totals[:, None] > 0, hits / safe[:, None] * 100, 0.0)
+
+    def group_densities(self, matcher):
+        """(组名列表, 组 × 类别 的密度数组)"""
+        return self.labels, self.densities(*self.group_hits(matcher))
+
+    def document_densities(self, matcher):
+        """(文档路径列表, 文档 × 类别 的密度数组)"""
+        return self.documents, self.densities(*self.document_hits(matcher))
+
+    def document_groups(self):
+        """每个文档所属的组名 (多个组时以 ; 连接)"""
+        members = self.groups.tocsc()
+        return [';'.join(self.labels[g] for g in members.indices[members.indptr[d]:members.indptr[d + 1]])
+                for d in range(len(self.documents))]
+
+    def summary(self):
+        return (f"{len(self.documents)} 个文档 / {len(self.labels)} 组 / 词表 {len(self.vocab)} 个词 / "
+                f"非零项 {self.counts.nnz}")
+
+
+# ==========================================
+# 命令行参数与输出
+# ==========================================
+
+def add_corpus_arguments(parser):
+    """为解析器添加统一的语料模式参数"""
+    group = parser.add_argument_group('语料模式')
+    group.add_argument('--corpus', action='store_true',
+                       help='整个语料建一个稀疏 文档-词 矩阵，一次算出所有文档与分组的密度 (仅 jieba 模式)')
+    group.add_argument('--group-by', choices=['period', 'year'], default='period',
+                       help='语料模式的分组方式：period 按时期 (默认)；year 按文件名中的年份')
+    group.add_argument('--doc-output', metavar='路径',
+                       help='语料模式下另存每个文档的密度表 (.csv)')
+
+
+def check_corpus_arguments(parser, args):
+    """语料模式的参数检查 (--group-by / --doc-output 隐含 --corpus)"""
+    if args.group_by != 'period' or args.doc_output:
+        args.corpus = True
+    if args.corpus and args.match_mode != 'jieba':
+        parser.error("--corpus 按分词结果建矩阵，不能与 --match-mode raw 同时使用")
+
+
+def write_table(path, header, rows):
+    """写出 utf-8-sig 编码的 CSV (Excel 可直接打开)"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
@@ -0,0 +1,179 @@
+"""
+可复现的合成中文采访语料 (性能测试用)
+句子由常用词和四个关键词词典中的词随机拼成，标点沿用真实材料的习惯：
+句末 。！？ / 句中 ， / 省略号 …… / 引号 “” / 时间戳 [12:30] / 英文队名 SKT、T1。
+相同的 (句数, 种子) 总是生成完全相同的语料。
+
+    python 语料生成.py 100k -o 合成语料/            # 生成 .docx + 得分表 (.csv)
+    python 语料生成.py 1m --scores-format parquet
+"""
+import argparse
+import os
+import random
+import sys
+import zipfile
+from itertools import islice
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from 结果输出 import open_writer
+
+# 生成规则变化时递增 (性能基准据此判断缓存的语料是否可以复用)
+GENERATOR_VERSION = 1
+
+FILLER_WORDS = [
+    '今天', '比赛', '我们', '他们', '觉得', '还是', '非常', '其实', '可能', '已经', '这个', '那个',
+    '时候', '版本', '对线', '团战', '中路', '打野', '下路', '节奏', '视野', '经验', '观众', '粉丝',
+    '教练', '队友', '对手', '准备', '训练', '状态', '英雄', '选择', '开局', '后期', '发挥', '失误',
+    '比赛里', '一直', '现在', '以前', '慢慢', '一点', '真的', '感觉', '想要', '继续', '努力', '重要',
+    '所以', '但是', '因为', '如果', '然后', '自己', '大家', '一样', '没有', '知道', '可以', '应该',
+    '世界赛', '决赛', '季后赛', '常规赛', '冠军', '舞台', '职业', '选手', '心态', '成长', '压力',
+]
+ENGLISH_WORDS = ['SKT', 'T1', 'LCK', 'MSI', 'MVP', 'Faker']
+PERIODS = ['前期', '中期', '后期']
+SOURCES = ['采访', '纪录片', '自传', '演讲', '直播', '发布会', '专访', '花絮']
+
+_SENTENCE_ENDS = ['。'] * 6 + ['！'] * 2 + ['？'] * 2
+
+
+def _lexicon_words():
+    from 关键词匹配 import load_all_lexicons
+
+    words = set()
+    for lexicon in load_all_lexicons().values():
+        words |= set(lexicon)
+    return sorted(words)
+
+
+def parse_size(text):
+    """'1k' / '100k' / '1m' / '5000' -> 句数"""
+    text = str(text).strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def generate_sentences(n_sentences, seed=0, lexicon_ratio=0.15):
+    """逐句产出合成句子 (含句末标点)，共 n_sentences 句"""
+    rng = random.Random(seed)
+    lexicon = _lexicon_words()
+    for _ in range(n_sentences):
+        words = []
+        for _ in range(rng.randint(4, 14)):
+            r = rng.random()
+            if r < lexicon_ratio:
+                words.append(rng.choice(lexicon))
+            elif r < lexicon_ratio + 0.03:
+                words.append(rng.choice(ENGLISH_WORDS))
+            else:
+                words.append(rng.choice(FILLER_WORDS))
+            if rng.random() < 0.12:
+                words.append('，')
+        sentence = ''.join(words).strip('，')
+        if rng.random() < 0.08:
+            sentence = f'“{sentence}”'
+        if rng.random() < 0.05:
+            sentence += '……'
+        yield sentence + rng.choice(_SENTENCE_ENDS)
+
+
+def generate_paragraphs(n_sentences, seed=0):
+    """逐段产出合成文本，共 n_sentences 句 (每段 3~8 句，约一成段落带时间戳)"""
+    rng = random.Random(seed + 1)
+    sentences = generate_sentences(n_sentences, seed)
+    while True:
+        paragraph = ''.join(islice(sentences, rng.randint(3, 8)))
+        if not paragraph:
+            return
+        if rng.random() < 0.1:
+            paragraph = f'[{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}] ' + paragraph
+        yield paragraph
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>')
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>')
+_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>')
+
+
+def write_docx(path, paragraphs):
+    """
+    直接写出最小的 .docx (不依赖 python-docx，百万句也只需数秒)
+    python-docx 与 文本提取 都能正常读取
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('word/_rels/document.xml.rels', _DOCUMENT_RELS)
+        with zf.open('word/document.xml', 'w') as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                    b'<w:body>')
+            for para in paragraphs:
+                f.write(f'<w:p><w:r><w:t xml:space="preserve">{escape(para)}</w:t></w:r></w:p>'.encode('utf-8'))
+            f.write(b'</w:body></w:document>')
+
+
+def write_scores(path, n_sentences, seed=0, fmt=None):
+    """
+    合成的句子级得分表 (列与 情绪稳定性 的输出相同)，用于波动性分析的性能测试
+    得分取自 Beta 分布，各时期的离散程度不同
+    """
+    rng = np.random.default_rng(seed)
+    sentences = generate_sentences(n_sentences, seed)
+    with open_writer(path, fmt) as writer:
+        while True:
+            block = list(islice(sentences, 65536))
+            if not block:
+                break
+            period = rng.integers(0, len(PERIODS), len(block))
+            spread = np.array([2.0, 1.2, 3.0])[period]
+            writer.write({
+                'Period': np.array(PERIODS)[period],
+                'Source': np.array(SOURCES)[rng.integers(0, len(SOURCES), len(block))],
+                'Sentence': block,
+                'Sentiment_Score': np.round(rng.beta(spread, spread), 4),
+            })
+    return path
+
+
+def generate_corpus(folder, n_sentences, seed=0, scores_format='csv'):
+    """在 folder 下生成 语料_<句数>.docx 与 得分_<句数>.<格式>，返回两个路径"""
+    os.makedirs(folder, exist_ok=True)
+    docx_path = os.path.join(folder, f"语料_{n_sentences}.docx")
+    scores_path = os.path.join(folder, f"得分_{n_sentences}.{scores_format}")
+    write_docx(docx_path, generate_paragraphs(n_sentences, seed))
+    write_scores(scores_path, n_sentences, seed, scores_format)
+    return docx_path, scores_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成可复现的合成中文采访语料")
+    parser.add_argument('sizes', nargs='+', help='句数，如 1k 10k 100k 1m')
+    parser.add_argument('-o', '--output', default='合成语料', help='输出目录')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--scores-format', choices=['csv', 'xlsx', 'parquet', 'feather'], default='csv',
+                        help='得分表格式 (xlsx 最多约 104 万行)')
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        docx_path, scores_path = generate_corpus(args.output, parse_size(size), args.seed, args.scores_format)
+        print(f"✅ {docx_path}  {scores_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())